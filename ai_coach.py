@@ -0,0 +1,317 @@
+# ===========================
+# 8D Training App — AI Coach
+# Streams the coach reply from a worker thread, with a hard timeout,
+# cancellation and a TTL/size-bounded response cache shared by all sessions.
+# Identical prompts in flight share one upstream request; every request goes
+# through the process-wide client pool (ai_pool: rate limit, concurrency cap).
+# ===========================
+
+import hashlib
+import json
+import queue
+import threading
+import time
+from collections import OrderedDict
+
+from ai_pool import get_pool, key_digest
+
+DEFAULT_MODEL = "gpt-4o-mini"
+COACH_TIMEOUT = 30.0      # seconds, whole reply (from when the pool lets the request through)
+CACHE_TTL = 3600.0        # seconds
+CACHE_MAXSIZE = 256       # replies
+
+SYSTEM_PROMPT = "You are a concise quality coach."
+
+_DONE = object()
+
+
+class CoachError(Exception):
+    """Raised to the UI when the coach request fails, times out or is cancelled."""
+
+
+def build_prompt(user_issue, language):
+    user_issue = " ".join((user_issue or "").split())   # notes differing only in spacing share a reply
+    return f"""You are a quality problem-solving coach for electronics (radios, speakers, amplifiers).
+User note: {user_issue}
+Return: (1) clarifying questions, (2) likely categories (People/Process/Machine/Material/Environment/Measurement),
+(3) example Occurrence and Detection Why-questions, (4) one possible root cause pattern to investigate.
+Be concise, bullet each section, write in {language}."""
+
+
+# ---------- Response cache ----------
+class TTLCache:
+    """Thread-safe LRU with per-entry expiry."""
+
+    def __init__(self, maxsize=CACHE_MAXSIZE, ttl=CACHE_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None or item[0] < time.monotonic():
+                if item is not None:
+                    del self._data[key]
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return item[1]
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.hits = self.misses = 0
+
+    def stats(self):
+        with self._lock:
+            return {"size": len(self._data), "maxsize": self.maxsize, "ttl": self.ttl,
+                    "hits": self.hits, "misses": self.misses}
+
+
+response_cache = TTLCache()
+
+
+def cache_key(prompt, language, model, api_key, base_url=None):
+    """Key of a reply in the cache and in flight; prompts differing only in letter case share it.
+
+    Replies are kept apart per API key and endpoint: a request never joins, or
+    is served from, one made with other credentials (or another key's rate budget).
+    """
+    ident = f"{model}\x00{language}\x00{key_digest(api_key)}\x00{base_url or ''}\x00{prompt.casefold()}"
+    return hashlib.sha256(ident.encode("utf-8")).hexdigest()
+
+
+# ---------- Streaming request ----------
+class _Flight:
+    """One upstream request, shared by every stream that asks the same prompt while it runs."""
+
+    def __init__(self, key, prompt, model, api_key, base_url, timeout):
+        self.key = key
+        self.prompt = prompt
+        self.model = model
+        self.timeout = timeout
+        self.parts = []
+        self.error = None
+        self.finished = False
+        self.admitted = threading.Event()    # past the pool's rate limit / concurrency queue
+        self._api_key = api_key
+        self._base_url = base_url
+        self._subscribers = []
+        self._lock = threading.Lock()
+        self._cancel = threading.Event()
+        self._upstream = None
+        self._thread = threading.Thread(target=self._run, name="ai-coach", daemon=True)
+
+    def subscribe(self):
+        """A queue that receives every fragment so far, then the rest as they arrive, then _DONE."""
+        q = queue.Queue()
+        with self._lock:
+            for part in self.parts:
+                q.put(part)
+            if self.finished:
+                q.put(_DONE)
+            else:
+                self._subscribers.append(q)
+        return q
+
+    def unsubscribe(self, q):
+        """Drop one stream; the upstream request is cancelled once nobody listens."""
+        with self._lock:
+            if q in self._subscribers:
+                self._subscribers.remove(q)
+            orphaned = not self._subscribers and not self.finished
+        if orphaned:
+            self.cancel()
+
+    def cancel(self):
+        self._cancel.set()
+        upstream = self._upstream
+        if upstream is not None:
+            try:
+                upstream.close()  # unblocks a worker waiting on the socket
+            except Exception:
+                pass
+
+    def _publish(self, delta):
+        with self._lock:
+            self.parts.append(delta)
+            for q in self._subscribers:
+                q.put(delta)
+
+    def _run(self):
+        try:
+            with get_pool().lease(self._api_key, self._base_url, cancel=self._cancel) as client:
+                self.admitted.set()
+                # Raw event stream, read to its end: stopping at [DONE] (as openai's Stream
+                # does) would make the client drop the keep-alive connection
+                with client.chat.completions.with_streaming_response.create(
+                    model=self.model,
+                    messages=[{"role": "system", "content": SYSTEM_PROMPT},
+                              {"role": "user", "content": self.prompt}],
+                    temperature=0.3,
+                    stream=True,
+                    timeout=self.timeout,
+                ) as self._upstream:
+                    for line in self._upstream.iter_lines():
+                        if self._cancel.is_set():
+                            return
+                        delta = _sse_delta(line)
+                        if delta:
+                            self._publish(delta)
+            text = "".join(self.parts)
+            if text and not self._cancel.is_set():
+                response_cache.put(self.key, text)
+        except Exception as e:
+            if not self._cancel.is_set():
+                self.error = e
+        finally:
+            if self._upstream is not None:
+                try:
+                    self._upstream.close()
+                except Exception:
+                    pass
+            with _inflight_lock:
+                if _inflight.get(self.key) is self:
+                    del _inflight[self.key]
+            with self._lock:
+                self.finished = True
+                subscribers, self._subscribers = self._subscribers, []
+            self.admitted.set()
+            for q in subscribers:
+                q.put(_DONE)
+
+
+def _sse_delta(line):
+    """Reply text carried by one server-sent event line of a streamed chat completion, if any."""
+    if not line.startswith("data:"):
+        return None
+    data = line[5:].strip()
+    if not data or data == "[DONE]":
+        return None
+    event = json.loads(data)
+    if event.get("error"):
+        raise CoachError((event["error"] or {}).get("message") or "error in reply stream")
+    choices = event.get("choices") or [{}]
+    return (choices[0].get("delta") or {}).get("content")
+
+
+_inflight = {}            # cache key -> _Flight still streaming
+_inflight_lock = threading.Lock()
+coalesced = 0             # streams that joined a request already in flight
+
+
+class CoachStream:
+    """One session's view of a coach reply, consumed via tokens().
+
+    Identical prompts asked while a reply is streaming share its upstream
+    request: the late stream replays what arrived so far, then follows live.
+    """
+
+    def __init__(self, prompt, language, key, model=DEFAULT_MODEL, timeout=COACH_TIMEOUT, flight=None, text=None):
+        self.prompt = prompt
+        self.language = language
+        self.model = model
+        self.timeout = timeout
+        self.key = key
+        self.cached = text is not None
+        self.coalesced = False
+        self.text = text or ""
+        self.error = None
+        self._flight = flight
+        self._q = flight.subscribe() if flight is not None else queue.Queue()
+        if text is not None:
+            self._q.put(text)
+            self._q.put(_DONE)
+
+    @classmethod
+    def from_cache(cls, prompt, language, key, model, text):
+        return cls(prompt, language, key, model=model, text=text)
+
+    def cancel(self):
+        if self._flight is not None:
+            self._flight.unsubscribe(self._q)
+            self._q.put(_DONE)
+
+    @property
+    def done(self):
+        return self._flight is None or self._flight.finished
+
+    @property
+    def queued(self):
+        """Whether the request is still waiting for its turn upstream (rate limit / concurrency cap)."""
+        return self._flight is not None and not self._flight.admitted.is_set()
+
+    def join(self, timeout=None):
+        """Wait for the upstream request to finish; returns whether it has."""
+        if self._flight is not None:
+            self._flight._thread.join(timeout)
+        return self.done
+
+    def tokens(self):
+        """Yield reply fragments as they arrive; raises CoachError on failure or timeout.
+
+        The timeout runs from when the request gets its turn upstream; time spent
+        queued is bounded by the pool's queue timeout instead. Closing the
+        generator early (e.g. the script is stopped by a rerun) cancels this stream.
+        """
+        deadline = time.monotonic() + self.timeout
+        finished = False
+        parts = []
+        try:
+            while True:
+                if self.queued:
+                    deadline = time.monotonic() + self.timeout
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise CoachError(f"timed out after {self.timeout:g}s")
+                try:
+                    item = self._q.get(timeout=min(remaining, 0.25))
+                except queue.Empty:
+                    continue
+                if item is _DONE:
+                    finished = True
+                    break
+                parts.append(item)
+                yield item
+            self.error = self._flight.error if self._flight is not None else None
+            if self.error is not None:
+                raise CoachError(str(self.error))
+            if self._flight is not None:
+                self.text = "".join(parts)
+        finally:
+            if not finished:
+                self.cancel()
+
+
+def ask_coach(user_issue, language, api_key, model=DEFAULT_MODEL, timeout=COACH_TIMEOUT, base_url=None):
+    """Start (or serve from cache, or join in flight) a coach reply for `user_issue`; returns a CoachStream."""
+    global coalesced
+    prompt = build_prompt(user_issue, language)
+    key = cache_key(prompt, language, model, api_key, base_url)
+    text = response_cache.get(key)
+    if text is not None:
+        return CoachStream.from_cache(prompt, language, key, model, text)
+    with _inflight_lock:
+        flight = _inflight.get(key)
+        joined = flight is not None and not flight._cancel.is_set()
+        if joined:
+            coalesced += 1
+        else:
+            flight = _inflight[key] = _Flight(key, prompt, model, api_key, base_url, timeout)
+        stream = CoachStream(prompt, language, key, model=model, timeout=timeout, flight=flight)
+    stream.coalesced = joined
+    if not joined:
+        flight._thread.start()
+    return stream
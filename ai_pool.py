@@ -0,0 +1,233 @@
+# ===========================
+# 8D Training App — AI Client Pool
+# One process-wide gate in front of the coach's upstream API: a reused client
+# (keep-alive connections) per API key and endpoint instead of a new one per
+# request, a token bucket per key, a cap on concurrent upstream calls across
+# all sessions, and queue depth / wait time stats.
+# ===========================
+
+import collections
+import contextlib
+import hashlib
+import os
+import threading
+import time
+
+RATE = float(os.environ.get("NPQP_AI_RATE", "3.0"))              # requests/second per key, sustained
+BURST = int(os.environ.get("NPQP_AI_BURST", "10"))               # requests per key allowed back to back
+MAX_CONCURRENT = int(os.environ.get("NPQP_AI_CONCURRENCY", "8"))  # upstream calls in flight, all keys
+MAX_CLIENTS = 32          # idle clients beyond this are closed, least recently used first
+QUEUE_TIMEOUT = 60.0      # seconds a request may wait for its turn before PoolBusy
+WAIT_SAMPLES = 1024       # recent wait times kept for percentiles
+
+
+class PoolBusy(Exception):
+    """Raised by lease() when a request would wait longer than its queue timeout, or was cancelled."""
+
+
+class TokenBucket:
+    """`rate` tokens/second up to `burst`. Reservations are served in order, without polling."""
+
+    def __init__(self, rate=RATE, burst=BURST, clock=time.monotonic):
+        self.rate = rate
+        self.burst = burst
+        self._clock = clock
+        self._tokens = float(burst)
+        self._at = clock()
+        self._lock = threading.Lock()
+
+    def reserve(self):
+        """Take one token; returns the seconds to wait before it may be used (0 when one is free)."""
+        with self._lock:
+            now = self._clock()
+            self._tokens = min(self.burst, self._tokens + (now - self._at) * self.rate)
+            self._at = now
+            self._tokens -= 1
+            return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+    def refund(self):
+        """Return a reserved token that was not used (the request gave up waiting)."""
+        with self._lock:
+            self._tokens = min(self.burst, self._tokens + 1)
+
+    @property
+    def available(self):
+        with self._lock:
+            return min(self.burst, self._tokens + (self._clock() - self._at) * self.rate)
+
+
+def key_digest(api_key):
+    """Stands in for an API key wherever requests are told apart by key; the key itself is not kept."""
+    return hashlib.sha256((api_key or "").encode("utf-8")).hexdigest()
+
+
+def _openai_client(api_key, base_url):
+    from openai import OpenAI
+    return OpenAI(api_key=api_key, base_url=base_url, max_retries=0)
+
+
+class _KeyState:
+    __slots__ = ("client", "bucket", "leases")
+
+    def __init__(self, client, bucket):
+        self.client = client
+        self.bucket = bucket
+        self.leases = 0
+
+
+class ClientPool:
+    """Clients, rate limits and the concurrency cap shared by every session.
+
+    Each (API key, endpoint) gets its own client and token bucket, so sessions
+    never share credentials or each other's rate budget; the concurrency cap
+    is global. `factory(api_key, base_url)` builds a client (OpenAI by default).
+    """
+
+    def __init__(self, rate=RATE, burst=BURST, max_concurrent=MAX_CONCURRENT, max_clients=MAX_CLIENTS,
+                 factory=_openai_client):
+        self.rate = rate
+        self.burst = burst
+        self.max_concurrent = max_concurrent
+        self.max_clients = max_clients
+        self._factory = factory
+        self._keys = collections.OrderedDict()   # (key digest, base_url) -> _KeyState, LRU order
+        self._lock = threading.Lock()
+        self._slot_free = threading.Condition(self._lock)
+        self.active = 0
+        self.waiting = 0
+        self.max_waiting = 0      # deepest queue seen by a caller blocked on the concurrency cap
+        self.calls = 0
+        self.rejected = 0
+        self.clients_created = 0
+        self._waits = collections.deque(maxlen=WAIT_SAMPLES)
+        self._wait_total = 0.0
+
+    def _state(self, api_key, base_url):
+        ident = (key_digest(api_key), base_url)
+        with self._lock:
+            state = self._keys.get(ident)
+            if state is not None:
+                self._keys.move_to_end(ident)
+                state.leases += 1
+                return state
+        client = self._factory(api_key, base_url)    # outside the lock: the first one imports openai
+        with self._lock:
+            state = self._keys.get(ident)
+            if state is None:
+                state = self._keys[ident] = _KeyState(client, TokenBucket(self.rate, self.burst))
+                self.clients_created += 1
+                self._evict()
+            else:
+                _close(client)      # another thread got there first
+            self._keys.move_to_end(ident)
+            state.leases += 1
+            return state
+
+    def _evict(self):
+        for ident in [i for i, s in self._keys.items() if s.leases == 0][:max(0, len(self._keys) - self.max_clients)]:
+            _close(self._keys.pop(ident).client)
+
+    @contextlib.contextmanager
+    def lease(self, api_key, base_url=None, timeout=QUEUE_TIMEOUT, cancel=None):
+        """Yield the client for `api_key` once its rate limit and the concurrency cap allow a call.
+
+        Raises PoolBusy after `timeout` seconds of waiting, or as soon as the
+        `cancel` Event is set while waiting.
+        """
+        state = self._state(api_key, base_url)
+        t0 = time.monotonic()
+        deadline = t0 + timeout
+        with self._lock:
+            self.waiting += 1
+        admitted = False
+        try:
+            delay = state.bucket.reserve()
+            if delay > timeout or (delay and _wait(cancel, delay)):
+                state.bucket.refund()
+                raise PoolBusy("rate limited" if delay > timeout else "cancelled")
+            with self._slot_free:
+                while self.active >= self.max_concurrent:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0 or (cancel is not None and cancel.is_set()):
+                        raise PoolBusy(f"{self.active} requests in flight")
+                    self.max_waiting = max(self.max_waiting, self.waiting)
+                    self._slot_free.wait(min(remaining, 0.25))
+                self.active += 1
+                self.waiting -= 1
+                admitted = True
+                waited = time.monotonic() - t0
+                self._waits.append(waited)
+                self._wait_total += waited
+                self.calls += 1
+        except PoolBusy:
+            with self._lock:
+                self.rejected += 1
+            raise
+        finally:
+            if not admitted:
+                with self._lock:
+                    self.waiting -= 1
+                    state.leases -= 1
+        try:
+            yield state.client
+        finally:
+            with self._slot_free:
+                self.active -= 1
+                state.leases -= 1
+                self._slot_free.notify()
+
+    def stats(self):
+        with self._lock:
+            waits = sorted(self._waits)
+            return {
+                "clients": len(self._keys),
+                "clients_created": self.clients_created,
+                "active": self.active,
+                "waiting": self.waiting,
+                "max_waiting": self.max_waiting,
+                "max_concurrent": self.max_concurrent,
+                "calls": self.calls,
+                "rejected": self.rejected,
+                "wait_seconds_total": self._wait_total,
+                "wait_p50": _pct(waits, 50),
+                "wait_p95": _pct(waits, 95),
+                "wait_max": waits[-1] if waits else 0.0,
+            }
+
+    def close(self):
+        with self._lock:
+            for state in self._keys.values():
+                _close(state.client)
+            self._keys.clear()
+
+
+def _wait(cancel, seconds):
+    """Sleep `seconds`; returns True if `cancel` was set meanwhile."""
+    if cancel is None:
+        time.sleep(seconds)
+        return False
+    return cancel.wait(seconds)
+
+
+def _pct(values, p):
+    return values[min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))] if values else 0.0
+
+
+def _close(client):
+    try:
+        client.close()
+    except Exception:
+        pass
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """The process-wide client pool, created on first use."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ClientPool()
+        return _pool
@@ -0,0 +1,548 @@
+# ===========================
+# 8D Training App — Cause Analytics
+# Columnar (NumPy) extract of every report's customer, product, month, fishbone
+# causes and D5 root cause, kept current from store writes, for Pareto charts
+# of categories and cause terms, recurring root causes and monthly trends.
+# Results are memoized per filter; a report change drops only the results
+# whose filter covers that report. Charts are matplotlib (Agg), cached.
+# ===========================
+
+import datetime
+import hashlib
+import io
+import json
+import re
+import threading
+import unicodedata
+from collections import OrderedDict, deque
+from functools import lru_cache
+
+import numpy as np
+
+from cause_classifier import tokens as stems
+from fishbone import RenderCache
+from report_model import FISHBONE_CATEGORIES
+
+NO_MONTH = -1             # month column sentinel (months are year * 12 + month - 1)
+NO_THEME = -1             # report without a root cause
+TOP_TERMS = 20
+TOP_THEMES = 10
+MAX_MONTHS = 60           # trend window: the latest months of the filtered range
+MEMO_SIZE = 128           # filter combinations kept
+TERM_MIN_LEN = 4
+
+_CAT_COL = {c: j for j, c in enumerate(FISHBONE_CATEGORIES)}
+_WORD = re.compile(r"[^\W\d_]+", re.UNICODE)
+_DATE = re.compile(r"^\s*(\d{4})-(\d{1,2})")                            # 2024-03-01, 2024-03
+_DMY = re.compile(r"^\s*\d{1,2}[/.-](\d{1,2})[/.-](\d{4})\s*$")          # 01/03/2024 (the app's ES format)
+_NAMED = re.compile(r"^\s*(?:\d{1,2}\s+(?:de\s+)?)?([^\W\d_]+)\.?\s+(?:\d{1,2},?\s+)?(?:de\s+)?(\d{4})\s*$")
+# Month names as report dates spell them: "March 01, 2024" (the app's EN format), "1 de marzo de 2024"
+_MONTHS = {name: i for names in (
+    "january february march april may june july august september october november december",
+    "enero febrero marzo abril mayo junio julio agosto septiembre octubre noviembre diciembre",
+    "jan feb mar apr may jun jul aug sep oct nov dec",
+    "ene feb mar abr may jun jul ago sep oct nov dic") for i, name in enumerate(names.split(), 1)}
+_MONTHS["setiembre"] = 9
+
+# Words that say nothing about the cause, EN + ES, accent-free
+_STOPWORDS = frozenset("""
+    about after also because been before being both cause caused causes could does done during each
+    from have into more most much only other over same should since some than that their them then
+    there these they this those through under very were what when where which while with without
+    would root problem issue
+    ante antes aunque cada causa causas como con contra cuando desde donde durante entre esta estaba
+    estas este esto estos fueron hace hacia hasta mismo mucho para pero poco porque puede sido sobre
+    solo tambien tanto tiene tienen todo todos tras una unas unos raiz problema
+""".split())
+_STOP_STEMS = frozenset(stems(" ".join(_STOPWORDS)))
+
+
+def _fold(text):
+    folded = unicodedata.normalize("NFKD", text.lower())
+    return "".join(c for c in folded if not unicodedata.combining(c))
+
+
+@lru_cache(maxsize=65536)
+def cause_terms(text):
+    """Distinct content words of a cause (lower-case, accent-free), as displayed in the term Pareto."""
+    return tuple(dict.fromkeys(w for w in _WORD.findall(_fold(text))
+                               if len(w) >= TERM_MIN_LEN and w not in _STOPWORDS))
+
+
+@lru_cache(maxsize=65536)
+def root_signature(text):
+    """Theme of a D5 root cause: its distinct content stems, order-free.
+
+    Root causes worded differently but built from the same words (including
+    plurals and EN/ES spellings that share a stem) count as the same theme.
+    """
+    return tuple(sorted({s for s in stems(text or "") if s not in _STOP_STEMS}))
+
+
+def _date_month(text):
+    """(year, month) of a report date as typed or as the app fills it in, else None.
+
+    Reads 2024-03-01, 01/03/2024 (day first), "March 01, 2024" and
+    "1 de marzo de 2024"; anything else (e.g. "Q1 2024") is not a date.
+    """
+    m = _DATE.match(text)
+    if m:
+        year, month = int(m[1]), int(m[2])
+    elif (m := _DMY.match(text)):
+        year, month = int(m[2]), int(m[1])
+    elif (m := _NAMED.match(text)) and _fold(m[1]) in _MONTHS:
+        year, month = int(m[2]), _MONTHS[_fold(m[1])]
+    else:
+        return None
+    return (year, month) if 1 <= month <= 12 else None
+
+
+def month_index(report_date, created_at=None):
+    """Month of a report: from its report date (see _date_month), else when it was created; NO_MONTH if neither."""
+    ym = _date_month(report_date or "")
+    if ym:
+        return ym[0] * 12 + ym[1] - 1
+    if created_at:
+        d = datetime.date.fromtimestamp(created_at)
+        return d.year * 12 + d.month - 1
+    return NO_MONTH
+
+
+def month_label(ix):
+    return f"{ix // 12:04d}-{ix % 12 + 1:02d}"
+
+
+def parse_month(label):
+    """'2025-03' -> month index; None for an empty filter."""
+    if not label:
+        return None
+    m = _DATE.match(f"{label}-01" if len(str(label)) <= 7 else str(label))
+    if not m or not 1 <= int(m[2]) <= 12:
+        raise ValueError(f"not a month: {label!r}")
+    return int(m[1]) * 12 + int(m[2]) - 1
+
+
+class AnalyticsIndex:
+    """One row per report: customer, product, month, root-cause theme, cause count per category;
+    plus (row, term) pairs for the distinct cause terms of each report.
+
+    Store writes queue the report's uid (notify, never blocks the writer); the
+    next read refetches only those reports through `fetch(uids)` (e.g.
+    ReportStore.analytics_rows). A report whose extract did not change (an edit
+    elsewhere in it) invalidates nothing. Every query is a few vectorized
+    passes over the columns, memoized per filter combination.
+    """
+
+    def __init__(self, fetch=None, capacity=1024):
+        self._fetch = fetch
+        self.customer = np.zeros(capacity, dtype=np.int32)
+        self.product = np.zeros(capacity, dtype=np.int32)
+        self.month = np.full(capacity, NO_MONTH, dtype=np.int32)
+        self.theme = np.full(capacity, NO_THEME, dtype=np.int32)
+        self.cats = np.zeros((capacity, len(FISHBONE_CATEGORIES)), dtype=np.int32)
+        self.live = np.zeros(capacity, dtype=bool)
+        # Term pairs: each row's pairs are contiguous; a rewritten row's old pairs are marked dead
+        self.pair_row = np.zeros(capacity * 8, dtype=np.int32)
+        self.pair_term = np.zeros(capacity * 8, dtype=np.int32)
+        self.pair_live = np.zeros(capacity * 8, dtype=bool)
+        self._pairs = 0
+        self._dead = 0
+        self._span = {}           # row -> (start, end) of its live pairs
+        self.names = {"customer": [""], "product": [""], "term": [], "theme": []}
+        self._ids = {k: {v: i for i, v in enumerate(names)} for k, names in self.names.items()}
+        self.theme_label = []     # first root-cause wording seen for each theme
+        self._row = {}
+        self._uid = {}
+        self._free = []
+        self._size = 0
+        self._pending = deque()
+        self._lock = threading.Lock()
+        self.version = 0
+        self._memo = OrderedDict()
+        self._options = None
+        self.hits = self.misses = self.invalidated = 0
+
+    # ---------- storage ----------
+    def _grow(self):
+        cap = len(self.live) * 2
+        for name, fill in (("customer", 0), ("product", 0), ("month", NO_MONTH), ("theme", NO_THEME),
+                           ("cats", 0), ("live", False)):
+            old = getattr(self, name)
+            new = np.full((cap, *old.shape[1:]), fill, dtype=old.dtype)
+            new[:len(old)] = old
+            setattr(self, name, new)
+
+    def _grow_pairs(self, need):
+        cap = len(self.pair_row)
+        while cap < need:
+            cap *= 2
+        for name in ("pair_row", "pair_term", "pair_live"):
+            old = getattr(self, name)
+            new = np.zeros(cap, dtype=old.dtype)
+            new[:self._pairs] = old[:self._pairs]
+            setattr(self, name, new)
+
+    def _compact(self):
+        """Drop dead pairs once they outnumber the live ones."""
+        p = self._pairs
+        keep = self.pair_live[:p]
+        rows, terms = self.pair_row[:p][keep], self.pair_term[:p][keep]
+        n = len(rows)
+        self.pair_row[:n], self.pair_term[:n] = rows, terms
+        self.pair_live[:n] = True
+        self.pair_live[n:p] = False
+        self._pairs, self._dead = n, 0
+        uniq, start, count = np.unique(rows, return_index=True, return_counts=True)
+        self._span = {int(r): (int(s), int(s + c)) for r, s, c in zip(uniq, start, count)}
+
+    def _intern(self, kind, name):
+        ids = self._ids[kind]
+        ix = ids.get(name)
+        if ix is None:
+            ix = ids[name] = len(self.names[kind])
+            self.names[kind].append(name)
+        return ix
+
+    def _alloc(self, uid):
+        if self._free:
+            r = self._free.pop()
+        else:
+            if self._size == len(self.live):
+                self._grow()
+            r = self._size
+            self._size += 1
+        self._row[uid] = r
+        self._uid[r] = uid
+        self.live[r] = True
+        return r
+
+    def _drop_pairs(self, r):
+        span = self._span.pop(r, None)
+        if span is not None:
+            self.pair_live[span[0]:span[1]] = False
+            self._dead += span[1] - span[0]
+
+    def _remove(self, uid):
+        r = self._row.pop(uid, None)
+        if r is not None:
+            del self._uid[r]
+            self._drop_pairs(r)
+            self.live[r] = False
+            self.customer[r] = self.product[r] = 0
+            self.month[r], self.theme[r] = NO_MONTH, NO_THEME
+            self.cats[r] = 0
+            self._free.append(r)
+
+    # ---------- extract ----------
+    def _records(self, reports, causes):
+        """{uid: (customer, product, month, theme, category counts, term ids)} from store rows."""
+        by_uid = {}
+        for uid, category, text in causes:
+            by_uid.setdefault(uid, []).append((category, text))
+        out = {}
+        for uid, customer, product, report_date, created_at, d5_root in reports:
+            cats = [0] * len(FISHBONE_CATEGORIES)
+            terms = {}
+            for category, text in by_uid.get(uid, ()):
+                j = _CAT_COL.get(category)
+                if j is None or not text.strip():
+                    continue
+                cats[j] += 1
+                for t in cause_terms(text):
+                    terms.setdefault(self._intern("term", t), None)
+            sig = root_signature(d5_root)
+            theme = NO_THEME
+            if sig:
+                theme = self._ids["theme"].get(sig)
+                if theme is None:
+                    theme = self._intern("theme", sig)
+                    self.theme_label.append(d5_root.strip())
+            out[uid] = (self._intern("customer", (customer or "").strip()),
+                        self._intern("product", (product or "").strip()),
+                        month_index(report_date, created_at), theme, cats, list(terms))
+        return out
+
+    def _put(self, r, rec):
+        """Write one report's extract into row `r`; returns whether anything changed."""
+        customer, product, month, theme, cats, terms = rec
+        span = self._span.get(r)
+        if (span is not None or not terms) and self.customer[r] == customer and self.product[r] == product \
+                and self.month[r] == month and self.theme[r] == theme and self.cats[r].tolist() == cats \
+                and sorted(self.pair_term[span[0]:span[1]].tolist() if span else []) == sorted(terms):
+            return False
+        self.customer[r], self.product[r], self.month[r], self.theme[r] = customer, product, month, theme
+        self.cats[r] = cats
+        self._drop_pairs(r)
+        if terms:
+            s = self._pairs
+            e = s + len(terms)
+            if e > len(self.pair_row):
+                self._grow_pairs(e)
+            self.pair_row[s:e] = r
+            self.pair_term[s:e] = terms
+            self.pair_live[s:e] = True
+            self._pairs = e
+            self._span[r] = (s, e)
+        return True
+
+    def _attrs(self, r):
+        """(customer, product, month) of row `r`: what decides which filters it falls in."""
+        return (self.names["customer"][self.customer[r]], self.names["product"][self.product[r]],
+                int(self.month[r]))
+
+    # ---------- feeding ----------
+    def notify(self, uid):
+        """Store watcher: report `uid` was written or deleted."""
+        self._pending.append(uid)
+
+    def load(self, reports, causes):
+        """Bulk-fill from ReportStore.analytics_rows() output."""
+        with self._lock:
+            for uid, rec in self._records(reports, causes).items():
+                r = self._row.get(uid)
+                self._put(self._alloc(uid) if r is None else r, rec)
+            self.version += 1
+            self._memo.clear()
+            self._options = None
+
+    def _drain(self):
+        if not self._pending:
+            return
+        uids = set()
+        while self._pending:
+            uids.add(self._pending.popleft())
+        if self._fetch is None:
+            return
+        records = self._records(*self._fetch(uids))
+        touched = []
+        for uid in uids:
+            rec, r = records.get(uid), self._row.get(uid)
+            if rec is None:
+                if r is not None:
+                    touched.append(self._attrs(r))
+                    self._remove(uid)
+            elif r is None:
+                r = self._alloc(uid)
+                self._put(r, rec)
+                touched.append(self._attrs(r))
+            else:
+                before = self._attrs(r)
+                if self._put(r, rec):
+                    touched += [before, self._attrs(r)]
+        if self._dead > max(self._pairs - self._dead, 4096):
+            self._compact()
+        if touched:
+            self.version += 1
+            self._options = None
+            for key in [k for k in self._memo if any(_covers(k, a) for a in touched)]:
+                del self._memo[key]
+                self.invalidated += 1
+
+    # ---------- reads ----------
+    def options(self):
+        """Customers, products and months on file, for the filter widgets."""
+        with self._lock:
+            self._drain()
+            if self._options is None:
+                n = self._size
+                live = self.live[:n]
+                opts = {}
+                for kind, col in (("customer", self.customer), ("product", self.product)):
+                    used = np.bincount(col[:n][live], minlength=len(self.names[kind]))
+                    opts[kind] = sorted(self.names[kind][i] for i in np.flatnonzero(used) if self.names[kind][i])
+                months = np.unique(self.month[:n][live & (self.month[:n] != NO_MONTH)])
+                opts["months"] = [month_label(int(m)) for m in months]
+                self._options = opts
+            return self._options
+
+    def query(self, customer=None, product=None, month_from=None, month_to=None):
+        """Pareto, recurrence and trend figures for the reports matching all given filters (memoized)."""
+        key = (customer or None, product or None, parse_month(month_from), parse_month(month_to))
+        with self._lock:
+            self._drain()
+            result = self._memo.get(key)
+            if result is not None:
+                self._memo.move_to_end(key)
+                self.hits += 1
+                return result
+            self.misses += 1
+            result = self._compute(*key)
+            self._memo[key] = result
+            while len(self._memo) > MEMO_SIZE:
+                self._memo.popitem(last=False)
+            return result
+
+    def _compute(self, customer, product, lo, hi):
+        n = self._size
+        mask = self.live[:n].copy()
+        for kind, col, value in (("customer", self.customer, customer), ("product", self.product, product)):
+            if value is not None:
+                ix = self._ids[kind].get(value)
+                mask &= col[:n] == ix if ix is not None else False
+        month = self.month[:n]
+        if lo is not None:
+            mask &= month >= lo
+        if hi is not None:
+            mask &= (month <= hi) & (month != NO_MONTH)
+
+        # Pareto of fishbone categories (causes) and cause terms (reports mentioning them)
+        cats = self.cats[:n][mask]
+        cat_total = cats.sum(axis=0)
+        categories = [(FISHBONE_CATEGORIES[j], int(cat_total[j])) for j in _top(cat_total, FISHBONE_CATEGORIES)]
+        p = self._pairs
+        sel = self.pair_live[:p] & mask[self.pair_row[:p]]
+        term_n = np.bincount(self.pair_term[:p][sel], minlength=len(self.names["term"]))
+        terms = [(self.names["term"][i], int(term_n[i])) for i in _top(term_n, self.names["term"], TOP_TERMS)]
+
+        # Recurrence: reports whose root-cause theme shows up in another matching report
+        themes = self.theme[:n][mask]
+        themes = themes[themes != NO_THEME]
+        theme_n = np.bincount(themes, minlength=len(self.theme_label))
+        theme_n[theme_n < 2] = 0
+        n_recurring = int(theme_n.sum())
+
+        # Monthly trend of causes per category, over the latest MAX_MONTHS months
+        months, by_month, trend = [], [], {c: [] for c in FISHBONE_CATEGORIES}
+        mm = month[mask]
+        dated = mm != NO_MONTH
+        if dated.any():
+            last = int(mm[dated].max())
+            first = max(int(mm[dated].min()), last - MAX_MONTHS + 1)
+            window = dated & (mm >= first)
+            offset = mm[window] - first
+            span = last - first + 1
+            months = [month_label(m) for m in range(first, last + 1)]
+            by_month = np.bincount(offset, minlength=span).tolist()
+            in_window = cats[window]
+            trend = {c: np.bincount(offset, weights=in_window[:, j], minlength=span).astype(int).tolist()
+                     for j, c in enumerate(FISHBONE_CATEGORIES)}
+
+        return {
+            "reports": int(mask.sum()),
+            "causes": int(cat_total.sum()),
+            "categories": categories,
+            "terms": terms,
+            "with_root": int(themes.size),
+            "recurring": n_recurring,
+            "recurrence": n_recurring / themes.size if themes.size else 0.0,
+            "themes": [(self.theme_label[i], int(theme_n[i]))
+                       for i in _top(theme_n, self.names["theme"], TOP_THEMES)],
+            "months": months,
+            "reports_by_month": by_month,
+            "trend": trend,
+        }
+
+    def stats(self):
+        with self._lock:
+            return {"reports": int(self.live[:self._size].sum()), "terms": len(self.names["term"]),
+                    "themes": len(self.theme_label), "pairs": self._pairs - self._dead,
+                    "memo": len(self._memo), "hits": self.hits, "misses": self.misses,
+                    "invalidated": self.invalidated}
+
+
+def _top(counts, names, k=None):
+    """Ids with a nonzero count, most first; ties by name, so that a cut at `k` does
+    not depend on the order names were interned (incremental edits vs a rebuild)."""
+    ids = np.flatnonzero(counts)
+    if k is not None and len(ids) > k:
+        ids = ids[counts[ids] >= np.partition(counts[ids], len(ids) - k)[len(ids) - k]]   # k-th largest and up
+    return sorted(ids.tolist(), key=lambda i: (-counts[i], names[i]))[:k]
+
+
+def _covers(key, attrs):
+    """Whether the filter `key` (customer, product, month from, month to) includes a report with `attrs`."""
+    customer, product, lo, hi = key
+    c, p, m = attrs
+    return ((customer is None or customer == c) and (product is None or product == p)
+            and (lo is None or (m != NO_MONTH and m >= lo)) and (hi is None or (m != NO_MONTH and m <= hi)))
+
+
+# ---------- Charts ----------
+chart_cache = RenderCache(maxsize=64)
+
+
+def _cached(kind, payload, draw):
+    key = hashlib.sha256(json.dumps([kind, payload], ensure_ascii=False).encode("utf-8")).hexdigest()
+    png = chart_cache.get(key)
+    if png is None:
+        png = draw()
+        chart_cache.put(key, png)
+    return png
+
+
+def _figure(width=7.0, height=3.2):
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+    fig = Figure(figsize=(width, height), dpi=100)
+    FigureCanvasAgg(fig)
+    return fig
+
+
+def _png(fig):
+    buf = io.BytesIO()
+    fig.savefig(buf, format="png")
+    return buf.getvalue()
+
+
+def pareto_png(items, title, ylabel="", cumulative_label="%"):
+    """Pareto chart of (label, count) items, already sorted: bars plus the cumulative share line."""
+    def draw():
+        labels = [label for label, _ in items]
+        counts = np.array([n for _, n in items], dtype=float)
+        fig = _figure()
+        ax = fig.add_subplot()
+        x = np.arange(len(items))
+        ax.bar(x, counts, color="#4C78A8")
+        ax.set_xticks(x, labels, rotation=35, ha="right", fontsize=8)
+        ax.set_ylabel(ylabel)
+        ax.set_title(title, fontsize=10)
+        if len(items):
+            share = np.cumsum(counts) / counts.sum() * 100
+            ax2 = ax.twinx()
+            ax2.plot(x, share, color="#E45756", marker="o", markersize=3)
+            ax2.axhline(80, color="#E45756", linestyle=":", linewidth=0.8)
+            ax2.set_ylim(0, 105)
+            ax2.set_ylabel(cumulative_label)
+        fig.tight_layout()
+        return _png(fig)
+
+    return _cached("pareto", [items, title, ylabel, cumulative_label], draw)
+
+
+def trend_png(months, series, title, labels=None):
+    """Line per series over `months`; `labels` renames the series keys (e.g. localized categories)."""
+    def draw():
+        fig = _figure()
+        ax = fig.add_subplot()
+        x = np.arange(len(months))
+        for name, values in series.items():
+            if any(values):
+                ax.plot(x, values, marker="o", markersize=3, label=(labels or {}).get(name, name))
+        step = max(1, len(months) // 12)
+        ax.set_xticks(x[::step], months[::step], rotation=35, ha="right", fontsize=8)
+        ax.set_title(title, fontsize=10)
+        if ax.lines:
+            ax.legend(fontsize=7, ncols=2)
+        fig.tight_layout()
+        return _png(fig)
+
+    return _cached("trend", [months, series, title, labels], draw)
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_analytics(store=None):
+    """The process-wide index over `store` (default: the app's store), built on first use."""
+    global _index
+    with _index_lock:
+        if _index is None:
+            if store is None:
+                from report_store import get_store
+                store = get_store()
+            index = AnalyticsIndex(fetch=store.analytics_rows)
+            index.load(*store.analytics_rows(subscribe=index.notify))
+            _index = index
+        return _index
@@ -4,19 +4,90 @@
 # ===========================
 
 import streamlit as st
-from openpyxl import Workbook
-from openpyxl.styles import Font, Alignment, PatternFill
-from openpyxl.utils import get_column_letter
+import contextlib
 import datetime
-import matplotlib.pyplot as plt
+import functools
+import importlib.util
+import uuid
+
+import snapshot
+from catalog import T, HEURISTIC_QUESTIONS
+from fishbone import render_fishbone, render_report_fishbone, render_cache, fishbone_key
+from ai_coach import ask_coach, build_prompt, cache_key, DEFAULT_MODEL
+from ai_pool import get_pool
+from jobs import get_executor, JobQueueFull, DONE, FAILED
+from metrics import get_metrics
+from report_model import report_from_session, load_into_session, apply_fields, status_code, step_id, compose_d5, WHY_KINDS
+from report_model import STATE_KEYS, session_model, empty_report
+from report_store import get_store
+from session_governor import get_governor, footprint, SPILLED
+from shared_doc import get_hub, POLL_SECONDS
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+from why_tree import WhyTree, ROOT
+
+# Heavy dependencies are imported on first use, not at cold start:
+# openai when the coach is asked, matplotlib on first PNG render, openpyxl on first save,
+# numpy (cause classifier) once there is D3/D5 text to classify, or when the analytics panel is opened.
+
+# ---------- Instrumentation (off unless NPQP_METRICS=1, see metrics.py) ----------
+metrics = get_metrics()
+metrics.start_rerun("full")
+
+
+def timed_fragment(section, **fragment_args):
+    """st.fragment whose body is timed as `section`; a fragment-scoped run also counts as a rerun.
+
+    A fragment run caused by the user first reloads the session's report state
+    if it was spilled, and counts as activity; a timed poll (run_every) does neither.
+    """
+    polled = fragment_args.get("run_every") is not None
+
+    def wrap(fn):
+        @functools.wraps(fn)
+        def body(*args, **kwargs):
+            alone = in_fragment_run()
+            if alone and not polled and restore_session() and pull_edits():
+                st.rerun()  # other sessions' edits arrived while it was on disk: redraw everything
+            with metrics.rerun("fragment") if alone and metrics.enabled else contextlib.nullcontext(), \
+                    metrics.span(section):
+                result = fn(*args, **kwargs)
+            if alone and not polled:
+                track_session()
+            return result
+        return st.fragment(body, **fragment_args)
+    return wrap
+
+
+def in_fragment_run():
+    ctx = get_script_run_ctx()
+    return ctx is not None and bool(ctx.fragment_ids_this_run)
+
+
+def rerun_fragments(keys):
+    """From a fragment body, rerun only the fragments registered under `keys` (st.fragment(key=...)).
+
+    st.rerun(scope=keys) does exactly this but only from a widget callback, and a
+    timed poll is not one. So the keyed request is queued the way st.rerun builds
+    it, and st.rerun(scope="fragment") ends this run: the runtime folds both into
+    one fragment rerun. That takes runtime internals; if any of them is missing or
+    changed (import included), the whole app reruns instead.
+    """
+    try:
+        from streamlit.runtime.scriptrunner_utils.script_requests import RerunData
+
+        ctx = get_script_run_ctx()
+        queued = ctx.script_requests.request_rerun(RerunData(
+            query_string=ctx.query_string, page_script_hash=ctx.page_script_hash,
+            fragment_id_queue=ctx.fragment_storage.resolve_target(sorted(keys)),
+            is_fragment_scoped_rerun=True, cached_message_hashes=ctx.cached_message_hashes,
+            context_info=ctx.context_info))
+    except Exception:
+        queued = False
+    st.rerun(scope="fragment" if queued else "app")
+
 
 # ---------- Optional AI (OpenAI) ----------
-AI_AVAILABLE = False
-try:
-    import openai
-    AI_AVAILABLE = True
-except Exception:
-    AI_AVAILABLE = False
+AI_AVAILABLE = importlib.util.find_spec("openai") is not None
 
 # ---------- Page Config & Branding ----------
 st.set_page_config(
@@ -39,195 +110,339 @@ st.markdown("<h1 style='text-align:center'>📑 8D Training App — Advanced</h1
 language = st.sidebar.selectbox("Select Language / Seleccione Idioma", ["English", "Español"])
 mode_training = st.sidebar.toggle("Training Mode / Modo Entrenamiento", value=True)
 
-# ---------- Simple i18n helper ----------
-T = {
-    "en": {
-        "report_info": "Report Information",
-        "report_date": "Report Date",
-        "prepared_by": "Prepared By",
-        "product": "Product / Part",
-        "customer": "Customer",
-        "ai_helper": "AI Helper (optional)",
-        "ai_about": "Get guided prompts and suggestions. Works best with concise, factual inputs.",
-        "ai_key_info": "To enable AI, add your OpenAI API key in Streamlit secrets as OPENAI_API_KEY (and include 'openai' in requirements).",
-        "ai_enter_key": "Enter API Key (not stored)",
-        "start_coach": "Ask the Coach",
-        "coach_prompt": "Describe your issue or paste your draft 5-Why here",
-        "ai_not_installed": "AI package not installed. Showing heuristic helper only.",
-        "ai_no_key": "No API key configured. Using heuristic helper.",
-        "heuristic_title": "Heuristic Suggestions",
-        "heuristic_occ": "Occurrence probing questions",
-        "heuristic_det": "Detection probing questions",
-        "fishbone_title": "Fishbone Diagram (Ishikawa)",
-        "fishbone_note": "Enter causes by category, then click ‘Render Fishbone’.",
-        "people": "People",
-        "process": "Process/Method",
-        "machine": "Machine/Equipment",
-        "material": "Material/Components",
-        "environment": "Environment",
-        "measurement": "Measurement/Test",
-        "add_cause": "Add another cause",
-        "render_fishbone": "Render Fishbone",
-        "assignments": "Assignments & Due Dates (per D-step)",
-        "owner": "Owner",
-        "due": "Due Date",
-        "status": "Status",
-        "status_opts": ["Not started", "In progress", "Done"],
-        "npqp_steps": [
-            ("D1: Concern Details",
-             "Describe the customer concern clearly: what/where/when/how many. Include data and evidence.",
-             "Ex: Customer reports intermittent static in amplifier output at end-of-line at Plant A."),
-            ("D2: Similar Part Considerations",
-             "Check other models/generic parts/colors/opposite hand/front-rear to learn scope.",
-             "Ex: Same speaker used in Model B; compare front vs rear audio units; check opposite-hand variant."),
-            ("D3: Initial Analysis",
-             "Do quick checks, collect facts, and isolate the phenomenon.",
-             "Ex: Visual inspect solder joints; continuity checks; connector seating; quick A/B swaps."),
-            ("D4: Implement Containment",
-             "Temporary measures to protect customer while you find root cause.",
-             "Ex: 100% inspection, quarantine lot, temporary shielding, extra test step."),
-            ("D5: Final Analysis",
-             "Use 5-Why: Occurrence (why it happened) and Detection (why it escaped). Add more Whys if needed.",
-             ""),
-            ("D6: Permanent Corrective Actions",
-             "Define actions that eliminate the root cause and prevent recurrence.",
-             "Ex: Update solder profile, retrain, revise WI, add automated inspection."),
-            ("D7: Countermeasure Confirmation",
-             "Verify actions are effective over time.",
-             "Ex: Run verification builds, life tests, capability studies (CPK), monitor early field data."),
-            ("D8: Follow-up Activities (Lessons Learned / Recurrence Prevention)",
-             "Standardize changes, update PFMEA/Control Plan/SOP, communicate lessons learned.",
-             "Ex: Update PFMEA, add control plan checks, train team, add audit points.")
-        ],
-        "d5_training": (
-            "**Training Guidance:** Use 5-Why to reach process-level causes.\n\n"
-            "**Occurrence Example (5-Whys):**\n"
-            "1. Cold solder joint on DSP chip\n"
-            "2. Solder temp too low\n"
-            "3. Operator didn’t follow profile\n"
-            "4. Work instructions unclear\n"
-            "5. No visual confirmation step\n\n"
-            "**Detection Example (5-Whys):**\n"
-            "1. QA missed cold joint\n"
-            "2. Checklist incomplete\n"
-            "3. No automated vision/test\n"
-            "4. Batch testing not performed\n"
-            "5. Early warning trend not tracked\n\n"
-            "**Root Cause Example:**\n"
-            "Insufficient solder process control + inadequate QA checklist allowed defect to escape."
-        ),
-        "occurrence": "Occurrence Analysis",
-        "detection": "Detection Analysis",
-        "why": "Why",
-        "add_why": "Add another Why",
-        "root_cause": "Root Cause (summary after 5-Whys)",
-        "your_answer": "Your Answer",
-        "save": "Save 8D Report",
-        "saved": "8D Report saved successfully.",
-        "download": "Download XLSX",
-        "no_answers": "No answers yet. Please complete some fields before saving."
-    },
-    "es": {
-        "report_info": "Información del Reporte",
-        "report_date": "Fecha del Reporte",
-        "prepared_by": "Preparado por",
-        "product": "Producto / Parte",
-        "customer": "Cliente",
-        "ai_helper": "Asistente IA (opcional)",
-        "ai_about": "Obtenga preguntas guía y sugerencias. Funciona mejor con entradas concisas y objetivas.",
-        "ai_key_info": "Para habilitar IA, agregue su clave de OpenAI en secretos de Streamlit como OPENAI_API_KEY (y añada 'openai' a requirements).",
-        "ai_enter_key": "Ingrese la clave (no se guarda)",
-        "start_coach": "Preguntar al Asistente",
-        "coach_prompt": "Describa el problema o pegue su borrador 5-Why aquí",
-        "ai_not_installed": "Paquete de IA no instalado. Mostrando asistente heurístico.",
-        "ai_no_key": "No hay clave de API configurada. Usando asistente heurístico.",
-        "heuristic_title": "Sugerencias Heurísticas",
-        "heuristic_occ": "Preguntas para profundizar (Ocurrencia)",
-        "heuristic_det": "Preguntas para profundizar (Detección)",
-        "fishbone_title": "Diagrama de Espina de Pescado (Ishikawa)",
-        "fishbone_note": "Ingrese causas por categoría y luego haga clic en ‘Generar Diagrama’.",
-        "people": "Personas",
-        "process": "Proceso/Método",
-        "machine": "Máquina/Equipo",
-        "material": "Material/Componentes",
-        "environment": "Entorno",
-        "measurement": "Medición/Prueba",
-        "add_cause": "Agregar otra causa",
-        "render_fishbone": "Generar Diagrama",
-        "assignments": "Responsables y Fechas (por paso D)",
-        "owner": "Responsable",
-        "due": "Fecha Límite",
-        "status": "Estado",
-        "status_opts": ["No iniciado", "En progreso", "Terminado"],
-        "npqp_steps": [
-            ("D1: Detalles de la Queja",
-             "Describa claramente la queja: qué/dónde/cuándo/cuántos. Incluya datos y evidencias.",
-             "Ej: Cliente reporta estática intermitente en el amplificador en fin de línea en Planta A."),
-            ("D2: Consideración de Partes Similares",
-             "Revise otros modelos/partes genéricas/colores/mano opuesta/delantero-trasero para entender el alcance.",
-             "Ej: El mismo parlante usado en Modelo B; comparar delantero vs trasero; validar mano opuesta."),
-            ("D3: Análisis Inicial",
-             "Realice verificaciones rápidas, recolecte hechos y aísle el fenómeno.",
-             "Ej: Inspección visual de soldaduras; pruebas de continuidad; asientos de conectores; swaps A/B."),
-            ("D4: Implementar Contención",
-             "Medidas temporales para proteger al cliente mientras encuentra la causa raíz.",
-             "Ej: Inspección 100%, poner lote en cuarentena, blindaje temporal, paso de prueba adicional."),
-            ("D5: Análisis Final",
-             "Use 5-Why: Ocurrencia (por qué ocurrió) y Detección (por qué escapó). Agregue más ‘porqués’ si necesita.",
-             ""),
-            ("D6: Acciones Correctivas Permanentes",
-             "Defina acciones que eliminen la causa raíz y eviten recurrencia.",
-             "Ej: Actualizar perfil de soldadura, reentrenar, revisar instrucciones, añadir inspección automática."),
-            ("D7: Confirmación de Contramedidas",
-             "Verifique que las acciones sean efectivas en el tiempo.",
-             "Ej: Lotes de verificación, pruebas de vida, estudios de capacidad (CPK), monitoreo temprana de campo."),
-            ("D8: Seguimiento (Lecciones Aprendidas / Prevención de Recurrencia)",
-             "Estandarice cambios, actualice PFMEA/Plan de Control/POE, comunique lecciones aprendidas.",
-             "Ej: Actualizar PFMEA, sumar controles al plan, entrenar equipo, añadir puntos de auditoría.")
-        ],
-        "d5_training": (
-            "**Guía de Entrenamiento:** Use 5-Why para llegar a causas a nivel de proceso.\n\n"
-            "**Ejemplo Ocurrencia (5-Why):**\n"
-            "1. Unión fría de soldadura en DSP\n"
-            "2. Temperatura de soldado baja\n"
-            "3. Operador no siguió el perfil\n"
-            "4. Instrucciones poco claras\n"
-            "5. Sin verificación visual\n\n"
-            "**Ejemplo Detección (5-Why):**\n"
-            "1. QA no detectó la unión fría\n"
-            "2. Checklist incompleto\n"
-            "3. Sin visión/prueba automática\n"
-            "4. No se realizaron pruebas por lote\n"
-            "5. No se monitoreó la señal temprana\n\n"
-            "**Ejemplo Causa Raíz:**\n"
-            "Control insuficiente del proceso de soldadura + checklist de QA inadecuado permitió fuga del defecto."
-        ),
-        "occurrence": "Análisis de Ocurrencia",
-        "detection": "Análisis de Detección",
-        "why": "¿Por qué?",
-        "add_why": "Agregar otro ¿Por qué?",
-        "root_cause": "Causa Raíz (resumen tras 5-Why)",
-        "your_answer": "Su Respuesta",
-        "save": "Guardar Reporte 8D",
-        "saved": "Reporte 8D guardado con éxito.",
-        "download": "Descargar XLSX",
-        "no_answers": "Aún no hay respuestas. Complete algunos campos antes de guardar."
-    }
-}
+# ---------- i18n (shared, built once per process) ----------
 L = T["en"] if language == "English" else T["es"]
+lang = "en" if language == "English" else "es"
+
+# ---------- Memory: idle sessions' report state waits on disk (see session_governor.py) ----------
+governor = get_governor()
+SPILL_KEYS = (*STATE_KEYS, *(f"why_collapsed_{k}" for k in WHY_KINDS))
+
+
+def session_id():
+    ctx = get_script_run_ctx()
+    return ctx.session_id if ctx is not None else st.session_state.report_uid
+
+
+def spilled_state():
+    """What a spill takes out of RAM: the report model and folded Whys."""
+    ss = st.session_state
+    return {k: ss[k] for k in SPILL_KEYS if k in ss}
+
+
+def spill_session(reason):
+    """Move this session's report state to disk. Widget values stay: Streamlit keeps them in step
+    with the browser, and the model is rebuilt from them on the next run anyway."""
+    ss = st.session_state
+    governor.spill(session_id(), spilled_state(), reason)
+    for key in SPILL_KEYS:
+        ss.pop(key, None)
+
+
+def restore_session():
+    """Bring a spilled session's report state back; returns whether it was spilled."""
+    ss = st.session_state
+    if "editor" not in ss or not governor.is_spilled(session_id()):
+        return False
+    state = governor.restore(session_id())
+    if state is None:
+        # Spill file lost: the shared copy still has every field this session had synced,
+        # and widget values (edits since) are still in the session
+        state = session_model(ss.editor.report, T[ss.get("ui_lang", lang)])   # re-keyed below if it changed
+    for key, value in state.items():
+        ss[key] = value
+    return True
+
+
+def track_session():
+    governor.activity(session_id(), footprint(spilled_state()))
+
+
+def resident(callback):
+    """Widget callback that uses the report state: callbacks run before the script, so reload it first."""
+    @functools.wraps(callback)
+    def inner(*args, **kwargs):
+        restore_session()
+        return callback(*args, **kwargs)
+    return inner
+
+
+restore_session()
+
+# Report state is keyed by localized step titles: re-key it when the language changes
+if st.session_state.get("ui_lang", lang) != lang and "answers" in st.session_state:
+    prev = st.session_state.ui_lang
+    load_into_session(st.session_state, report_from_session(st.session_state, T[prev], prev), L)
+st.session_state.ui_lang = lang
+
+# ---------- Persistence: reopen by ?report=<uid>, shared live copy, debounced autosave ----------
+store = get_store()
+hub = get_hub()
+
+
+def default_report_date():
+    """Today, as the report date field shows it in the page language."""
+    return datetime.datetime.today().strftime("%B %d, %Y" if language == "English" else "%d/%m/%Y")
+
+
+def open_report(uid=None):
+    """Open report `uid` in this session (a new draft if missing), live-shared with every session editing it."""
+    editor = hub.open(uid) if uid else None
+    if editor is not None and (editor.autosaver.stored or editor.doc.version):
+        # The live copy: may hold other sessions' edits that are not flushed to the store yet
+        load_into_session(st.session_state, editor.report, L)
+    else:
+        for key in STATE_KEYS:
+            st.session_state.pop(key, None)
+        # Why widgets are keyed by node id, and a fresh tree numbers its nodes from 1 again
+        for key in [k for k in st.session_state if k.startswith("why_")]:
+            del st.session_state[key]
+        uid = uuid.uuid4().hex
+        draft = empty_report()
+        draft["info"]["report_date"] = st.session_state.setdefault("rp_date", default_report_date())
+        editor = hub.open(uid, draft)
+    st.session_state.report_uid = uid
+    st.session_state.editor = editor
+    st.query_params["report"] = uid
+
+
+def autosave():
+    # Cheap when nothing changed: only fields that differ from the last sync go out, as one small delta;
+    # the shared document batches the store writes for all of its sessions
+    st.session_state.editor.push(report_from_session(st.session_state, L, lang))
+
+
+def pull_edits():
+    """Apply other sessions' edits to this session's state; returns the sections they touch."""
+    editor = st.session_state.editor
+    if not editor.behind:
+        return set()
+    sections, lost = apply_fields(st.session_state, editor.pull(), L)
+    editor.conflicts |= lost
+    return sections
+
+
+def show_conflicts():
+    editor = st.session_state.editor
+    if editor.conflicts:
+        st.toast(f"⚠️ {L['coedit_conflict']}: {len(editor.conflicts)}")
+        editor.conflicts.clear()
+
+
+@resident
+def restore_snapshot():
+    """Uploader callback: store the uploaded snapshot as a new report and open it."""
+    upload = st.session_state.get("snapshot_upload")
+    if upload is None:
+        return
+    try:
+        report = snapshot.loads(upload.getvalue())
+    except snapshot.SnapshotError as e:
+        st.session_state.snapshot_error = str(e)
+        return
+    st.session_state.editor.autosaver.flush()
+    open_report(store.create_report(report))
+
+
+if "report_uid" not in st.session_state:
+    open_report(st.query_params.get("report"))
+
+# Co-editing: other sessions' edits land before any widget is drawn (fragment runs get them from the poll below)
+pull_edits()
+show_conflicts()
+
+# Crash recovery: a fresh, untouched draft offers to reopen the newest unfinished report
+if not st.session_state.editor.autosaver.stored:
+    draft = store.latest_draft(exclude_uid=st.session_state.report_uid)
+    if draft is not None:
+        where = " · ".join(v for v in (draft["customer"], draft["product"], draft["report_date"]) if v) or "—"
+        col_msg, col_btn = st.columns([4, 1])
+        col_msg.info(f"{L['resume_prompt']}: {where}")
+        if col_btn.button(f"↩️ {L['resume_draft']}", key="resume_draft"):
+            open_report(draft["uid"])
+            st.rerun()
+
+
+def similar_8ds(text, limit=3):
+    """Completed past 8Ds matching `text` on D1 / root cause / D6 / D8 (cheap enough for every rerun)."""
+    if len(text.strip()) < 3:
+        return []
+    return store.similar_reports(text, limit=limit, exclude_uid=st.session_state.report_uid)
+
+
+def _clip(text, n=120):
+    text = " ".join(text.split())
+    return text if len(text) <= n else text[:n - 1] + "…"
+
+
+def similar_probes(hits):
+    """Turn similar past 8Ds into extra probing questions for the heuristic helper."""
+    out = []
+    for h in hits:
+        where = " · ".join(v for v in (h["customer"], h["product"], h["report_date"]) if v) or "—"
+        if h["d5_root"].strip():
+            out.append(L["similar_probe"].format(where=where, root=_clip(h["d5_root"])))
+        if h["d8"].strip():
+            out.append(L["similar_lesson"].format(lesson=_clip(h["d8"])))
+    return out
+
+
+def show_similar(hits):
+    if hits:
+        with st.expander(f"🔎 {L['similar_title']} ({len(hits)})", expanded=False):
+            for h in hits:
+                st.markdown(f"**{h['customer'] or '—'} · {h['product'] or '—'}** — {_clip(h['d1'], 160)}")
+                if h["d5_root"].strip():
+                    st.caption(f"{L['root_cause']}: {_clip(h['d5_root'], 200)}")
+
+with st.sidebar.expander(f"🗂️ {L['saved_reports']}", expanded=False):
+    if st.button(f"➕ {L['new_report']}", key="new_report"):
+        open_report(None)
+        st.rerun()
+    f_cust = st.text_input(f"👤 {L['customer']}", key="flt_cust")
+    f_prod = st.text_input(f"🔧 {L['product']}", key="flt_prod")
+    f_status = st.selectbox(f"📌 {L['status']}", [L["any"]] + list(L["status_opts"]), key="flt_status")
+    found = store.list_reports(customer=f_cust.strip() or None, product=f_prod.strip() or None,
+                               status=None if f_status == L["any"] else status_code(f_status), limit=50)
+    if found:
+        labels = {r["uid"]: f"{r['customer'] or '—'} · {r['product'] or '—'} · {r['report_date']}" for r in found}
+        pick = st.selectbox(L["saved_reports"], list(labels), format_func=labels.get, key="flt_pick")
+        if st.button(f"📂 {L['open_report']}", key="open_report", disabled=pick == st.session_state.report_uid):
+            st.session_state.editor.autosaver.flush()
+            open_report(pick)
+            st.rerun()
+    else:
+        st.caption(L["no_reports"])
+    st.file_uploader(f"📦 {L['snapshot_restore']}", type=[snapshot.EXTENSION.lstrip(".")],
+                     key="snapshot_upload", on_change=restore_snapshot)
+    if "snapshot_error" in st.session_state:
+        st.error(f"{L['snapshot_error']}: {st.session_state.pop('snapshot_error')}")
+
+# ---------- Background jobs (export, render, coach) ----------
+# Work runs on the shared executors; this session keeps job ids and picks results up on later reruns.
+# Coach streams have their own: enough workers for every upstream slot plus as many waiting at the
+# pool, so slow replies never hold up exports and renders
+executor = get_executor()
+coach_executor = get_executor("coach", max_workers=2 * get_pool().max_concurrent)
+if metrics.enabled:
+    metrics.touch_session(session_id())
+    metrics.gauge("npqp_jobs", "Background jobs by state.",
+                  lambda: {s: executor.stats()[s] + coach_executor.stats()[s] for s in ("queued", "running")},
+                  labels=("state",))
+    metrics.gauge("npqp_ai_requests", "Coach requests at the shared AI client pool.",
+                  lambda: {s: get_pool().stats()[s] for s in ("waiting", "active")}, labels=("state",))
+    metrics.gauge("npqp_ai_wait_seconds", "Recent waits for an upstream slot (rate limit, concurrency cap).",
+                  lambda: {q: get_pool().stats()[f"wait_{q}"] for q in ("p50", "p95", "max")}, labels=("stat",))
+    metrics.gauge("npqp_session_state", "Sessions by where their report state is held.",
+                  lambda: {s: governor.stats()[s] for s in ("resident", "spilled")}, labels=("where",))
+    metrics.gauge("npqp_session_state_bytes", "Report state bytes in RAM (pickled size) and spilled to disk.",
+                  lambda: {s: governor.stats()[f"{s}_bytes"] for s in ("resident", "spilled")}, labels=("where",))
+st.session_state.setdefault("jobs", {})
+st.session_state.setdefault("job_polling", set())
+JOB_POLL = 0.5     # seconds between progress refreshes while a job runs
+JOB_GRACE = 0.05   # fast (e.g. cached) jobs finish within the same rerun
+
+
+def executor_for(name):
+    return coach_executor if name == "coach" else executor
+
+
+def drop_job(name):
+    job_id = st.session_state.jobs.pop(name, None)
+    st.session_state.job_polling.discard(name)
+    if job_id is not None:
+        executor_for(name).release(job_id)
+
+
+def start_job(name, fn, *args, key):
+    """Run `fn(job, *args)` in the background as this session's job `name` (deduplicated by `key`)."""
+    current = executor_for(name).get(st.session_state.jobs.get(name))
+    if current is not None and current.key == key and current.state != FAILED and not current.cancelled:
+        return current
+    try:
+        job = executor_for(name).submit(name, fn, *args, key=key)
+    except JobQueueFull:
+        st.warning(L["busy"])
+        return None
+    drop_job(name)
+    st.session_state.jobs[name] = job.id
+    job.wait(JOB_GRACE)
+    return job
+
+
+def job_panel(name, show_result, key=None):
+    """Progress + cancel while job `name` runs, then `show_result(result)`; nothing if inputs changed."""
+    job = executor_for(name).get(st.session_state.jobs.get(name))
+    if job is None or (key is not None and job.key != key):
+        drop_job(name)
+        return
+
+    def body():
+        if job.done and name in st.session_state.job_polling:
+            st.session_state.job_polling.discard(name)
+            st.rerun()  # rebuild without polling
+        if job.state == DONE:
+            show_result(job.result)
+        elif job.state == FAILED:
+            st.warning(f"{L['job_failed']}: {job.error}")
+        elif job.done:
+            st.caption(L["job_cancelled"])
+        else:
+            st.progress(job.progress, text=job.message or L["job_running" if job.started else "job_queued"])
+            if job.partial:
+                st.markdown(job.partial)
+            st.button(f"✖️ {L['cancel']}", key=f"cancel_{name}", on_click=drop_job, args=(name,))
+
+    if not job.done:
+        st.session_state.job_polling.add(name)
+    st.fragment(body, run_every=None if job.done else JOB_POLL, key=f"job_{name}")()
+
+
+@metrics.timed("ai_call")
+def coach_job(job, user_issue, language, api_key):
+    stream = ask_coach(user_issue, language, api_key)
+    metrics.inc("npqp_ai_calls_total", help="AI coach requests.", cached=str(stream.cached).lower(),
+                coalesced=str(stream.coalesced).lower())
+    job.on_cancel(stream.cancel)
+    if stream.queued:
+        job.report(message="AI Coach (queued)")
+    parts = []
+    for token in stream.tokens():
+        parts.append(token)
+        job.report(message="AI Coach", partial="".join(parts))
+    return "".join(parts)
+
+
+@metrics.timed("fishbone_render")
+def render_job(job, fishbone, language, labels):
+    job.report(0.2, "Layout")
+    return render_fishbone(fishbone, language, labels)
+
+
+@metrics.timed("xlsx_build")
+def export_job(job, snap):
+    # Exports start from the snapshot: an immutable copy of the report, independent of the session
+    report = snapshot.loads(snap)
+    job.report(0.1, "Fishbone")
+    fishbone_png = render_report_fishbone(report)
+    job.report(0.5, "XLSX")
+    from xlsx_export import build_report_workbook
+    return build_report_workbook(report, fishbone_png)
+
 
 # ---------- Report Info ----------
-st.subheader(L["report_info"])
-today_str = datetime.datetime.today().strftime("%B %d, %Y") if language == "English" else datetime.datetime.today().strftime("%d/%m/%Y")
-col_a, col_b, col_c, col_d = st.columns(4)
-with col_a:
-    report_date = st.text_input(f"📅 {L['report_date']}", value=today_str, key="rp_date")
-with col_b:
-    prepared_by = st.text_input(f"✍️ {L['prepared_by']}", key="rp_by")
-with col_c:
-    product = st.text_input(f"🔧 {L['product']}", key="rp_prod")
-with col_d:
-    customer = st.text_input(f"👤 {L['customer']}", key="rp_cust")
+with metrics.span("report_info"):
+    st.subheader(L["report_info"])
+    st.session_state.setdefault("rp_date", default_report_date())
+    col_a, col_b, col_c, col_d = st.columns(4)
+    with col_a:
+        report_date = st.text_input(f"📅 {L['report_date']}", key="rp_date")
+    with col_b:
+        prepared_by = st.text_input(f"✍️ {L['prepared_by']}", key="rp_by")
+    with col_c:
+        product = st.text_input(f"🔧 {L['product']}", key="rp_prod")
+    with col_d:
+        customer = st.text_input(f"👤 {L['customer']}", key="rp_cust")
 
 # ---------- NPQP Steps + State ----------
 npqp_steps = L["npqp_steps"]  # list of tuples (step, note, example)
@@ -241,154 +456,211 @@ if "status" not in st.session_state:
     st.session_state.status = {step: L["status_opts"][0] for step, _, _ in npqp_steps}
 
 # D5-specific session state
-st.session_state.setdefault("d5_occ", [""] * 5)
-st.session_state.setdefault("d5_det", [""] * 5)
+for kind in WHY_KINDS:
+    if f"d5_{kind}" not in st.session_state:
+        st.session_state[f"d5_{kind}"] = WhyTree.chain([""] * 5)
 st.session_state.setdefault("d5_root", "")
 
+if "fishbone" not in st.session_state:
+    st.session_state.fishbone = {
+        "People": [""],
+        "Process/Method": [""],
+        "Machine/Equipment": [""],
+        "Material/Components": [""],
+        "Environment": [""],
+        "Measurement/Test": [""],
+    }
+
 # ---------- AI Helper (optional) ----------
-with st.expander(f"🤖 {L['ai_helper']}", expanded=False):
-    st.caption(L["ai_about"])
-    if not AI_AVAILABLE:
-        st.warning(L["ai_not_installed"])
-    api_key = st.text_input(f"🔐 {L['ai_enter_key']}", type="password")
-    if AI_AVAILABLE:
-        if not api_key and "OPENAI_API_KEY" in st.secrets:
-            api_key = st.secrets["OPENAI_API_KEY"]
-        if api_key:
-            openai.api_key = api_key
-        else:
-            st.info(L["ai_no_key"])
-
-    user_issue = st.text_area(f"💬 {L['coach_prompt']}", height=130)
-    if st.button(f"🚀 {L['start_coach']}"):
-        suggestions = []
-        # Heuristic helper (always available)
-        occ_q = [
-            "What changed (materials, machine, method, environment) right before the first failure?",
-            "Can you reproduce the defect reliably? Under what conditions?",
-            "Is the problem isolated to certain lots, lines, shifts, or suppliers?",
-            "Which CTQ or spec is violated? What data trend shows the shift?",
-            "What evidence rules out common red herrings?"
-        ]
-        det_q = [
-            "Which check should have detected it (test, visual, measurement)?",
-            "Is the control plan/PFMEA aligned with actual risks?",
-            "Was the inspection capable (Gage R&R, sensitivity)?",
-            "Were criteria or sampling insufficient for this failure mode?",
-            "Any prior warnings, near-misses, or customer escapes?"
-        ]
-        if language == "Español":
-            occ_q = [
-                "¿Qué cambió (materiales, máquina, método, entorno) justo antes del primer fallo?",
-                "¿Puede reproducirse el defecto de forma confiable? ¿Bajo qué condiciones?",
-                "¿Se limita a ciertos lotes, líneas, turnos o proveedores?",
-                "¿Qué CTQ o especificación se viola? ¿Qué tendencia de datos muestra el cambio?",
-                "¿Qué evidencias descartan falsos indicios comunes?"
-            ]
-            det_q = [
-                "¿Qué control debía detectarlo (prueba, visual, medición)?",
-                "¿El plan de control/PFMEA refleja los riesgos reales?",
-                "¿La inspección era capaz (R&R, sensibilidad)?",
-                "¿Criterios o muestreo insuficientes para este modo de falla?",
-                "¿Hubo alertas previas, casi-incidentes o fugas al cliente?"
-            ]
-        suggestions.append(("Occurrence/Ocurrencia", occ_q))
-        suggestions.append(("Detection/Detección", det_q))
-
-        if AI_AVAILABLE and api_key:
-            try:
-                prompt = f"""You are a quality problem-solving coach for electronics (radios, speakers, amplifiers).
-User note: {user_issue}
-Return: (1) clarifying questions, (2) likely categories (People/Process/Machine/Material/Environment/Measurement),
-(3) example Occurrence and Detection Why-questions, (4) one possible root cause pattern to investigate.
-Be concise, bullet each section, write in {language}."""
-                # Use Responses API if available; fallback to ChatCompletion if older
-                try:
-                    resp = openai.ChatCompletion.create(
-                        model="gpt-4o-mini",
-                        messages=[{"role": "system", "content": "You are a concise quality coach."},
-                                  {"role": "user", "content": prompt}],
-                        temperature=0.3
-                    )
-                    ai_text = resp["choices"][0]["message"]["content"]
-                except Exception:
-                    # Minimal fallback
-                    ai_text = ""
-                if ai_text:
-                    st.success("AI Coach Suggestions:")
-                    st.write(ai_text)
-            except Exception as e:
-                st.warning(f"AI error: {e}")
-
-        st.markdown(f"### 🧭 {L['heuristic_title']}")
-        st.markdown(f"**• {L['heuristic_occ']}:**")
-        for q in occ_q: st.write(f"- {q}")
-        st.markdown(f"**• {L['heuristic_det']}:**")
-        for q in det_q: st.write(f"- {q}")
+# Each panel below is a fragment: a widget edit reruns only its own panel, not the whole page
+@timed_fragment("ai_helper")
+def ai_helper():
+    with st.expander(f"🤖 {L['ai_helper']}", expanded=False):
+        st.caption(L["ai_about"])
+        if not AI_AVAILABLE:
+            st.warning(L["ai_not_installed"])
+        api_key = st.text_input(f"🔐 {L['ai_enter_key']}", type="password")
+        if AI_AVAILABLE:
+            if not api_key and "OPENAI_API_KEY" in st.secrets:
+                api_key = st.secrets["OPENAI_API_KEY"]
+            if not api_key:
+                st.info(L["ai_no_key"])
+
+        user_issue = st.text_area(f"💬 {L['coach_prompt']}", height=130)
+        hits = similar_8ds(user_issue or st.session_state.answers.get(npqp_steps[0][0], ""))
+        show_similar(hits)
+        coach_key = cache_key(build_prompt(user_issue, language), language, DEFAULT_MODEL, api_key)
+        if st.button(f"🚀 {L['start_coach']}", key="ask_coach"):
+            st.session_state.coach_asked = coach_key
+            if AI_AVAILABLE and api_key:
+                # Streams on the coach executor; identical prompts on one key share a request and the cache
+                start_job("coach", coach_job, user_issue, language, api_key, key=coach_key)
+
+        if st.session_state.get("coach_asked") == coach_key:
+            # Heuristic helper (always available)
+            hq = HEURISTIC_QUESTIONS["es" if language == "Español" else "en"]
+            occ_q, det_q = hq["occ"], hq["det"]
+            similar_q = similar_probes(hits)
+
+            if "coach" in st.session_state.jobs:
+                st.success("AI Coach Suggestions:")
+                job_panel("coach", st.markdown, key=coach_key)
+
+            st.markdown(f"### 🧭 {L['heuristic_title']}")
+            st.markdown(f"**• {L['heuristic_occ']}:**")
+            for q in occ_q: st.write(f"- {q}")
+            st.markdown(f"**• {L['heuristic_det']}:**")
+            for q in det_q: st.write(f"- {q}")
+            if similar_q:
+                st.markdown(f"**• {L['similar_heuristic']}:**")
+                for q in similar_q: st.write(f"- {q}")
+
+
+ai_helper()
+
+# ---------- D5: 5-Why trees ----------
+# Each Why may have several contributing causes. Only one page of the expanded
+# rows gets widgets, plus one toolbar acting on the selected Why, so a rerun
+# costs the same with 5 Whys or 500.
+WHY_PAGE_SIZE = 20
+
+
+def why_collapsed(kind):
+    """Ids of the collapsed Whys of one tree (cleared with the widget keys when a report is loaded)."""
+    return st.session_state.setdefault(f"why_collapsed_{kind}", set())
+
+
+def why_show(kind, node):
+    """Select `node`, expanding its ancestors and turning to its page."""
+    tree, collapsed = st.session_state[f"d5_{kind}"], why_collapsed(kind)
+    up = tree.parent[node]
+    while up != ROOT:
+        collapsed.discard(up)
+        up = tree.parent[up]
+    pos = next(i for i, row in enumerate(tree.rows(collapsed)) if row[0] == node)
+    st.session_state[f"why_page_{kind}"] = pos // WHY_PAGE_SIZE + 1
+    st.session_state[f"why_sel_{kind}"] = node
+
+
+@resident
+def why_add(kind, branch):
+    """Add a deeper Why under the selected one, or (`branch`) another cause beside it."""
+    tree = st.session_state[f"d5_{kind}"]
+    sel = st.session_state.get(f"why_sel_{kind}")
+    parent = ROOT if sel not in tree else tree.parent[sel] if branch else sel
+    why_show(kind, tree.add(parent))
+
+
+@resident
+def why_remove(kind):
+    tree = st.session_state[f"d5_{kind}"]
+    sel = st.session_state.get(f"why_sel_{kind}")
+    if sel in tree:
+        parent = tree.parent[sel]
+        tree.remove(sel)
+        why_collapsed(kind).discard(sel)
+        if not len(tree):
+            parent = tree.add(ROOT)
+        if parent != ROOT:
+            why_show(kind, parent)
+
+
+@resident
+def why_fold(kind):
+    sel, collapsed = st.session_state.get(f"why_sel_{kind}"), why_collapsed(kind)
+    if sel in collapsed:
+        collapsed.discard(sel)
+    elif sel is not None:
+        collapsed.add(sel)
+
+
+def why_tree_editor(kind, title):
+    tree, collapsed = st.session_state[f"d5_{kind}"], why_collapsed(kind)
+    rows = list(tree.rows(collapsed))
+    pages = max(1, -(-len(rows) // WHY_PAGE_SIZE))
+    page_key, sel_key = f"why_page_{kind}", f"why_sel_{kind}"
+    if st.session_state.get(page_key, 1) > pages:
+        st.session_state[page_key] = pages
+    page = st.session_state.get(page_key, 1)
+    window = rows[(page - 1) * WHY_PAGE_SIZE:page * WHY_PAGE_SIZE]
+
+    labels = {}
+    for node, depth, level, branch in window:
+        label = "\u2003" * level + ("• " if branch else "") + f"{L['why']} #{depth + 1} — {title}"
+        if node in collapsed:
+            label += f" ▸ (+{tree.subtree_size(node)})"
+        labels[node] = label
+        tree.text[node] = st.text_input(label, value=tree.text[node], key=f"why_{kind}_{node}")
+
+    if pages > 1:
+        st.number_input(f"{L['why_page']} (1–{pages})", min_value=1, max_value=pages, step=1, key=page_key)
+    if st.session_state.get(sel_key) not in labels:
+        st.session_state[sel_key] = window[-1][0]
+    c_sel, c_add, c_branch, c_fold, c_del = st.columns([3, 1.4, 1.4, 1, 1], vertical_alignment="bottom")
+    sel = c_sel.selectbox(L["why_selected"], list(labels), key=sel_key,
+                          format_func=lambda n: f"{labels[n].strip()}: {tree.text[n][:40]}")
+    c_add.button(f"➕ {L['add_why']}", key=f"add_{kind}", on_click=why_add, args=(kind, False))
+    c_branch.button(f"⑂ {L['add_branch']}", key=f"branch_{kind}", on_click=why_add, args=(kind, True))
+    c_fold.button(f"▸ {L['expand']}" if sel in collapsed else f"▾ {L['collapse']}", key=f"fold_{kind}",
+                  on_click=why_fold, args=(kind,), disabled=sel not in collapsed and tree.first[sel] < 0)
+    c_del.button(f"🗑 {L['remove_why']}", key=f"del_{kind}", on_click=why_remove, args=(kind,))
 
-# ---------- Tabs for D1–D8 ----------
-tabs = st.tabs([s for s, _, _ in npqp_steps])
 
-for i, (step, note, example) in enumerate(npqp_steps):
-    with tabs[i]:
-        st.markdown(f"### {step}")
+# ---------- Tabs for D1–D8 ----------
+def step_tab(i, step, note, example):
+    st.markdown(f"### {step}")
 
-        if mode_training:
-            if step.startswith("D5"):
-                st.info(L["d5_training"])
-            else:
-                st.info(f"**Training Guidance / Guía:** {note}\n\n💡 **Example / Ejemplo:** {example}")
+    if mode_training:
+        if step.startswith("D5"):
+            st.info(L["d5_training"])
+        else:
+            st.info(f"**Training Guidance / Guía:** {note}\n\n💡 **Example / Ejemplo:** {example}")
+
+    # Assignments
+    st.markdown(f"**{L['assignments']}**")
+    ca, cb, cc = st.columns([2, 1.5, 1.5])
+    with ca:
+        st.session_state.owners[step] = st.text_input(f"👤 {L['owner']} — {step}", value=st.session_state.owners[step], key=f"own_{i}")
+    with cb:
+        st.session_state.dues[step] = st.date_input(f"📅 {L['due']} — {step}", value=st.session_state.dues[step], key=f"due_{i}")
+    with cc:
+        st.session_state.status[step] = st.selectbox(f"📌 {L['status']} — {step}", options=L["status_opts"], index=L["status_opts"].index(st.session_state.status[step]) if st.session_state.status[step] in L["status_opts"] else 0, key=f"st_{i}")
+
+    st.markdown("---")
+
+    if step.startswith("D5"):
+        for kind, title in (("occ", L["occurrence"]), ("det", L["detection"])):
+            st.subheader(title)
+            why_tree_editor(kind, title)
+
+        st.session_state.d5_root = st.text_area(L["root_cause"], value=st.session_state.d5_root, height=120, key="d5root")
+
+        # Compose D5 answer (for Excel)
+        whys = {"occ": st.session_state.d5_occ, "det": st.session_state.d5_det}
+        st.session_state.answers[step] = compose_d5(whys, L)
+    else:
+        st.session_state.answers[step] = st.text_area(f"📝 {L['your_answer']} — {step}", value=st.session_state.answers[step], height=160, key=f"ans_{i}")
+        if i == 0:
+            show_similar(similar_8ds(st.session_state.answers[step]))
 
-        # Assignments
-        st.markdown(f"**{L['assignments']}**")
-        ca, cb, cc = st.columns([2, 1.5, 1.5])
-        with ca:
-            st.session_state.owners[step] = st.text_input(f"👤 {L['owner']} — {step}", value=st.session_state.owners[step], key=f"own_{i}")
-        with cb:
-            st.session_state.dues[step] = st.date_input(f"📅 {L['due']} — {step}", value=st.session_state.dues[step], key=f"due_{i}")
-        with cc:
-            st.session_state.status[step] = st.selectbox(f"📌 {L['status']} — {step}", options=L["status_opts"], index=L["status_opts"].index(st.session_state.status[step]) if st.session_state.status[step] in L["status_opts"] else 0, key=f"st_{i}")
+    autosave()
 
-        st.markdown("---")
 
-        if step.startswith("D5"):
-            # Occurrence
-            st.subheader(L["occurrence"])
-            for idx, val in enumerate(st.session_state.d5_occ):
-                st.session_state.d5_occ[idx] = st.text_input(f"{L['why']} #{idx+1} — {L['occurrence']}", value=val, key=f"d5o_{idx}")
-            if st.button(f"➕ {L['add_why']} — {L['occurrence']}", key="add_occ"):
-                st.session_state.d5_occ.append("")
-
-            # Detection
-            st.subheader(L["detection"])
-            for idx, val in enumerate(st.session_state.d5_det):
-                st.session_state.d5_det[idx] = st.text_input(f"{L['why']} #{idx+1} — {L['detection']}", value=val, key=f"d5d_{idx}")
-            if st.button(f"➕ {L['add_why']} — {L['detection']}", key="add_det"):
-                st.session_state.d5_det.append("")
-
-            st.session_state.d5_root = st.text_area(L["root_cause"], value=st.session_state.d5_root, height=120, key="d5root")
-
-            # Compose D5 answer (for Excel)
-            occ_txt = "\n".join([w for w in st.session_state.d5_occ if w.strip()])
-            det_txt = "\n".join([w for w in st.session_state.d5_det if w.strip()])
-            st.session_state.answers[step] = f"{L['occurrence']}:\n{occ_txt}\n\n{L['detection']}:\n{det_txt}"
-        else:
-            st.session_state.answers[step] = st.text_area(f"📝 {L['your_answer']} — {step}", value=st.session_state.answers[step], height=160, key=f"ans_{i}")
+with metrics.span("tabs"):
+    tabs = st.tabs([s for s, _, _ in npqp_steps])
+    for i, (step, note, example) in enumerate(npqp_steps):
+        with tabs[i]:
+            # Keyed per step, so another session's edit reruns just that tab
+            timed_fragment("step_tab", key=f"step_{step_id(step)}")(step_tab)(i, step, note, example)
 
 # ---------- Fishbone Diagram ----------
 st.markdown("---")
 st.header(f"🐟 {L['fishbone_title']}")
 st.caption(L["fishbone_note"])
 
-if "fishbone" not in st.session_state:
-    st.session_state.fishbone = {
-        "People": [""],
-        "Process/Method": [""],
-        "Machine/Equipment": [""],
-        "Material/Components": [""],
-        "Environment": [""],
-        "Measurement/Test": [""],
-    }
+# ---------- Fishbone editor ----------
+# Like the Why trees: only one page of each category's causes gets widgets
+CAUSE_PAGE_SIZE = 20
 
 # localized category keys -> internal keys
 cat_map = {
@@ -399,123 +671,234 @@ cat_map = {
     L["environment"]: "Environment",
     L["measurement"]: "Measurement/Test",
 }
-
-cols = st.columns(3)
 cats_local = list(cat_map.keys())
-for idx, cat_local in enumerate(cats_local):
-    with cols[idx % 3]:
-        st.markdown(f"**{cat_local}**")
-        key_internal = cat_map[cat_local]
-        entries = st.session_state.fishbone.get(key_internal, [""])
-        # render inputs
-        for j in range(len(entries)):
-            entries[j] = st.text_input(f"{cat_local} cause #{j+1}", value=entries[j], key=f"fb_{key_internal}_{j}")
-        if st.button(f"➕ {L['add_cause']} — {cat_local}", key=f"add_{key_internal}"):
-            entries.append("")
-        st.session_state.fishbone[key_internal] = entries
-
-if st.button(f"📈 {L['render_fishbone']}"):
-    # Simple text-based fishbone plotted as categories radial list
-    fig, ax = plt.subplots(figsize=(10, 6))
-    ax.axis('off')
-    center_text = "Problem" if language == "English" else "Problema"
-    ax.text(0.5, 0.5, center_text, ha='center', va='center', fontsize=16, fontweight='bold')
-    # Place categories around
-    positions = [(0.15, 0.8), (0.85, 0.8), (0.15, 0.2), (0.85, 0.2), (0.15, 0.5), (0.85, 0.5)]
-    for (cat_local, pos) in zip(cats_local, positions):
-        key_internal = cat_map[cat_local]
-        ax.text(pos[0], pos[1], cat_local, fontsize=12, fontweight='bold', ha='center')
-        causes = [c for c in st.session_state.fishbone.get(key_internal, []) if c.strip()]
-        # list causes under the category
-        y = pos[1] - 0.06
-        for c in causes[:6]:
-            ax.text(pos[0], y, f"• {c}", fontsize=10, ha='center', va='top')
-            y -= 0.045
-    st.pyplot(fig)
+cat_local_of = {v: k for k, v in cat_map.items()}
+
+
+@resident
+def add_suggested(proposals):
+    """Fill empty cause slots first, then append; cleared widget keys re-read their `value=`."""
+    for cat, items in proposals.items():
+        entries = st.session_state.fishbone[cat]
+        for text in items:
+            j = next((j for j, e in enumerate(entries) if not e.strip()), None)
+            if j is None:
+                entries.append(text)
+            else:
+                entries[j] = text
+                st.session_state.pop(f"fb_{cat}_{j}", None)
+
+
+@resident
+def add_cause(cat):
+    entries = st.session_state.fishbone[cat]
+    entries.append("")
+    st.session_state[f"fb_page_{cat}"] = -(-len(entries) // CAUSE_PAGE_SIZE)   # show the new slot
+
+
+@timed_fragment("fishbone_editor", key="fishbone")
+def fishbone_editor():
+    # Every D5 Why and D3 sentence classified in one batched pass
+    d3 = st.session_state.answers.get(npqp_steps[2][0], "")
+    whys = st.session_state.d5_occ.texts() + st.session_state.d5_det.texts()
+    proposals = {}
+    if whys or d3.strip():
+        from cause_classifier import get_classifier, sentences
+        proposals = get_classifier().propose(whys + sentences(d3), st.session_state.fishbone)
+    if proposals:
+        with st.expander(f"🧠 {L['suggested_causes']} ({sum(map(len, proposals.values()))})", expanded=False):
+            for cat, items in proposals.items():
+                st.markdown(f"**{cat_local_of[cat]}:** " + " · ".join(items))
+            st.button(f"✨ {L['add_suggestions']}", key="add_suggested", on_click=add_suggested, args=(proposals,))
+
+    cols = st.columns(3)
+    for idx, cat_local in enumerate(cats_local):
+        with cols[idx % 3]:
+            st.markdown(f"**{cat_local}**")
+            key_internal = cat_map[cat_local]
+            entries = st.session_state.fishbone.get(key_internal, [""])
+            pages = max(1, -(-len(entries) // CAUSE_PAGE_SIZE))
+            page_key = f"fb_page_{key_internal}"
+            if st.session_state.get(page_key, 1) > pages:
+                st.session_state[page_key] = pages
+            page = st.session_state.get(page_key, 1)
+            # render inputs
+            for j in range((page - 1) * CAUSE_PAGE_SIZE, min(page * CAUSE_PAGE_SIZE, len(entries))):
+                entries[j] = st.text_input(f"{cat_local} cause #{j+1}", value=entries[j], key=f"fb_{key_internal}_{j}")
+            if pages > 1:
+                st.number_input(f"{L['why_page']} (1–{pages})", min_value=1, max_value=pages, step=1, key=page_key)
+            st.button(f"➕ {L['add_cause']} — {cat_local}", key=f"add_{key_internal}", on_click=add_cause, args=(key_internal,))
+            st.session_state.fishbone[key_internal] = entries
+
+    autosave()
+
+    # Cached by content hash: identical diagrams are not re-rendered across reruns/sessions
+    fb_key = fishbone_key(st.session_state.fishbone, language, cats_local)
+    if st.button(f"📈 {L['render_fishbone']}", key="render_fishbone"):
+        metrics.inc("npqp_renders_total", help="Fishbone render requests.")
+        fishbone = {c: list(v) for c, v in st.session_state.fishbone.items()}
+        start_job("fishbone", render_job, fishbone, language, cats_local, key=fb_key)
+    if "fishbone" in st.session_state.jobs:
+        job_panel("fishbone", show_fishbone, key=fb_key)
+
+
+def show_fishbone(svg):
+    st.image(svg.decode("utf-8"), width="stretch")
+    cs = render_cache.stats()
+    st.caption(f"Render cache — hits: {cs['hits']} · misses: {cs['misses']} · evictions: {cs['evictions']} · size: {cs['size']}/{cs['maxsize']}")
+
+
+fishbone_editor()
+
+# ---------- Assignments dashboard (all reports) ----------
+@timed_fragment("dashboard")
+def assignments_dashboard():
+    st.markdown("---")
+    st.header(f"📊 {L['dashboard']}")
+    if not st.toggle(L["show_dashboard"], key="show_dashboard"):
+        return
+    from assignments import get_assignments, BUCKETS
+    from report_model import STATUS_CODES
+
+    # Flush this session's pending edits so they show up right away
+    st.session_state.editor.autosaver.flush()
+    s = get_assignments(store).summary()
+    m1, m2, m3 = st.columns(3)
+    m1.metric(L["open_reports"], s["open_reports"])
+    m2.metric(L["open_steps"], s["open_steps"])
+    m3.metric(L["overdue"], s["buckets"]["overdue"])
+    st.bar_chart({"n": dict(zip(L["bucket_labels"], (s["buckets"][b] for b in BUCKETS)))}, horizontal=True)
+
+    col_o, col_s = st.columns(2)
+    with col_o:
+        st.markdown(f"**{L['by_owner']}**")
+        owners = s["owners"][:50]
+        st.dataframe({L["owner"]: [o or L["unassigned"] for o, _, _ in owners],
+                      L["overdue"]: [n for _, n, _ in owners],
+                      L["open_steps"]: [n for _, _, n in owners]}, hide_index=True)
+    with col_s:
+        st.markdown(f"**{L['by_step']}**")
+        table = {L["step"]: list(s["status_counts"])}
+        for code, label in zip(STATUS_CODES, L["status_opts"]):
+            table[label] = [c[code] for c in s["status_counts"].values()]
+        table[L["overdue"]] = list(s["overdue_by_step"].values())
+        st.dataframe(table, hide_index=True)
+
+
+assignments_dashboard()
+
+# ---------- Cause analytics (all reports) ----------
+@timed_fragment("analytics")
+def cause_analytics():
+    st.markdown("---")
+    st.header(f"📈 {L['analytics']}")
+    if not st.toggle(L["show_analytics"], key="show_analytics"):
+        return
+    from analytics import get_analytics, pareto_png, trend_png
+
+    st.session_state.editor.autosaver.flush()
+    index = get_analytics(store)
+    opts = index.options()
+    any_ = L["any"]
+    c1, c2, c3 = st.columns([1, 1, 2])
+    customer = c1.selectbox(L["customer"], [any_] + opts["customer"], key="an_customer")
+    product = c2.selectbox(L["product"], [any_] + opts["product"], key="an_product")
+    months = opts["months"]
+    month_from = month_to = None
+    if len(months) > 1:
+        with c3:
+            month_from, month_to = st.select_slider(L["month_range"], months, value=(months[0], months[-1]),
+                                                    key="an_months")
+    q = index.query(None if customer == any_ else customer, None if product == any_ else product,
+                    month_from, month_to)
+    if not q["reports"]:
+        st.info(L["no_data"])
+        return
+
+    m1, m2, m3 = st.columns(3)
+    m1.metric(L["reports_label"], q["reports"])
+    m2.metric(L["causes_label"], q["causes"])
+    m3.metric(L["recurrence_rate"], f"{q['recurrence']:.0%}", f"{q['recurring']}/{q['with_root']}",
+              delta_color="off")
+    col_c, col_t = st.columns(2)
+    with col_c:
+        if q["categories"]:
+            st.image(pareto_png([(cat_local_of[c], n) for c, n in q["categories"]], L["pareto_categories"]))
+    with col_t:
+        if q["terms"]:
+            st.image(pareto_png(q["terms"], L["pareto_terms"]))
+    if len(q["months"]) > 1:
+        st.image(trend_png(q["months"], q["trend"], L["trend_title"], labels=cat_local_of))
+    if q["themes"]:
+        st.markdown(f"**{L['recurring_roots']}**")
+        st.dataframe({L["root_theme"]: [t for t, _ in q["themes"]], L["count"]: [n for _, n in q["themes"]]},
+                     hide_index=True)
+
+
+cause_analytics()
 
 # ---------- Save to Excel ----------
-step_colors = {
-    "D1: Concern Details": "ADD8E6",
-    "D2: Similar Part Considerations": "90EE90",
-    "D3: Initial Analysis": "FFFF99",
-    "D4: Implement Containment": "FFD580",
-    "D5: Final Analysis": "FF9999",
-    "D6: Permanent Corrective Actions": "D8BFD8",
-    "D7: Countermeasure Confirmation": "E0FFFF",
-    "D8: Follow-up Activities (Lessons Learned / Recurrence Prevention)": "D3D3D3",
-    "D1: Detalles de la Queja": "ADD8E6",
-    "D2: Consideración de Partes Similares": "90EE90",
-    "D3: Análisis Inicial": "FFFF99",
-    "D4: Implementar Contención": "FFD580",
-    "D5: Análisis Final": "FF9999",
-    "D6: Acciones Correctivas Permanentes": "D8BFD8",
-    "D7: Confirmación de Contramedidas": "E0FFFF",
-    "D8: Seguimiento (Lecciones Aprendidas / Prevención de Recurrencia)": "D3D3D3"
-}
-
-if st.button(f"💾 {L['save']}"):
-    data_rows = [(s, st.session_state.answers[s],
-                  st.session_state.d5_root if s.startswith("D5") else "",
-                  st.session_state.owners[s], st.session_state.dues[s], st.session_state.status[s])
-                 for s, _, _ in npqp_steps]
-
-    if not any(ans for _, ans, _, _, _, _ in data_rows):
-        st.error(f"⚠️ {L['no_answers']}")
-    else:
-        xlsx_file = "NPQP_8D_Advanced.xlsx"
-        wb = Workbook()
-        ws = wb.active
-        ws.title = "NPQP 8D Report"
-
-        # Title
-        ws.merge_cells("A1:F1")
-        ws["A1"] = "Nissan NPQP 8D Report"
-        ws["A1"].font = Font(size=14, bold=True)
-        ws["A1"].alignment = Alignment(horizontal="center", vertical="center")
-        ws.row_dimensions[1].height = 24
-
-        # Report info
-        ws["A3"] = "Report Date / Fecha"
-        ws["B3"] = report_date
-        ws["A4"] = "Prepared By / Preparado por"
-        ws["B4"] = prepared_by
-        ws["A5"] = "Product / Part"
-        ws["B5"] = product
-        ws["A6"] = "Customer / Cliente"
-        ws["B6"] = customer
-
-        # Headers
-        headers = ["Step", "Your Answer", "Root Cause", "Owner", "Due Date", "Status"]
-        header_fill = PatternFill(start_color="C0C0C0", end_color="C0C0C0", fill_type="solid")
-        row = 8
-        for col, header in enumerate(headers, start=1):
-            cell = ws.cell(row=row, column=col, value=header)
-            cell.font = Font(bold=True)
-            cell.alignment = Alignment(horizontal="center", vertical="center", wrap_text=True)
-            cell.fill = header_fill
-
-        # Content
-        row = 9
-        for step, ans, root, owner, due, status in data_rows:
-            ws.cell(row=row, column=1, value=step)
-            ws.cell(row=row, column=2, value=ans)
-            ws.cell(row=row, column=3, value=root)
-            ws.cell(row=row, column=4, value=owner)
-            ws.cell(row=row, column=5, value=str(due) if due else "")
-            ws.cell(row=row, column=6, value=status)
-
-            fill_color = step_colors.get(step, "FFFFFF")
-            for col in range(1, 7):
-                ws.cell(row=row, column=col).fill = PatternFill(start_color=fill_color, end_color=fill_color, fill_type="solid")
-                ws.cell(row=row, column=col).alignment = Alignment(wrap_text=True, vertical="top")
-            row += 1
-
-        # Column widths
-        widths = [28, 46, 40, 20, 18, 18]
-        for col, w in enumerate(widths, start=1):
-            ws.column_dimensions[get_column_letter(col)].width = w
-
-        wb.save(xlsx_file)
-        st.success(f"✅ {L['saved']}")
-        with open(xlsx_file, "rb") as f:
-            st.download_button(f"📥 {L['download']}", f, file_name=xlsx_file)
+with metrics.span("save"):
+    # Every export starts from the snapshot; its canonical bytes double as the job's dedup key.
+    # Serializing is the costly part: only a save, a shown export or a download pays for it.
+    report = report_from_session(st.session_state, L, lang)
+    export_key = None
+    has_content = (any(s["answer"].strip() for sid, s in report["steps"].items() if sid != "D5")
+                   or report["d5_root"].strip()
+                   or any(w.strip() for items in report["whys"].values() for w in items))
+
+    col_save, col_snap = st.columns(2)
+    with col_save:
+        if st.button(f"💾 {L['save']}", key="save_report"):
+            if not has_content:
+                st.error(f"⚠️ {L['no_answers']}")
+            else:
+                # Built in memory on a worker: no shared file on disk, no cross-user races, no blocked UI.
+                # Imported here because workers don't run with the script's sys.path.
+                import xlsx_export  # noqa: F401
+                metrics.inc("npqp_saves_total", help="Excel saves.")
+                snap = snapshot.dumps(report)
+                export_key = snapshot.digest(snap)
+                start_job("xlsx", export_job, snap, key=export_key)
+    with col_snap:
+        st.download_button(f"📦 {L['snapshot_download']}", functools.partial(snapshot.dumps, report),
+                           file_name=snapshot.filename(report), mime=snapshot.MIME, key="snapshot_download", on_click="ignore")
+
+
+def show_export(xlsx_bytes):
+    from xlsx_export import XLSX_FILENAME, XLSX_MIME
+
+    st.success(f"✅ {L['saved']}")
+    st.download_button(f"📥 {L['download']}", xlsx_bytes, file_name=XLSX_FILENAME, mime=XLSX_MIME)
+
+
+if "xlsx" in st.session_state.jobs:
+    if export_key is None:
+        export_key = snapshot.digest(snapshot.dumps(report))
+    job_panel("xlsx", show_export, key=export_key)
+
+
+# ---------- Co-editing poll ----------
+@timed_fragment("coedit", run_every=POLL_SECONDS)
+def coedit_poll():
+    # An idle session spills its report state on a poll tick and stops pulling until its user is back
+    reason = governor.check(session_id()) if in_fragment_run() else None
+    if reason == SPILLED:
+        return
+    if reason:
+        spill_session(reason)
+        return
+    # Nothing new (the common case) costs one integer comparison
+    sections = pull_edits()
+    show_conflicts()
+    if not sections:
+        return
+    if in_fragment_run() and "info" not in sections:
+        rerun_fragments({"fishbone" if s == "fishbone" else f"step_{s}" for s in sections})
+    st.rerun()
+
+
+coedit_poll()
+
+track_session()
+metrics.end_rerun()
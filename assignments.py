@@ -0,0 +1,245 @@
+# ===========================
+# 8D Training App — Assignment Tracker
+# Columnar (NumPy) index of every report's per-step owner / due / status,
+# kept current from store writes, for the cross-report assignments dashboard.
+# ===========================
+
+import datetime
+import threading
+from collections import deque
+from functools import lru_cache
+
+import numpy as np
+
+from report_model import STEP_IDS, STATUS_CODES, status_code
+
+NO_DUE = 0                       # due column sentinel (dates are stored as proleptic ordinals)
+DONE = STATUS_CODES.index("done")
+BUCKETS = ("overdue", "next_7", "next_30", "later", "no_due")
+UNASSIGNED = ""
+
+_STEP_COL = {sid: j for j, sid in enumerate(STEP_IDS)}
+_STATUS_IX = {code: i for i, code in enumerate(STATUS_CODES)}
+
+
+@lru_cache(maxsize=4096)
+def _due_ordinal(due):
+    if not due:
+        return NO_DUE
+    try:
+        return datetime.date.fromisoformat(str(due)[:10]).toordinal()
+    except ValueError:
+        return NO_DUE
+
+
+def _status_ix(value):
+    # Stored values are canonical codes; EN / ES labels from a session map onto the same code
+    return _STATUS_IX.get(value, _STATUS_IX[status_code(value)])
+
+
+class AssignmentIndex:
+    """One row per report, one column per D-step: owner id, due ordinal, status code.
+
+    Store writes are queued by notify() (never blocks the writer) and applied on the
+    next read, touching only the changed report's row. Status counts per step and
+    open steps per owner are maintained incrementally; the date-dependent views
+    (overdue, due buckets) are one vectorized pass over the arrays, memoized until
+    the data or the day changes. "Open" means the report still has a step not done.
+    """
+
+    def __init__(self, capacity=1024):
+        n_steps = len(STEP_IDS)
+        self.owner = np.zeros((capacity, n_steps), dtype=np.int32)
+        self.due = np.zeros((capacity, n_steps), dtype=np.int32)
+        self.status = np.zeros((capacity, n_steps), dtype=np.int8)
+        self.live = np.zeros(capacity, dtype=bool)
+        self.open = np.zeros(capacity, dtype=bool)
+        self.owners = [UNASSIGNED]
+        self._owner_id = {UNASSIGNED: 0}
+        self.status_counts = np.zeros((n_steps, len(STATUS_CODES)), dtype=np.int64)
+        self.owner_open = np.zeros(16, dtype=np.int64)
+        self._row = {}
+        self._free = []
+        self._size = 0
+        self._pending = deque()
+        self._lock = threading.Lock()
+        self.version = 0
+        self._memo = None
+
+    # ---------- storage ----------
+    def _grow(self):
+        cap = len(self.live) * 2
+        for name in ("owner", "due", "status"):
+            old = getattr(self, name)
+            new = np.zeros((cap, old.shape[1]), dtype=old.dtype)
+            new[:len(old)] = old
+            setattr(self, name, new)
+        for name in ("live", "open"):
+            old = getattr(self, name)
+            new = np.zeros(cap, dtype=bool)
+            new[:len(old)] = old
+            setattr(self, name, new)
+
+    def _owner_ix(self, name):
+        name = (name or "").strip()
+        ix = self._owner_id.get(name)
+        if ix is None:
+            ix = self._owner_id[name] = len(self.owners)
+            self.owners.append(name)
+            if ix >= len(self.owner_open):
+                self.owner_open = np.concatenate([self.owner_open, np.zeros_like(self.owner_open)])
+        return ix
+
+    def _alloc(self, uid):
+        if self._free:
+            r = self._free.pop()
+        else:
+            if self._size == len(self.live):
+                self._grow()
+            r = self._size
+            self._size += 1
+        self._row[uid] = r
+        self.owner[r] = 0
+        self.due[r] = NO_DUE
+        self.status[r] = 0
+        self.live[r] = True
+        self.open[r] = False
+        return r
+
+    # ---------- incremental aggregates ----------
+    def _contribute(self, r, sign):
+        if not self.open[r]:
+            return
+        cols = np.arange(len(STEP_IDS))
+        np.add.at(self.status_counts, (cols, self.status[r]), sign)
+        pending = self.status[r] != DONE
+        np.add.at(self.owner_open, self.owner[r][pending], sign)
+
+    def _set_row(self, r, steps):
+        self._contribute(r, -1)
+        for sid, fields in steps.items():
+            j = _STEP_COL.get(sid)
+            if j is None:
+                continue
+            if "owner" in fields:
+                self.owner[r, j] = self._owner_ix(fields["owner"])
+            if "due" in fields:
+                self.due[r, j] = _due_ordinal(fields["due"])
+            if "status" in fields:
+                self.status[r, j] = _status_ix(fields["status"])
+        self.open[r] = bool((self.status[r] != DONE).any())
+        self._contribute(r, +1)
+
+    def _remove(self, uid):
+        r = self._row.pop(uid, None)
+        if r is not None:
+            self._contribute(r, -1)
+            self.live[r] = self.open[r] = False
+            self._free.append(r)
+
+    def _drain(self):
+        changed = False
+        while self._pending:
+            uid, steps = self._pending.popleft()
+            if steps is None:
+                self._remove(uid)
+            else:
+                r = self._row.get(uid)
+                self._set_row(self._alloc(uid) if r is None else r, steps)
+            changed = True
+        if changed:
+            self.version += 1
+
+    # ---------- feeding ----------
+    def notify(self, uid, steps):
+        """Store listener: `steps` maps step IDs to changed fields; None means the report was deleted."""
+        self._pending.append((uid, steps))
+
+    def load(self, rows):
+        """Bulk-fill from (uid, step, owner, due, status) rows, then count aggregates once."""
+        with self._lock:
+            rows = [row for row in rows if row[1] in _STEP_COL]
+            if rows:
+                uids, sids, owners, dues, statuses = zip(*rows)
+                for uid in dict.fromkeys(uids):
+                    if uid not in self._row:
+                        self._alloc(uid)
+                r = np.fromiter(map(self._row.__getitem__, uids), dtype=np.int64, count=len(rows))
+                j = np.fromiter(map(_STEP_COL.__getitem__, sids), dtype=np.int64, count=len(rows))
+                self.owner[r, j] = np.fromiter(map(self._owner_ix, owners), dtype=np.int32, count=len(rows))
+                self.due[r, j] = np.fromiter(map(_due_ordinal, dues), dtype=np.int32, count=len(rows))
+                self.status[r, j] = np.fromiter(map(_status_ix, statuses), dtype=np.int8, count=len(rows))
+            n = self._size
+            live = self.live[:n]
+            self.open[:n] = live & (self.status[:n] != DONE).any(axis=1)
+            rows_open = self.open[:n]
+            st_ = self.status[:n][rows_open]
+            self.status_counts[:] = 0
+            for j in range(len(STEP_IDS)):
+                self.status_counts[j] = np.bincount(st_[:, j], minlength=len(STATUS_CODES))
+            pending = (self.status[:n] != DONE) & rows_open[:, None]
+            self.owner_open[:] = 0
+            counts = np.bincount(self.owner[:n][pending], minlength=len(self.owners))
+            self.owner_open[:len(counts)] = counts
+            self.version += 1
+
+    # ---------- reads ----------
+    def summary(self, today=None):
+        """Dashboard aggregates across all open reports (memoized per data version and day)."""
+        today = today or datetime.date.today()
+        with self._lock:
+            self._drain()
+            key = (self.version, today)
+            if self._memo is not None and self._memo[0] == key:
+                return self._memo[1]
+            n = self._size
+            t = today.toordinal()
+            due = self.due[:n]
+            pending = (self.status[:n] != DONE) & self.open[:n, None]
+            dated = pending & (due != NO_DUE)
+            days = due.astype(np.int64) - t
+            overdue = dated & (days < 0)
+            n_owners = len(self.owners)
+            overdue_by_owner = np.bincount(self.owner[:n][overdue], minlength=n_owners)
+            open_by_owner = self.owner_open[:n_owners]
+            # Ties by name: owner ids follow the order owners were first seen, which edits change
+            by_name = np.empty(n_owners, dtype=np.int64)
+            by_name[np.argsort(np.array(self.owners, dtype=str), kind="stable")] = np.arange(n_owners)
+            order = np.lexsort((by_name, -open_by_owner, -overdue_by_owner))
+            result = {
+                "reports": int(self.live[:n].sum()),
+                "open_reports": int(self.open[:n].sum()),
+                "open_steps": int(pending.sum()),
+                "status_counts": {sid: dict(zip(STATUS_CODES, map(int, self.status_counts[j])))
+                                  for j, sid in enumerate(STEP_IDS)},
+                "overdue_by_step": dict(zip(STEP_IDS, map(int, overdue.sum(axis=0)))),
+                "owners": [(self.owners[i], int(overdue_by_owner[i]), int(open_by_owner[i]))
+                           for i in order if open_by_owner[i]],
+                "buckets": {
+                    "overdue": int(overdue.sum()),
+                    "next_7": int((dated & (days >= 0) & (days <= 7)).sum()),
+                    "next_30": int((dated & (days > 7) & (days <= 30)).sum()),
+                    "later": int((dated & (days > 30)).sum()),
+                    "no_due": int((pending & (due == NO_DUE)).sum()),
+                },
+            }
+            self._memo = (key, result)
+            return result
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_assignments(store=None):
+    """The process-wide index over `store` (default: the app's store), built on first use."""
+    global _index
+    with _index_lock:
+        if _index is None:
+            if store is None:
+                from report_store import get_store
+                store = get_store()
+            index = AssignmentIndex()
+            index.load(store.assignment_rows(subscribe=index.notify))
+            _index = index
+        return _index
@@ -0,0 +1,99 @@
+# ===========================
+# Shared AppTest harness for the benchmarks
+# Times script runs from runner events (AppTest's polling sleep is not counted)
+# and can replay the browser's fragment-scoped reruns, which AppTest never issues.
+# ===========================
+
+import os
+import sys
+import time
+
+from streamlit.testing.v1 import AppTest
+from streamlit.testing.v1 import local_script_runner as lsr
+from streamlit.runtime.scriptrunner_utils.script_requests import RerunData
+from streamlit.runtime.scriptrunner import ScriptRunnerEvent
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+from ishikawa import CATEGORIES
+from why_tree import WhyTree
+
+APP = os.path.join(ROOT, "app.advanced.py")
+
+# Fragment order as registered by the app: AI helper, D1..D8 tabs, fishbone editor
+FRAG_D1, FRAG_D5, FRAG_FISHBONE = 1, 5, 9
+
+_fragment_queue = []
+_orig_run = lsr.LocalScriptRunner.run
+
+
+def _run(self, widget_state=None, query_params=None, timeout=3, page_hash=""):
+    marks = {}
+
+    def on_event(sender, event, **kwargs):
+        if event == ScriptRunnerEvent.SCRIPT_STARTED:
+            marks["start"] = time.perf_counter()
+        elif event in (ScriptRunnerEvent.SCRIPT_STOPPED_WITH_SUCCESS,
+                       ScriptRunnerEvent.FRAGMENT_STOPPED_WITH_SUCCESS):
+            marks["end"] = time.perf_counter()
+
+    self.on_event.connect(on_event, weak=False)
+    if _fragment_queue:
+        self._requests._rerun_data = RerunData(widget_states=widget_state, page_script_hash=page_hash,
+                                               fragment_id_queue=list(_fragment_queue),
+                                               is_fragment_scoped_rerun=True)
+    try:
+        if not _fragment_queue:
+            return _orig_run(self, widget_state, query_params, timeout, page_hash)
+        if not self._script_thread:
+            self.start()
+        lsr.require_widgets_deltas(self, timeout)
+        self.join()
+        return lsr.parse_tree_from_messages(self.forward_msgs())
+    finally:
+        _run.last_ms = (marks.get("end", 0) - marks.get("start", 0)) * 1000
+
+
+lsr.LocalScriptRunner.run = _run
+
+
+def new_app(path=APP, n=None, timeout=120):
+    """AppTest for `path`, optionally pre-filled with `n` Whys per list and `n` causes per category."""
+    at = AppTest.from_file(path, default_timeout=timeout)
+    at.secrets["OPENAI_API_KEY"] = ""
+    at.run()
+    if n is not None:
+        # Seeded after the first run: opening a new draft resets the report state
+        # Apps from before the 5-Why tree hold the Whys as plain lists
+        whys = WhyTree.chain if _has_why_tree(at) else list
+        for kind in ("occ", "det"):
+            at.session_state[f"d5_{kind}"] = tree = whys(f"Why {i}" for i in range(n))
+            if isinstance(tree, WhyTree):
+                # Why widgets are keyed by node id: the first run's empty ones would overwrite the seeded text
+                for node in range(1, len(tree.text)):
+                    at.session_state[f"why_{kind}_{node}"] = tree.text[node]
+        at.session_state.fishbone = {k: [f"cause {i}" for i in range(n)] for k in CATEGORIES}
+        at.run()
+    return at
+
+
+def _has_why_tree(at):
+    return isinstance(at.session_state.d5_occ, WhyTree)
+
+
+def first_why_key(at):
+    """Widget key of the first Occurrence Why, in either app layout."""
+    return "why_occ_1" if _has_why_tree(at) else "d5o_0"
+
+
+def timed_run(at, edit, fragment=None):
+    """Apply `edit(at)` and rerun (scoped to fragment index `fragment` if given); returns script ms."""
+    frags = list(at._fragment_storage._fragments)
+    _fragment_queue[:] = [frags[fragment]] if fragment is not None else []
+    try:
+        edit(at)
+        at.run()
+    finally:
+        _fragment_queue.clear()
+    return _run.last_ms
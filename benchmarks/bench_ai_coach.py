@@ -0,0 +1,194 @@
+# ===========================
+# Benchmark — AI coach latency against a local stub API
+# Reports time-to-first-token / total latency percentiles, cache hits,
+# and checks the timeout and cancellation paths; then the shared client pool:
+# connection reuse, coalescing of identical prompts, the concurrency cap,
+# the per-key token bucket and queue stats, and coach jobs on their own
+# executor (filling every upstream slot while exports keep their workers).
+# Run: python benchmarks/bench_ai_coach.py
+# ===========================
+
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import ai_coach
+import ai_pool
+from ai_coach import ask_coach, response_cache, CoachError
+from ai_pool import ClientPool
+from jobs import JobExecutor, MAX_WORKERS
+from stub_openai import StubOpenAI
+
+
+def pct(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))]
+
+
+def run(base_url, issues, timeout=10.0):
+    ttft, total = [], []
+    for issue in issues:
+        t0 = time.perf_counter()
+        stream = ask_coach(issue, "English", "stub-key", timeout=timeout, base_url=base_url)
+        first = None
+        for _ in stream.tokens():
+            if first is None:
+                first = time.perf_counter() - t0
+        total.append((time.perf_counter() - t0) * 1000)
+        ttft.append((first if first is not None else 0) * 1000)
+    return ttft, total
+
+
+def report(name, ttft, total):
+    print(f"{name:<14} n={len(total):<4} "
+          f"ttft p50={pct(ttft, 50):7.2f} p95={pct(ttft, 95):7.2f} p99={pct(ttft, 99):7.2f}  "
+          f"total p50={pct(total, 50):7.2f} p95={pct(total, 95):7.2f} p99={pct(total, 99):7.2f} ms")
+
+
+def main():
+    issues = [f"Intermittent static on amplifier lot {i}" for i in range(100)]
+    ai_pool._pool = ClientPool(rate=1000, burst=1000)   # latency only: no rate limit here
+    with StubOpenAI(tokens=40, token_delay=0.001) as stub:
+        response_cache.clear()
+        report("cold (miss)", *run(stub.base_url, issues))
+        report("warm (hit)", *run(stub.base_url, issues))
+        assert stub.requests == len(issues), "cache hits must not reach upstream"
+        print("cache:", response_cache.stats())
+
+    # Hard timeout: upstream stalls longer than the coach deadline
+    with StubOpenAI(tokens=5, first_token_delay=2.0) as stub:
+        response_cache.clear()
+        t0 = time.perf_counter()
+        try:
+            list(ask_coach("slow", "English", "stub-key", timeout=0.3, base_url=stub.base_url).tokens())
+            raise AssertionError("expected timeout")
+        except CoachError as e:
+            print(f"timeout path: {e} after {(time.perf_counter() - t0) * 1000:.0f} ms")
+
+    # Cancellation: consumer stops after the first token
+    with StubOpenAI(tokens=200, token_delay=0.01) as stub:
+        response_cache.clear()
+        stream = ask_coach("cancel me", "English", "stub-key", base_url=stub.base_url)
+        gen = stream.tokens()
+        next(gen)
+        t0 = time.perf_counter()
+        gen.close()
+        assert stream.join(timeout=2), "worker still running after cancel"
+        assert response_cache.get(stream.key) is None, "cancelled reply must not be cached"
+        print(f"cancel path: worker stopped in {(time.perf_counter() - t0) * 1000:.1f} ms")
+
+    pool_checks()
+
+
+def fan_out(n, issue, base_url, key="stub-key"):
+    """`n` threads ask at once (issue(i) -> note); returns wall ms and the streams."""
+    streams = [None] * n
+    barrier = threading.Barrier(n)
+
+    def one(i):
+        barrier.wait()
+        streams[i] = ask_coach(issue(i), "English", key if isinstance(key, str) else key(i), base_url=base_url)
+        list(streams[i].tokens())
+
+    threads = [threading.Thread(target=one, args=(i,)) for i in range(n)]
+    t0 = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return (time.perf_counter() - t0) * 1000, streams
+
+
+def pool_checks():
+    def fresh(**kw):
+        response_cache.clear()
+        ai_pool._pool = ClientPool(**kw)
+        return ai_pool._pool
+
+    # Keep-alive: sequential requests on one key share a client and its connection
+    with StubOpenAI(tokens=5, token_delay=0.0) as stub:
+        pool = fresh(rate=1000, burst=1000)
+        run(stub.base_url, [f"keepalive {i}" for i in range(50)])
+        print(f"keep-alive: {stub.requests} requests over {stub.connections} connection(s), "
+              f"{pool.stats()['clients_created']} client(s)")
+        assert stub.connections < stub.requests
+
+    # 30 trainees send the same note (up to spacing and case) at once: one upstream request
+    with StubOpenAI(tokens=40, token_delay=0.002) as stub:
+        fresh(rate=1000, burst=1000)
+        before = ai_coach.coalesced
+        ms, streams = fan_out(30, lambda i: "No  audio on AMP-200 " if i % 2 else "no audio on amp-200", stub.base_url)
+        texts = {s.text for s in streams}
+        print(f"coalescing: 30 identical prompts -> {stub.requests} upstream request(s), "
+              f"{ai_coach.coalesced - before} joined in flight, {ms:.0f} ms")
+        assert stub.requests == 1 and len(texts) == 1 and "" not in texts
+
+    # The same note on other API keys: never joined or served across keys
+    with StubOpenAI(tokens=20, token_delay=0.002) as stub:
+        fresh(rate=1000, burst=1000)
+        ms, streams = fan_out(12, lambda i: "no audio on amp-200", stub.base_url, key=lambda i: f"key-{i % 3}")
+        again = ask_coach("no audio on amp-200", "English", "key-3", base_url=stub.base_url)
+        print(f"key isolation: 12 identical prompts on 3 keys -> {stub.requests} upstream request(s); "
+              f"a 4th key cached: {again.cached}")
+        assert stub.requests == 3 and not again.cached and len({s.key for s in streams}) == 3
+        list(again.tokens())
+
+    # Concurrency cap across sessions and keys
+    with StubOpenAI(tokens=20, token_delay=0.005) as stub:
+        pool = fresh(rate=1000, burst=1000, max_concurrent=4)
+        ms, _ = fan_out(24, lambda i: f"distinct issue {i}", stub.base_url, key=lambda i: f"key-{i % 3}")
+        st = pool.stats()
+        print(f"concurrency cap 4: upstream max in flight {stub.max_active}, max queue depth {st['max_waiting']}, "
+              f"wait p50={st['wait_p50'] * 1000:.0f} p95={st['wait_p95'] * 1000:.0f} ms, "
+              f"{st['clients']} clients (one per key), {ms:.0f} ms total")
+        assert stub.max_active <= 4 and st["max_waiting"] > 0 and st["clients"] == 3
+
+    # Coach jobs (as the app runs them) fill every upstream slot; exports are not held up meanwhile
+    with StubOpenAI(tokens=20, token_delay=0.01) as stub:
+        pool = fresh(rate=1000, burst=1000, max_concurrent=8)
+        coach, work = JobExecutor(max_workers=2 * pool.max_concurrent), JobExecutor(max_workers=MAX_WORKERS)
+        jobs = [coach.submit("coach", lambda job, i: "".join(
+            ask_coach(f"coach job {i}", "English", f"key-{i % 4}", base_url=stub.base_url).tokens()), i)
+                for i in range(12)]
+        t0 = time.perf_counter()
+        work.submit("xlsx", lambda job: None).wait(5)
+        export_ms = (time.perf_counter() - t0) * 1000
+        streaming = sum(not j.done for j in jobs)
+        for job in jobs:
+            job.wait(30)
+        print(f"coach executor: upstream max in flight {stub.max_active} of 8; an export meanwhile "
+              f"finished in {export_ms:.1f} ms, with {streaming} coach jobs still streaming")
+        assert stub.max_active == 8 and streaming and all(j.result for j in jobs)
+
+    # Token bucket: 5 back to back, then 20/s; a second key has its own budget
+    with StubOpenAI(tokens=2, token_delay=0.0) as stub:
+        pool = fresh(rate=20, burst=5, max_concurrent=50)
+        ms, _ = fan_out(15, lambda i: f"rate {i}", stub.base_url)
+        floor = (15 - 5) / 20 * 1000
+        other, _ = fan_out(5, lambda i: f"other key {i}", stub.base_url, key="stub-key-2")
+        print(f"token bucket 20/s burst 5: 15 requests in {ms:.0f} ms (floor {floor:.0f} ms); "
+              f"another key's burst of 5 in {other:.0f} ms")
+        assert ms >= floor * 0.9 and other < floor
+
+    # Queue timeout: a request that cannot get a slot in time fails instead of hanging
+    with StubOpenAI(tokens=3, first_token_delay=1.0) as stub:
+        fresh(rate=1000, burst=1000, max_concurrent=1)
+        slow = ask_coach("holds the only slot", "English", "stub-key", base_url=stub.base_url)
+        pool = ai_pool._pool
+        while slow.queued:
+            time.sleep(0.005)
+        t0 = time.perf_counter()
+        try:
+            with pool.lease("stub-key", stub.base_url, timeout=0.2):
+                raise AssertionError("expected PoolBusy")
+        except ai_pool.PoolBusy as e:
+            print(f"queue timeout: {e} after {(time.perf_counter() - t0) * 1000:.0f} ms")
+        list(slow.tokens())
+    ai_pool._pool = None
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+# ===========================
+# Benchmark — cause analytics (Pareto / recurrence / trend) at 100k reports
+# Fills a real store, builds the index, then times filtered queries after a
+# change (only the filters that cover it recompute), memoized queries and the
+# charts; checks the incremental index against a from-scratch rebuild.
+# Run: python benchmarks/bench_analytics.py [--reports 100000]
+# ===========================
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from analytics import AnalyticsIndex, month_label, pareto_png, trend_png
+from report_model import FISHBONE_CATEGORIES, empty_report
+from report_store import ReportStore
+
+QUERY_BUDGET_MS = 200.0
+UPDATE_BUDGET_MS = 10.0
+
+CAUSES = {
+    "People": ["Operator skipped the visual check", "New operator not trained on rework", "Shift handover missing"],
+    "Process/Method": ["Reflow profile too cold", "Work instruction unclear on torque", "Perfil de soldadura incorrecto"],
+    "Machine/Equipment": ["Reflow oven drift", "Worn stencil", "Conveyor speed unstable", "Boquilla del pick and place gastada"],
+    "Material/Components": ["Solder paste expired", "Capacitor lot out of tolerance", "Connector plating thin"],
+    "Environment": ["Humidity above limit in SMT area", "ESD in storage area"],
+    "Measurement/Test": ["AOI threshold too loose", "ICT fixture pins worn", "Calibración vencida del medidor"],
+}
+ROOTS = ["Solder profile not controlled", "Solder profiles not controlled", "Stencil replacement not scheduled",
+         "AOI thresholds set too loose", "Operator training missing for rework", "Supplier lot not inspected",
+         "Humidity control missing in SMT area"]
+
+
+def pct(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))]
+
+
+def make_report(rng, i, customers, products):
+    r = empty_report()
+    month = rng.randrange(36)
+    r["info"].update(customer=rng.choice(customers), product=rng.choice(products),
+                     report_date=f"{2023 + month // 12}-{month % 12 + 1:02d}-{1 + i % 28:02d}")
+    roll = rng.random()
+    if roll < 0.3:
+        r["d5_root"] = rng.choice(ROOTS)
+    elif roll < 0.7:    # a root cause of its own, worded with a per-report code word
+        r["d5_root"] = "Isolated defect " + "".join(chr(97 + i // 26 ** k % 26) for k in range(4))
+    for cat in FISHBONE_CATEGORIES:
+        r["fishbone"][cat] = rng.sample(CAUSES[cat], rng.randint(0, 2)) or [""]
+    return r
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--reports", type=int, default=100_000)
+    args = ap.parse_args()
+    rng = random.Random(20)
+    customers = ["Nissan", "Toyota", "Ford", "GM", "Honda", "VW", "Hyundai", "Mazda"]
+    products = [f"AMP-{i}" for i in range(60)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = ReportStore(os.path.join(tmp, "bench.sqlite3"))
+        batch = []
+        for i in range(args.reports):
+            batch.append((f"r{i:06d}", make_report(rng, i, customers, products)))
+            if len(batch) == 5000:
+                store.save_many(batch)
+                batch = []
+        store.save_many(batch)
+
+        index = AnalyticsIndex(fetch=store.analytics_rows)
+        t0 = time.perf_counter()
+        index.load(*store.analytics_rows(subscribe=index.notify))
+        print(f"initial load of {args.reports}: {(time.perf_counter() - t0) * 1000:.0f} ms (once per process)")
+        months = index.options()["months"]
+
+        def random_filter():
+            lo = rng.randrange(len(months))
+            return (rng.choice([None, rng.choice(customers)]), rng.choice([None, None, rng.choice(products)]),
+                    rng.choice([None, months[lo]]), rng.choice([None, months[rng.randrange(lo, len(months))]]))
+
+        filters = [random_filter() for _ in range(40)] + [(None, None, None, None)]
+        cold, warm, update = [], [], []
+        for f in filters:
+            t0 = time.perf_counter()
+            index.query(*f)
+            cold.append((time.perf_counter() - t0) * 1000)
+            t0 = time.perf_counter()
+            index.query(*f)
+            warm.append((time.perf_counter() - t0) * 1000)
+
+        # A report of one customer changes: filters on other customers keep their results
+        other = [f for f in filters if f[0] not in (None, "Nissan")]
+        kept = {f: index.query(*f) for f in other}
+        uid = next(u for u, c, *_ in store.analytics_rows()[0] if c == "Nissan")
+        t0 = time.perf_counter()
+        store.apply_changes(uid, {("cause", "Machine/Equipment", 0): "Reflow oven drift after maintenance",
+                                  ("d5_root",): "Reflow oven maintenance not verified"})
+        update.append((time.perf_counter() - t0) * 1000)
+        t0 = time.perf_counter()
+        everything = index.query()
+        after_change = (time.perf_counter() - t0) * 1000
+        assert all(index.query(*f) is kept[f] for f in other), "unrelated filters were invalidated"
+        # An edit outside the extract (a D6 answer) invalidates nothing
+        before = index.invalidated
+        store.apply_changes(uid, {("step", "D6", "answer"): "Added oven profiling to PM"})
+        assert index.query() is everything and index.invalidated == before
+
+        for i in range(200):
+            u = f"r{rng.randrange(args.reports):06d}"
+            t0 = time.perf_counter()
+            if i % 50 == 0:
+                store.delete_report(u)
+            else:
+                store.apply_changes(u, {("info", "customer"): rng.choice(customers),
+                                        ("cause", rng.choice(FISHBONE_CATEGORIES), 0): rng.choice(CAUSES["People"])})
+            update.append((time.perf_counter() - t0) * 1000)
+        store.save_many([(f"n{i}", make_report(rng, i, customers, products)) for i in range(100)])
+
+        # Incremental state must equal a from-scratch rebuild
+        fresh = AnalyticsIndex()
+        fresh.load(*store.analytics_rows())
+        for f in filters:
+            got, want = index.query(*f), fresh.query(*f)
+            assert {k: v for k, v in got.items() if k != "themes"} == \
+                   {k: v for k, v in want.items() if k != "themes"}, f"incremental analytics drifted for {f}"
+            assert sorted(n for _, n in got["themes"]) == sorted(n for _, n in want["themes"])
+
+        q = index.query()
+        t0 = time.perf_counter()
+        pareto_png(q["categories"], "Causes by category")
+        pareto_png(q["terms"], "Cause terms")
+        trend_png(q["months"], q["trend"], "Causes per month")
+        render = (time.perf_counter() - t0) * 1000
+        t0 = time.perf_counter()
+        pareto_png(q["categories"], "Causes by category")
+        render_cached = (time.perf_counter() - t0) * 1000
+
+        print(f"query after a change    p50={pct(cold, 50):6.2f} p95={pct(cold, 95):6.2f} ms "
+              f"(all reports: {after_change:.1f} ms)")
+        print(f"query memoized          p50={pct(warm, 50):6.3f} p95={pct(warm, 95):6.3f} ms")
+        print(f"store write + notify    p50={pct(update, 50):6.2f} p95={pct(update, 95):6.2f} ms")
+        print(f"3 charts {render:.0f} ms, cached {render_cached:.2f} ms")
+        print(f"reports {q['reports']}, causes {q['causes']}, recurrence {q['recurrence']:.0%}, "
+              f"months {q['months'][0]}..{q['months'][-1]}, top terms {[t for t, _ in q['terms'][:5]]}")
+        print(f"top theme {q['themes'][0]}, index {index.stats()}")
+        assert month_label(int(index.month[0])) in months
+        assert pct(cold, 95) <= QUERY_BUDGET_MS, "query over budget"
+        assert pct(update, 95) <= UPDATE_BUDGET_MS, "update over budget"
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
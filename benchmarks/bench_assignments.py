@@ -0,0 +1,90 @@
+# ===========================
+# Benchmark — assignments dashboard aggregates at 50k reports x 8 steps
+# Run: python benchmarks/bench_assignments.py [--reports 50000]
+# ===========================
+
+import argparse
+import datetime
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from assignments import AssignmentIndex
+from catalog import T
+from report_model import STEP_IDS, STATUS_CODES, empty_report
+from report_store import ReportStore
+
+SUMMARY_BUDGET_MS = 100.0
+UPDATE_BUDGET_MS = 10.0
+
+
+def pct(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))]
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--reports", type=int, default=50_000)
+    args = ap.parse_args()
+    rng = random.Random(9)
+    owners = [f"owner{i}" for i in range(400)] + [""]
+    today = datetime.date(2026, 6, 1)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = ReportStore(os.path.join(tmp, "bench.sqlite3"))
+        batch = []
+        for i in range(args.reports):
+            r = empty_report()
+            for sid in STEP_IDS:
+                due = today + datetime.timedelta(days=rng.randint(-60, 90)) if rng.random() < 0.8 else None
+                r["steps"][sid] = {"answer": "", "owner": rng.choice(owners), "due": due and due.isoformat(),
+                                   "status": rng.choice(STATUS_CODES)}
+            batch.append((f"a{i:06d}", r))
+            if len(batch) == 5000:
+                store.save_many(batch)
+                batch = []
+        store.save_many(batch)
+
+        index = AssignmentIndex()
+        t0 = time.perf_counter()
+        index.load(store.assignment_rows(subscribe=index.notify))
+        print(f"initial load of {args.reports}x{len(STEP_IDS)}: {(time.perf_counter() - t0) * 1000:.0f} ms (once per process)")
+
+        cold, warm, update = [], [], []
+        for k in range(50):
+            t0 = time.perf_counter()
+            s = index.summary(today)
+            cold.append((time.perf_counter() - t0) * 1000)
+            t0 = time.perf_counter()
+            assert index.summary(today) is s
+            warm.append((time.perf_counter() - t0) * 1000)
+            # One assignment changes (EN or ES status label, as a session would hold it)
+            uid = f"a{rng.randrange(args.reports):06d}"
+            label = rng.choice(T[rng.choice(["en", "es"])]["status_opts"])
+            t0 = time.perf_counter()
+            store.apply_changes(uid, {("step", rng.choice(STEP_IDS), "status"): label,
+                                      ("step", "D1", "owner"): rng.choice(owners)})
+            update.append((time.perf_counter() - t0) * 1000)
+
+        # Incremental state must equal a from-scratch rebuild
+        fresh = AssignmentIndex()
+        fresh.load(store.assignment_rows())
+        assert fresh.summary(today) == index.summary(today), "incremental aggregates drifted"
+
+        print(f"summary after a change  p50={pct(cold, 50):6.2f} p95={pct(cold, 95):6.2f} ms")
+        print(f"summary memoized        p50={pct(warm, 50):6.3f} p95={pct(warm, 95):6.3f} ms")
+        print(f"store write + notify    p50={pct(update, 50):6.2f} p95={pct(update, 95):6.2f} ms")
+        b = index.summary(today)["buckets"]
+        print("buckets:", b)
+        assert pct(cold, 95) <= SUMMARY_BUDGET_MS, "summary over budget"
+        assert pct(update, 95) <= UPDATE_BUDGET_MS, "update over budget"
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+# ===========================
+# Benchmark — cause classifier batch latency and offline training
+# Run: python benchmarks/bench_cause_classifier.py
+# ===========================
+
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from cause_classifier import CauseClassifier, train
+from report_model import empty_report
+from report_store import ReportStore
+
+BATCH_BUDGET_MS = 1.0    # one rerun: ~10 Whys + ~10 D3 sentences
+
+LABELED = {
+    "People": ["Operator skipped the torque check on night shift", "Operario nuevo sin capacitación",
+               "Technician misread the work instruction", "Fatigue at end of shift"],
+    "Process/Method": ["Reflow profile changed without validation", "Secuencia de ensamble incorrecta",
+                       "SOP does not define cure time", "Rework procedure not standardized"],
+    "Machine/Equipment": ["Nozzle wear on the placement machine", "Falla del alimentador",
+                          "Fixture clamp worn out", "Oven zone 3 heater drifting"],
+    "Material/Components": ["Supplier changed the resin grade", "Lote de capacitores defectuoso",
+                            "Connector plating too thin", "Incoming PCB warped"],
+    "Environment": ["Humidity above 70% in storage", "Polvo en el área de ensamble",
+                    "ESD wrist straps not grounded", "Summer heat in the warehouse"],
+    "Measurement/Test": ["AOI limits too loose", "La prueba ICT no cubre el conector",
+                         "Gage R&R not done on the tester", "Sampling plan too small to detect escapes"],
+}
+
+
+def main():
+    seed = CauseClassifier.seed()
+    rng = random.Random(5)
+    texts = [t for ts in LABELED.values() for t in ts]
+    batch = rng.sample(texts, 20) if len(texts) >= 20 else texts
+    seed.classify(batch)
+    times = []
+    for _ in range(500):
+        t0 = time.perf_counter()
+        seed.classify(batch)
+        times.append((time.perf_counter() - t0) * 1000)
+    times.sort()
+    p50, p95 = times[len(times) // 2], times[int(len(times) * 0.95)]
+    print(f"classify {len(batch)} texts: p50={p50:.3f} p95={p95:.3f} ms ({len(seed.vocab)} terms)")
+
+    def accuracy(model):
+        hits = sum(model.classify([t])[0] == cat for cat, ts in LABELED.items() for t in ts)
+        return hits / len(texts)
+
+    # Offline training from fishbone causes stored in reports (no network)
+    with tempfile.TemporaryDirectory() as tmp:
+        store = ReportStore(os.path.join(tmp, "train.sqlite3"))
+        for i in range(300):
+            r = empty_report()
+            for cat, ts in LABELED.items():
+                r["fishbone"][cat] = [rng.choice(ts) + f" lot {i}"]
+            store.save_report(f"t{i}", r)
+        t0 = time.perf_counter()
+        trained = train(store.labeled_causes())
+        print(f"train on {len(store.labeled_causes())} stored causes: {(time.perf_counter() - t0) * 1000:.1f} ms, "
+              f"{len(trained.vocab)} terms")
+        path = os.path.join(tmp, "model.npz")
+        trained.save(path)
+        reloaded = CauseClassifier.load(path)
+        assert reloaded.classify(texts) == trained.classify(texts)
+        store.close()
+
+    print(f"accuracy on labeled set: seed {accuracy(seed):.0%}, trained {accuracy(trained):.0%}")
+    assert p95 <= BATCH_BUDGET_MS, "batch classify over budget"
+
+
+if __name__ == "__main__":
+    main()
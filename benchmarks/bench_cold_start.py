@@ -0,0 +1,94 @@
+# ===========================
+# Benchmark — cold start, first paint and per-session memory
+# Each measurement runs in a fresh interpreter so import costs are real; the
+# times are the median of RUNS such interpreters (one run swings by +-100 ms).
+# Session memory leaves out what AppTest holds per instance and a server does
+# not: the script bytecode (a server keeps one ScriptCache for all sessions),
+# the parsed element tree (a server sends the deltas on) and its mock Runtime.
+# Run: python benchmarks/bench_cold_start.py
+# ===========================
+
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+APP = os.path.join(ROOT, "app.advanced.py")
+
+# Budgets (first paint excludes interpreter + streamlit import, but not AppTest's ~160 ms scan of
+# installed components on its first run). Medians at the commit that set them, on the reference box:
+# first paint 270-430 ms, session 261 KB (+101 KB of the AppTest copies left out above)
+FIRST_PAINT_BUDGET_MS = 550.0
+SESSION_MEM_BUDGET_KB = 411.0   # 512 KB as first set, less those 101 KB
+LAZY_MODULES = ("openai", "matplotlib", "openpyxl")
+HARNESS_FILES = ("*/streamlit/testing/*", "*/streamlit/runtime/scriptrunner/script_cache.py", "*/unittest/mock.py")
+RUNS = 5
+
+
+def _child():
+    import tracemalloc
+
+    t0 = time.perf_counter()
+    from streamlit.testing.v1 import AppTest
+    t_import = time.perf_counter() - t0
+
+    at = AppTest.from_file(APP, default_timeout=60)
+    at.secrets["OPENAI_API_KEY"] = ""
+    t0 = time.perf_counter()
+    at.run()
+    first_paint = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    at.run()
+    warm_rerun = time.perf_counter() - t0
+
+    # Per-session memory: allocations retained by one more session after its first run
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    at2 = AppTest.from_file(APP, default_timeout=60)
+    at2.secrets["OPENAI_API_KEY"] = ""
+    at2.run()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    harness = [tracemalloc.Filter(False, pattern) for pattern in HARNESS_FILES]
+    session_bytes = sum(d.size_diff for d in after.filter_traces(harness).compare_to(before.filter_traces(harness),
+                                                                                      "filename"))
+
+    print(json.dumps({
+        "streamlit_import_ms": t_import * 1000,
+        "first_paint_ms": first_paint * 1000,
+        "warm_rerun_ms": warm_rerun * 1000,
+        "session_kb": session_bytes / 1024,
+        "loaded": [m for m in LAZY_MODULES if m in sys.modules],
+        "exception": [str(e.value) for e in at.exception],
+    }))
+
+
+def main():
+    runs = []
+    for _ in range(RUNS):
+        # An empty store each time: saved reports listed in the sidebar would count as session memory
+        env = dict(os.environ, NPQP_DB_PATH=os.path.join(tempfile.mkdtemp(), "npqp_8d.sqlite3"))
+        out = subprocess.check_output([sys.executable, __file__, "--child"], cwd=ROOT, env=env,
+                                      stderr=subprocess.DEVNULL)
+        runs.append(json.loads(out.decode().strip().splitlines()[-1]))
+    res = {k: statistics.median(r[k] for r in runs) if isinstance(v, float) else v for k, v in runs[0].items()}
+    res["exception"] = [e for r in runs for e in r["exception"]]
+    res["loaded"] = sorted({m for r in runs for m in r["loaded"]})
+    for k, v in res.items():
+        print(f"{k:>20}: {v:.1f}" if isinstance(v, float) else f"{k:>20}: {v}")
+    assert not res["exception"], res["exception"]
+    assert not res["loaded"], f"heavy modules imported at cold start: {res['loaded']}"
+    assert res["first_paint_ms"] <= FIRST_PAINT_BUDGET_MS, "first paint over budget"
+    assert res["session_kb"] <= SESSION_MEM_BUDGET_KB, "per-session memory over budget"
+
+
+if __name__ == "__main__":
+    if "--child" in sys.argv:
+        _child()
+    else:
+        main()
@@ -0,0 +1,38 @@
+# ===========================
+# Benchmark — Ishikawa layout + SVG emit latency
+# Run: python benchmarks/bench_fishbone_layout.py
+# ===========================
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from ishikawa import CATEGORIES, layout_ishikawa, layout_to_svg
+
+LATENCY_BUDGET_MS = 50.0  # 6 x 100 causes, layout + SVG
+
+
+def make_fishbone(n_per_cat):
+    return {k: [f"{k} cause {i}: fixture wear on station {i % 11} after PM" for i in range(n_per_cat)]
+            for k in CATEGORIES}
+
+
+def measure(n_per_cat, repeat=5):
+    fb = make_fishbone(n_per_cat)
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        layout_to_svg(layout_ishikawa(fb, CATEGORIES, "Intermittent static in amplifier output"))
+        best = min(best, time.perf_counter() - t0)
+    return best * 1000
+
+
+if __name__ == "__main__":
+    print(f"{'causes/cat':>10} {'total':>6} {'ms':>8}")
+    for n in (6, 20, 50, 100):
+        ms = measure(n)
+        print(f"{n:>10} {n * 6:>6} {ms:>8.2f}")
+    assert "matplotlib" not in sys.modules, "SVG path imported matplotlib"
+    assert ms <= LATENCY_BUDGET_MS, f"layout latency {ms:.1f} ms over budget {LATENCY_BUDGET_MS} ms"
@@ -0,0 +1,93 @@
+# ===========================
+# Benchmark — background job executor
+# Submit latency vs. the work it offloads, dedup of identical jobs,
+# back-pressure on a full queue and cancellation of queued/running jobs.
+# Run: python benchmarks/bench_jobs.py
+# ===========================
+
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from jobs import JobExecutor, JobQueueFull, DONE, CANCELLED
+from xlsx_export import build_8d_workbook
+from catalog import T
+
+SUBMIT_BUDGET_MS = 1.0
+
+
+def export(job, rows):
+    job.report(0.5, "XLSX")
+    return build_8d_workbook(rows, "2025-01-01", "QE", "AMP", "Nissan")
+
+
+def main():
+    rows = [(title, "answer " * 200, "", "owner", None, "Done") for title, _, _ in T["en"]["npqp_steps"]]
+    ex = JobExecutor(max_workers=2, max_queue=4)
+
+    # Script-thread cost of Save: submit only, the build runs on a worker
+    t0 = time.perf_counter()
+    job = ex.submit("xlsx", export, rows, key="xlsx-1")
+    submit_ms = (time.perf_counter() - t0) * 1000
+    job.wait(10)
+    run_ms = (job.finished - job.started) * 1000
+    assert job.state == DONE and job.result[:2] == b"PK"
+    print(f"export: submit {submit_ms:.3f} ms on the script thread, {run_ms:.1f} ms on a worker")
+
+    # Dedup: 20 sessions asking for the same export share one job
+    gate = threading.Event()
+    runs = []
+
+    def slow(job, n):
+        runs.append(n)
+        gate.wait(5)
+        return n
+
+    handles = [ex.submit("xlsx", slow, 1, key="same") for _ in range(20)]
+    assert len({h.id for h in handles}) == 1 and handles[0].holders == 20
+    gate.set()
+    handles[0].wait(5)
+    print(f"dedup: 20 submits -> {len(runs)} run, stats {ex.stats()['deduped']} deduped")
+
+    # Back-pressure: 2 running + 4 queued, the 7th is refused
+    gate.clear()
+    accepted, rejected = [], 0
+    for i in range(10):
+        try:
+            accepted.append(ex.submit("render", slow, i, key=f"bp-{i}"))
+        except JobQueueFull:
+            rejected += 1
+        time.sleep(0.01)
+    print(f"back-pressure: {len(accepted)} accepted, {rejected} rejected")
+    assert rejected and len(accepted) == 2 + 4
+
+    # Cancellation: a queued job is dropped at once, a running one at its next checkpoint
+    queued = accepted[-1]
+    ex.release(queued.id)
+    assert queued.state == CANCELLED
+    gate.set()
+    for j in accepted:
+        j.wait(5)
+
+    def ticking(job):
+        for i in range(1000):
+            job.report(i / 1000)
+            time.sleep(0.005)
+
+    running = ex.submit("coach", ticking)
+    time.sleep(0.05)
+    t0 = time.perf_counter()
+    ex.release(running.id)
+    running.wait(5)
+    print(f"cancel: queued job cancelled immediately, running job stopped in "
+          f"{(time.perf_counter() - t0) * 1000:.1f} ms at {running.progress:.0%}")
+    assert running.state == CANCELLED
+    print("stats:", ex.stats())
+    assert submit_ms <= SUBMIT_BUDGET_MS, "submit must not block the script thread"
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+# ===========================
+# Benchmark — instrumentation overhead
+# Cost of a span disabled vs. enabled, of counters, of a scrape, and of the
+# sampling profiler on a CPU-bound "rerun".
+# Run: python benchmarks/bench_metrics.py
+# ===========================
+
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from metrics import Metrics
+
+N = 200_000
+SPAN_BUDGET_NS = 1_000     # disabled span: must be negligible next to a ~50 ms rerun
+
+
+def per_call_ns(fn, n=N):
+    t0 = time.perf_counter()
+    for _ in range(n):
+        fn()
+    return (time.perf_counter() - t0) / n * 1e9
+
+
+def work():
+    return sum(i * i for i in range(300_000))
+
+
+def main():
+    off, on = Metrics(enabled=False), Metrics(enabled=True)
+
+    def span_off():
+        with off.span("tabs"):
+            pass
+
+    def span_on():
+        with on.span("tabs"):
+            pass
+
+    base = per_call_ns(lambda: None)
+    disabled = per_call_ns(span_off) - base
+    enabled = per_call_ns(span_on) - base
+    counter = per_call_ns(lambda: on.inc("npqp_reruns_total", scope="full")) - base
+    print(f"span disabled: {disabled:7.0f} ns   enabled: {enabled:7.0f} ns   counter: {counter:7.0f} ns")
+
+    for section in ("report_info", "ai_helper", "tabs", "fishbone_editor", "save"):
+        for _ in range(1000):
+            on.observe_section(section, 0.01)
+    t0 = time.perf_counter()
+    text = on.exposition()
+    print(f"scrape: {(time.perf_counter() - t0) * 1000:.2f} ms, {len(text.splitlines())} lines")
+
+    with tempfile.TemporaryDirectory() as d:
+        plain = min(_timed(work) for _ in range(5))
+        prof = Metrics(enabled=True, profile_slow_ms=1)
+        prof.profiler.out_dir = d
+
+        def profiled():
+            with prof.rerun("full"):
+                work()
+        sampled = min(_timed(profiled) for _ in range(5))
+        print(f"rerun {plain:.1f} ms, with sampling profiler {sampled:.1f} ms "
+              f"({(sampled / plain - 1) * 100:+.1f}%), {len(os.listdir(d))} flamegraph dumps")
+
+    if disabled > SPAN_BUDGET_NS:
+        print(f"FAIL: disabled span {disabled:.0f} ns > {SPAN_BUDGET_NS} ns")
+        return 1
+    return 0
+
+
+def _timed(fn):
+    t0 = time.perf_counter()
+    fn()
+    return (time.perf_counter() - t0) * 1000
+
+
+if __name__ == "__main__":
+    sys.exit(main())
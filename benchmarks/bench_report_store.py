@@ -0,0 +1,115 @@
+# ===========================
+# Benchmark — report store load/list latency at 100k reports
+# Run: python benchmarks/bench_report_store.py [--reports 100000] [--db path]
+# ===========================
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from report_model import STEP_IDS, STATUS_CODES, empty_report
+from report_store import ReportStore, Autosaver
+
+LOAD_BUDGET_MS = 2.0
+LIST_BUDGET_MS = 10.0
+
+CUSTOMERS = [f"Customer {i}" for i in range(200)]
+PRODUCTS = [f"AMP-{i:03d}" for i in range(500)]
+OWNERS = [f"owner{i}" for i in range(300)]
+
+
+def make_report(rng, i):
+    r = empty_report()
+    r["info"] = {"report_date": f"2025-{1 + i % 12:02d}-{1 + i % 28:02d}", "prepared_by": rng.choice(OWNERS),
+                 "product": rng.choice(PRODUCTS), "customer": rng.choice(CUSTOMERS)}
+    for sid in STEP_IDS:
+        r["steps"][sid] = {"answer": f"{sid} answer for report {i}", "owner": rng.choice(OWNERS),
+                           "due": f"2025-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+                           "status": rng.choice(STATUS_CODES)}
+    r["whys"] = {"occ": [f"occ why {k}" for k in range(5)], "det": [f"det why {k}" for k in range(5)]}
+    r["fishbone"] = {c: [f"{c} cause {k}" for k in range(3)] for c in r["fishbone"]}
+    r["d5_root"] = f"root cause {i}"
+    return r
+
+
+def pct(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))]
+
+
+def timed(fn, n=200):
+    out = []
+    for _ in range(n):
+        t0 = time.perf_counter()
+        fn()
+        out.append((time.perf_counter() - t0) * 1000)
+    return out
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--reports", type=int, default=100_000)
+    ap.add_argument("--db")
+    args = ap.parse_args()
+    tmp = tempfile.TemporaryDirectory()
+    path = args.db or os.path.join(tmp.name, "bench.sqlite3")
+    store = ReportStore(path)
+    rng = random.Random(7)
+
+    have = store.count()
+    if have < args.reports:
+        t0 = time.perf_counter()
+        batch = []
+        for i in range(have, args.reports):
+            batch.append((f"r{i:07d}", make_report(rng, i)))
+            if len(batch) == 5000:
+                store.save_many(batch)
+                batch = []
+        if batch:
+            store.save_many(batch)
+        print(f"populated {args.reports - have} reports in {time.perf_counter() - t0:.1f}s")
+
+    uids = [f"r{rng.randrange(args.reports):07d}" for _ in range(200)]
+    it = iter(uids)
+    results = {
+        "load_report": timed(lambda: store.load_report(next(it))),
+        "list customer": timed(lambda: store.list_reports(customer=rng.choice(CUSTOMERS))),
+        "list product": timed(lambda: store.list_reports(product=rng.choice(PRODUCTS))),
+        "list status": timed(lambda: store.list_reports(status=rng.choice(STATUS_CODES))),
+        "list owner": timed(lambda: store.list_reports(owner=rng.choice(OWNERS))),
+        "list due<=": timed(lambda: store.list_reports(due_before="2025-01-15")),
+        "list cust+status": timed(lambda: store.list_reports(customer=rng.choice(CUSTOMERS), status="in_progress")),
+    }
+
+    # Autosave: 100 single-field edits coalesce into one batched write
+    uid = uids[0]
+    report = store.load_report(uid)
+    saver = Autosaver(store, uid, report, delay=60)
+    t0 = time.perf_counter()
+    for k in range(100):
+        report["steps"]["D1"]["answer"] = f"edit {k}"
+        saver.sync(report)
+    sync_ms = (time.perf_counter() - t0) * 1000 / 100
+    t0 = time.perf_counter()
+    saver.flush()
+    flush_ms = (time.perf_counter() - t0) * 1000
+    assert saver.flushes == 1 and store.load_report(uid)["steps"]["D1"]["answer"] == "edit 99"
+
+    for name, vals in results.items():
+        print(f"{name:<18} p50={pct(vals, 50):7.3f} p95={pct(vals, 95):7.3f} p99={pct(vals, 99):7.3f} ms")
+    print(f"{'autosave sync':<18} {sync_ms:7.3f} ms/edit, flush {flush_ms:.3f} ms for 100 edits")
+    assert pct(results["load_report"], 95) <= LOAD_BUDGET_MS, "load over budget"
+    for name, vals in results.items():
+        if name.startswith("list"):
+            assert pct(vals, 95) <= LIST_BUDGET_MS, f"{name} over budget"
+    store.close()
+    tmp.cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+# ===========================
+# Benchmark — rerun latency vs. number of Whys / fishbone causes
+# Compares the baseline full-page rerun with fragment-scoped reruns.
+# Run: python benchmarks/bench_reruns.py [--baseline path/to/old_app.py]
+# ===========================
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+
+from apptest_harness import APP, ROOT, FRAG_D1, FRAG_D5, FRAG_FISHBONE, first_why_key, new_app, timed_run
+
+BASELINE_REV = "c72d743"  # last commit before fragments
+
+
+def _time(at, edit, fragment=None, repeat=3):
+    best = float("inf")
+    for k in range(repeat):
+        best = min(best, timed_run(at, lambda at: edit(at, k), fragment))
+        at.run()  # full rerun so every widget is back in the element tree
+    return best
+
+
+EDITS = {
+    "D1 answer": (lambda at, k: at.text_area(key="ans_0").input(f"edit {k}"), FRAG_D1),
+    "D5 why": (lambda at, k: at.text_input(key=first_why_key(at)).input(f"edit {k}"), FRAG_D5),
+    "fishbone cause": (lambda at, k: at.text_input(key="fb_People_0").input(f"edit {k}"), FRAG_FISHBONE),
+}
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--baseline", help="app file to use as 'before' (default: git show %s)" % BASELINE_REV)
+    ap.add_argument("--sizes", default="5,50,200,500")
+    args = ap.parse_args()
+
+    baseline = args.baseline
+    tmp = None
+    if not baseline:
+        tmp = tempfile.TemporaryDirectory()
+        baseline = os.path.join(tmp.name, "app_baseline.py")
+        with open(baseline, "wb") as f:
+            f.write(subprocess.check_output(["git", "-C", ROOT, "show", f"{BASELINE_REV}:app.advanced.py"]))
+
+    print(f"{'n':>5} {'interaction':<16} {'before ms':>10} {'after ms':>10}")
+    for n in (int(x) for x in args.sizes.split(",")):
+        before_app, after_app = new_app(baseline, n), new_app(APP, n)
+        for name, (edit, frag) in EDITS.items():
+            before = _time(before_app, edit)
+            after = _time(after_app, edit, fragment=frag)
+            print(f"{n:>5} {name:<16} {before:>10.1f} {after:>10.1f}")
+    if tmp:
+        tmp.cleanup()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,142 @@
+# ===========================
+# Benchmark — session memory governor with hundreds of idle tabs
+# N sessions each hold a filled-in report state; a few stay active while the
+# rest go idle. Polls spill the idle / least recently used ones to disk until
+# the resident total fits the budget; every restored state must equal what
+# was spilled. Reports RAM actually held per session (tracemalloc) against
+# the governor's pickled-size estimate, and spill / restore / poll costs.
+# Run: python benchmarks/bench_session_governor.py [--sessions 500] [--budget-mb 6]
+# ===========================
+
+import argparse
+import os
+import pickle
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from catalog import T
+from report_model import FISHBONE_CATEGORIES, STEP_IDS, empty_report, session_model
+from session_governor import SPILLED, SessionGovernor, footprint
+
+POLL_BUDGET_US = 50.0
+RESTORE_BUDGET_MS = 5.0
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_state(rng, i):
+    """One session's report state, as the app spills it: the model and folded Whys."""
+    r = empty_report()
+    r["info"].update(customer="Nissan", product=f"AMP-{i % 40}", report_date="2026-03-02")
+    for sid in STEP_IDS:
+        r["steps"][sid]["answer"] = f"{sid}: " + " ".join(f"word{rng.randrange(500)}" for _ in range(rng.randint(20, 120)))
+        r["steps"][sid]["owner"] = f"owner{rng.randrange(50)}"
+        r["steps"][sid]["due"] = "2026-04-01"
+    n = rng.randint(5, 40)
+    r["whys"] = {"occ": [f"Why occ {k} " * 3 for k in range(n)], "det": [f"Why det {k} " * 3 for k in range(n)]}
+    r["why_parents"] = {k: list(range(-1, n - 1)) for k in ("occ", "det")}
+    r["fishbone"] = {c: [f"{c} cause {k}" for k in range(rng.randint(1, 8))] for c in FISHBONE_CATEGORIES}
+    state = session_model(r, T["en" if i % 2 else "es"])
+    state["why_collapsed_occ"], state["why_collapsed_det"] = {2}, set()
+    return state
+
+
+def same(a, b):
+    return pickle.dumps(a, pickle.HIGHEST_PROTOCOL) == pickle.dumps(b, pickle.HIGHEST_PROTOCOL)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sessions", type=int, default=500)
+    ap.add_argument("--budget-mb", type=float, default=6.0)
+    ap.add_argument("--active", type=int, default=20)
+    args = ap.parse_args()
+    rng = random.Random(21)
+    clock = Clock()
+
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    states = {f"s{i:04d}": make_state(rng, i) for i in range(args.sessions)}
+    held = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        gov = SessionGovernor(budget_bytes=args.budget_mb * 2 ** 20, idle=900.0, min_resident=60.0,
+                              spill_dir=tmp, clock=clock)
+        t0 = time.perf_counter()
+        for sid, state in states.items():
+            clock.now += 0.5
+            gov.activity(sid, footprint(state))
+        track_us = (time.perf_counter() - t0) / len(states) * 1e6
+        s = gov.stats()
+        print(f"{args.sessions} sessions: RAM held {held / 2 ** 20:.1f} MiB (tracemalloc), "
+              f"estimated {s['resident_bytes'] / 2 ** 20:.1f} MiB; footprint + activity {track_us:.0f} µs/run")
+
+        # A few minutes later: the last `active` sessions keep working, every tab polls
+        clock.now += 120.0
+        active = list(states)[-args.active:]
+        for sid in active:
+            gov.activity(sid, footprint(states[sid]))
+        spilled, poll_ns, spill_ms = {}, [], []
+        for _ in range(2):      # two poll rounds: the first one spills, the second finds them spilled
+            for sid, state in states.items():
+                t0 = time.perf_counter_ns()
+                reason = gov.check(sid)
+                poll_ns.append(time.perf_counter_ns() - t0)
+                if reason and reason != SPILLED:
+                    t0 = time.perf_counter()
+                    gov.spill(sid, state, reason)
+                    spill_ms.append((time.perf_counter() - t0) * 1000)
+                    spilled[sid] = state
+        s = gov.stats()
+        print(f"over budget ({args.budget_mb:g} MiB): resident {s['resident']} ({s['resident_bytes'] / 2 ** 20:.2f} MiB), "
+              f"spilled {s['spilled']} ({s['spilled_bytes'] / 2 ** 20:.2f} MiB on disk), "
+              f"budget spills {s['spills_budget']}")
+        assert s["resident_bytes"] <= gov.budget, "resident state over budget"
+        assert not set(active) & set(spilled), "an active session was spilled"
+
+        # An hour later every idle tab is on disk (tabs keep polling meanwhile)
+        for _ in range(12):
+            clock.now += 300.0
+            for sid in active:
+                gov.activity(sid, footprint(states[sid]))
+            for sid, state in states.items():
+                reason = gov.check(sid)
+                if reason and reason != SPILLED:
+                    gov.spill(sid, state, reason)
+                    spilled[sid] = state
+        s = gov.stats()
+        print(f"after an hour idle: resident {s['resident']}, spilled {s['spilled']}, idle spills {s['spills_idle']}")
+        assert s["resident"] == args.active
+
+        # Users come back: state must round-trip exactly
+        restore_ms = []
+        for sid in rng.sample(sorted(spilled), 100):
+            t0 = time.perf_counter()
+            state = gov.restore(sid)
+            restore_ms.append((time.perf_counter() - t0) * 1000)
+            assert same(state, spilled[sid]), f"{sid} restored differently"
+            gov.activity(sid, footprint(state))
+        s = gov.stats()
+        ratio = held / sum(len(pickle.dumps(v, pickle.HIGHEST_PROTOCOL)) for v in states.values())
+        print(f"spill {sorted(spill_ms)[len(spill_ms) // 2]:.2f} ms, restore p50 "
+              f"{sorted(restore_ms)[50]:.2f} max {max(restore_ms):.2f} ms, poll p50 {sorted(poll_ns)[len(poll_ns) // 2] / 1000:.1f} µs; "
+              f"disk {s['spilled_bytes'] / max(1, s['spilled']) / 1024:.1f} KB/session; "
+              f"RAM/pickled size {ratio:.1f}x")
+        assert sorted(poll_ns)[len(poll_ns) // 2] / 1000 <= POLL_BUDGET_US, "poll over budget"
+        assert max(restore_ms) <= RESTORE_BUDGET_MS, "restore over budget"
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+# ===========================
+# Benchmark — shared documents (co-editing)
+# Commit / poll / pull cost, and the live document's size as the number of
+# sessions editing it grows (must not grow with them). Then two headless app
+# sessions: an edit in one reaches the other on its next poll.
+# Run: python benchmarks/bench_shared_doc.py
+# ===========================
+
+import logging
+import os
+import pickle
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+os.environ.setdefault("NPQP_DB_PATH", os.path.join(tempfile.mkdtemp(prefix="npqp-bench-"), "bench.sqlite3"))
+
+from report_model import STEP_IDS
+from report_store import ReportStore
+from shared_doc import DocumentHub
+
+logging.getLogger("streamlit.runtime.scriptrunner_utils.script_run_context").addFilter(
+    lambda record: "missing ScriptRunContext" not in record.getMessage())
+
+EDITS = 2_000
+GROWTH_BUDGET = 0.10    # document size may grow at most this much from 1 to 100 sessions
+
+
+def make_report(i):
+    from bench_snapshot import make_report as full
+    r = full(20)
+    r["info"]["product"] = f"AMP-{i}"
+    return r
+
+
+def doc_kb(doc):
+    """Serialized size of everything the document keeps."""
+    return len(pickle.dumps((doc.fields, doc.versions, doc.authors, list(doc._log)))) / 1024
+
+
+def run(sessions, seed=7):
+    """`sessions` editors make EDITS edits round-robin, each polling before it edits."""
+    store = ReportStore(":memory:")
+    uid = store.create_report(make_report(sessions))
+    hub = DocumentHub(store)
+    editors = [hub.open(uid) for _ in range(sessions)]
+    rng = random.Random(seed)
+    commit_s = pull_s = 0.0
+    pulled = 0
+    for k in range(EDITS):
+        ed = editors[k % sessions]
+        t0 = time.perf_counter()
+        pulled += len(ed.pull())
+        t1 = time.perf_counter()
+        report = ed.report
+        report["steps"][rng.choice(STEP_IDS)]["answer"] = f"edit {k}"
+        t2 = time.perf_counter()
+        ed.push(report)
+        commit_s += time.perf_counter() - t2
+        pull_s += t1 - t0
+    idle = editors[0]
+    idle.pull()
+    t0 = time.perf_counter()
+    for _ in range(100_000):
+        idle.behind
+    poll_ns = (time.perf_counter() - t0) / 100_000 * 1e9
+    doc = editors[0].doc
+    doc.autosaver.flush()
+    return {"commit_us": commit_s / EDITS * 1e6, "pull_us": pull_s / EDITS * 1e6,
+            "pulled": pulled / EDITS, "poll_ns": poll_ns, "doc_kb": doc_kb(doc),
+            "flushes": doc.autosaver.flushes}
+
+
+def propagation():
+    """Two app sessions on one report: ms for B's poll to pick up A's edit, and which fragments reran."""
+    from apptest_harness import APP, new_app, timed_run
+    from streamlit.testing.v1 import AppTest
+
+    a = new_app()
+    a.text_area(key="ans_0").input("Customer reports no audio").run()
+    b = AppTest.from_file(APP, default_timeout=60)
+    b.secrets["OPENAI_API_KEY"] = ""
+    b.query_params["report"] = a.session_state.report_uid
+    b.run()
+    poll = len(a._fragment_storage._fragments) - 1     # the co-editing poll is registered last
+    idle = min(timed_run(b, lambda at: None, poll) for _ in range(3))
+    a.text_area(key="ans_3").input("Containment: quarantine lot 42").run()
+    t0 = time.perf_counter()
+    timed_run(b, lambda at: None, poll)
+    ms = (time.perf_counter() - t0) * 1000
+    d4 = next(v for t, v in b.session_state.answers.items() if t.startswith("D4"))
+    assert d4 == "Containment: quarantine lot 42", d4
+    redrawn = sorted({e.key for e in b.text_area if e.key})
+    return idle, ms, redrawn
+
+
+def main():
+    print(f"{'sessions':>8} {'commit µs':>10} {'pull µs':>8} {'fields/pull':>12} {'poll ns':>8} "
+          f"{'doc KB':>7} {'flushes':>8}")
+    sizes = {}
+    for sessions in (1, 10, 100):
+        r = run(sessions)
+        sizes[sessions] = r["doc_kb"]
+        print(f"{sessions:>8} {r['commit_us']:>10.1f} {r['pull_us']:>8.1f} {r['pulled']:>12.2f} "
+              f"{r['poll_ns']:>8.0f} {r['doc_kb']:>7.1f} {r['flushes']:>8}")
+
+    idle, ms, redrawn = propagation()
+    print(f"\napp: idle poll {idle:.0f} ms (AppTest recompiles the script each run); "
+          f"poll applying an edit {ms:.0f} ms, redrawn text areas {redrawn}")
+
+    if sizes[100] > sizes[1] * (1 + GROWTH_BUDGET):
+        print(f"FAIL: document grew from {sizes[1]:.1f} KB to {sizes[100]:.1f} KB with 100 sessions")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
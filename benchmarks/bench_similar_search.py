@@ -0,0 +1,117 @@
+# ===========================
+# Benchmark — "similar past 8Ds" full-text search latency
+# Run: python benchmarks/bench_similar_search.py [--reports 300000] [--db path]
+# ===========================
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from report_model import STEP_IDS, empty_report
+from report_store import ReportStore
+
+QUERY_BUDGET_MS = 50.0
+REINDEX_BUDGET_MS = 5.0
+
+# Shop-floor vocabulary, EN + ES, with a long tail of part numbers so term
+# frequencies look like a real archive (few very common words, many rare ones)
+WORDS = ("static noise hum crackle rattle distortion intermittent dead channel amplifier speaker radio "
+         "solder joint cold crack connector pin seating harness ground loop shield esd capacitor resistor "
+         "firmware update calibration fixture torque screw gasket humidity vibration thermal drift supplier "
+         "lot shift operator training inspection aoi ict test limit sampling gage pfmea control plan sop "
+         "ruido estatico zumbido soldadura fria conector tierra blindaje humedad vibracion proveedor turno "
+         "operador inspeccion prueba limite muestreo calibracion tornillo").split()
+PARTS = [f"{p}{n}" for p in ("J", "U", "C", "R", "Q") for n in range(1, 400)]
+
+
+def sentence(rng, n):
+    return " ".join(rng.choice(PARTS) if rng.random() < 0.15 else rng.choice(WORDS) for _ in range(n))
+
+
+def make_report(rng):
+    r = empty_report()
+    r["info"]["customer"] = f"Customer {rng.randrange(200)}"
+    for sid in STEP_IDS:
+        r["steps"][sid]["status"] = "done"
+    r["steps"]["D1"]["answer"] = sentence(rng, 25)
+    r["steps"]["D6"]["answer"] = sentence(rng, 20)
+    r["steps"]["D8"]["answer"] = sentence(rng, 15)
+    r["d5_root"] = sentence(rng, 10)
+    return r
+
+
+def pct(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))]
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--reports", type=int, default=300_000)
+    ap.add_argument("--db")
+    args = ap.parse_args()
+    tmp = tempfile.TemporaryDirectory()
+    store = ReportStore(args.db or os.path.join(tmp.name, "bench.sqlite3"))
+    rng = random.Random(11)
+
+    have = store.count()
+    if have < args.reports:
+        t0 = time.perf_counter()
+        batch = []
+        for i in range(have, args.reports):
+            batch.append((f"s{i:07d}", make_report(rng)))
+            if len(batch) == 5000:
+                store.save_many(batch)
+                batch = []
+        if batch:
+            store.save_many(batch)
+        print(f"populated {args.reports - have} reports in {time.perf_counter() - t0:.1f}s")
+
+    queries = {
+        "short (2 words)": lambda: sentence(rng, 2),
+        "typed D1 (25 words)": lambda: sentence(rng, 25),
+        "common words only": lambda: " ".join(rng.sample(WORDS[:12], 6)),
+        "part number": lambda: f"failure near {rng.choice(PARTS)}",
+    }
+    # Cold: the first query of each kind also pays for the document-count cache
+    for name, make in queries.items():
+        t0 = time.perf_counter()
+        store.similar_reports(make(), limit=5)
+        print(f"{name:<20} cold {(time.perf_counter() - t0) * 1000:6.2f} ms")
+    worst = 0.0
+    for name, make in queries.items():
+        times, hits = [], 0
+        for _ in range(200):
+            text = make()
+            t0 = time.perf_counter()
+            found = store.similar_reports(text, limit=5)
+            times.append((time.perf_counter() - t0) * 1000)
+            hits += bool(found)
+        worst = max(worst, pct(times, 95))
+        print(f"{name:<20} p50={pct(times, 50):6.2f} p95={pct(times, 95):6.2f} p99={pct(times, 99):6.2f} ms"
+              f"  ({hits}/200 with hits)")
+
+    # Incremental: editing one report's D5 root cause re-indexes only that row
+    uid = f"s{rng.randrange(args.reports):07d}"
+    times = []
+    for k in range(50):
+        t0 = time.perf_counter()
+        store.apply_changes(uid, {("d5_root",): f"unique marker zqx{k} resonance"})
+        times.append((time.perf_counter() - t0) * 1000)
+    assert [h["uid"] for h in store.similar_reports("zqx49 resonance", limit=1)] == [uid]
+    assert not store.similar_reports("zqx48", limit=1), "stale index entry"
+    print(f"reindex one report  p50={pct(times, 50):6.2f} p95={pct(times, 95):6.2f} ms")
+
+    assert worst <= QUERY_BUDGET_MS, f"search p95 {worst:.1f} ms over budget"
+    assert pct(times, 95) <= REINDEX_BUDGET_MS, "reindex over budget"
+    store.close()
+    tmp.cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+# ===========================
+# Benchmark — report snapshots vs. the XLSX export
+# Save (encode) and restore (decode + load into session state) time and size
+# as Whys / causes grow; budget is single-digit milliseconds at every size.
+# Run: python benchmarks/bench_snapshot.py
+# ===========================
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import snapshot
+from catalog import T
+from report_model import FISHBONE_CATEGORIES, STEP_IDS, empty_report, load_into_session
+from xlsx_export import build_report_workbook
+
+BUDGET_MS = 10.0
+REPEAT = 20
+
+
+class _State(dict):
+    """Enough of st.session_state for load_into_session."""
+    __getattr__ = dict.__getitem__
+    __setattr__ = dict.__setitem__
+
+
+def make_report(n):
+    r = empty_report()
+    r["info"] = {"report_date": "2025-03-01", "prepared_by": "QE", "product": "AMP-200", "customer": "Nissan"}
+    for i, sid in enumerate(STEP_IDS):
+        r["steps"][sid] = {"answer": f"{sid} answer with a realistic amount of descriptive text " * 4,
+                           "owner": f"owner {i}", "due": "2025-04-01", "status": "in_progress"}
+    r["d5_root"] = "Reflow profile drifted after oven maintenance"
+    r["whys"] = {k: [f"{k} why {i}: because the previous control did not catch it" for i in range(n)]
+                 for k in ("occ", "det")}
+    r["fishbone"] = {c: [f"{c} cause {i} with some descriptive text" for i in range(n)] for c in FISHBONE_CATEGORIES}
+    return r
+
+
+def best_ms(fn, repeat=REPEAT):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, (time.perf_counter() - t0) * 1000)
+    return best
+
+
+def main():
+    L = T["en"]
+    print(f"{'n':>5} {'save ms':>8} {'restore ms':>11} {'snapshot KB':>12} {'xlsx ms':>8} {'xlsx KB':>8}")
+    failed = False
+    for n in (5, 50, 500):
+        report = make_report(n)
+        blob = snapshot.dumps(report)
+        save = best_ms(lambda: snapshot.dumps(report))
+        restore = best_ms(lambda: load_into_session(_State(), snapshot.loads(blob), L))
+        xlsx = build_report_workbook(report)
+        xlsx_ms = best_ms(lambda: build_report_workbook(report), repeat=3)
+        print(f"{n:>5} {save:>8.2f} {restore:>11.2f} {len(blob) / 1024:>12.1f} {xlsx_ms:>8.1f} {len(xlsx) / 1024:>8.1f}")
+        assert snapshot.loads(blob) == snapshot.normalize(report)
+        failed |= max(save, restore) > BUDGET_MS
+    if failed:
+        print(f"FAIL: save/restore above {BUDGET_MS:.0f} ms")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
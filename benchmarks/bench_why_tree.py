@@ -0,0 +1,91 @@
+# ===========================
+# Benchmark — 5-Why tree
+# Node operations and storage per node as the tree grows, and the D5 tab's
+# fragment rerun (add a Why / type into one) at 5 vs. 500 Whys per chain,
+# which must stay flat: only one page of rows gets widgets.
+# Run: python benchmarks/bench_why_tree.py
+# ===========================
+
+import logging
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+os.environ.setdefault("NPQP_DB_PATH", os.path.join(tempfile.mkdtemp(prefix="npqp-bench-"), "bench.sqlite3"))
+
+from apptest_harness import FRAG_D5, new_app, timed_run
+from why_tree import ROOT, WhyTree, parse_outline
+
+logging.getLogger("streamlit.runtime.scriptrunner_utils.script_run_context").addFilter(
+    lambda record: "missing ScriptRunContext" not in record.getMessage())
+
+REPEAT = 3
+FLAT_FACTOR = 3.0     # rerun at 500 Whys may cost at most this many times the rerun at 5...
+FLAT_SLACK_MS = 100   # ...plus this much
+
+
+def build(n, seed=1):
+    rng = random.Random(seed)
+    tree, ids = WhyTree(), [ROOT]
+    for i in range(n):
+        # mostly chains, sometimes a second contributing cause
+        parent = ids[-1] if rng.random() < 0.8 else rng.choice(ids)
+        ids.append(tree.add(parent, f"why {i}: the previous control did not catch it"))
+    return tree
+
+
+def storage_bytes(tree):
+    arrays = sum(sys.getsizeof(a) for a in (tree.parent, tree.first, tree.last, tree.next))
+    return arrays + sys.getsizeof(tree.text)
+
+
+def best_ms(fn, repeat=REPEAT):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, (time.perf_counter() - t0) * 1000)
+    return best
+
+
+def rerun_ms(n):
+    # Whys only: new_app(n=...) also seeds n fishbone causes, whose widgets every keyed widget pays for
+    at = new_app()
+    at.session_state.d5_occ = WhyTree.chain(f"Why {i}" for i in range(n))
+    at.session_state.d5_det = WhyTree.chain(f"Why {i}" for i in range(n))
+    at.run()
+    add = min(timed_run(at, lambda at: at.button(key="add_occ").click(), FRAG_D5) for _ in range(REPEAT))
+    typed = min(timed_run(at, lambda at, k=k: at.text_input(key="why_det_1").input(f"edit {k}"), FRAG_D5)
+                for k in range(REPEAT))
+    assert not at.exception, [e.value for e in at.exception]
+    return add, typed
+
+
+def main():
+    print(f"{'nodes':>6} {'build ms':>9} {'µs/add':>7} {'outline ms':>11} {'lists ms':>9} {'B/node':>7}")
+    for n in (100, 1_000, 10_000):
+        tree = build(n)
+        ms = best_ms(lambda: build(n))
+        outline = best_ms(tree.outline)
+        lists = best_ms(lambda: WhyTree.from_lists(*tree.to_lists()))
+        assert parse_outline(tree.outline()) == tree.to_lists()
+        print(f"{n:>6} {ms:>9.2f} {ms * 1000 / n:>7.2f} {outline:>11.2f} {lists:>9.2f} "
+              f"{storage_bytes(tree) / n:>7.1f}")
+
+    print(f"\n{'whys':>6} {'add why ms':>11} {'type ms':>8}")
+    timings = {}
+    for n in (5, 500):
+        timings[n] = rerun_ms(n)
+        print(f"{n:>6} {timings[n][0]:>11.1f} {timings[n][1]:>8.1f}")
+    limit = [t * FLAT_FACTOR + FLAT_SLACK_MS for t in timings[5]]
+    if any(big > lim for big, lim in zip(timings[500], limit)):
+        print("FAIL: D5 rerun grows with the number of Whys")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,73 @@
+# ===========================
+# Benchmark — batch workbook generation (workbooks/minute)
+# Builds N workbooks from CSV-shaped records, with and without the fishbone
+# sheet, into an in-memory zip; then reads a few back with xlsx_import to
+# check they carry the input field by field, in both languages.
+# Run: python benchmarks/bench_xlsx_batch.py [--reports 2000] [--workers N]
+# ===========================
+
+import argparse
+import io
+import os
+import random
+import sys
+import zipfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from catalog import T
+from report_model import STEP_IDS
+from xlsx_batch import coerce, generate_workbooks, report_from_row
+from xlsx_import import parse_8d_workbook
+
+
+def make_row(rng, i):
+    """One MES-style defect record: D1-D4 filled, D5 Whys and causes for some."""
+    lang = "es" if i % 3 == 0 else "en"
+    row = {"report_date": f"2025-03-{1 + i % 28:02d}", "prepared_by": "MES", "product": f"AMP-{i % 40}",
+           "customer": "Nissan", "language": lang}
+    for k, sid in enumerate(STEP_IDS[:4]):
+        row[f"{sid}_answer"] = f"{sid} defect record {i}: lot {rng.randrange(1000)}"
+        row[f"{sid}_owner"] = f"owner{rng.randrange(50)}"
+        row[f"{sid}_status"] = rng.choice(T[lang]["status_opts"])
+    if i % 2:
+        row["whys_occ"] = "Solder bridge\n- Stencil worn\n- Paste too thick"
+        row["whys_det"] = "AOI threshold too loose"
+        row["Machine/Equipment"] = "Reflow oven drift\nConveyor speed"
+    return row
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--reports", type=int, default=2000)
+    ap.add_argument("--workers", type=int, default=None)
+    args = ap.parse_args()
+    rng = random.Random(5)
+    rows = [make_row(rng, i) for i in range(args.reports)]
+
+    for fishbone in (False, True):
+        buf = io.BytesIO()
+        s = generate_workbooks((report_from_row(r) for r in rows), zip_to=buf, workers=args.workers,
+                               fishbone=fishbone)
+        print(f"fishbone={'on ' if fishbone else 'off'} {s['written']} workbooks in {s['seconds']:.2f}s = "
+              f"{s['per_minute']:.0f}/min, zip {len(buf.getvalue()) / 1024:.0f} KB, failed {len(s['failed'])}")
+        assert s["written"] == args.reports and not s["failed"]
+
+    with zipfile.ZipFile(buf) as zf:
+        names = zf.namelist()
+        for i in (0, 1):
+            data = zf.read(names[i])
+            r = parse_8d_workbook(io.BytesIO(data))
+            _, want = coerce(report_from_row(rows[i]))
+            assert r["language"] == want["language"] and r["info"] == want["info"]
+            for sid in STEP_IDS:   # the D5 answer is composed from the Whys
+                fields = ("owner", "due", "status") if sid == "D5" else ("answer", "owner", "due", "status")
+                assert all(r["steps"][sid][f] == want["steps"][sid][f] for f in fields), sid
+            assert r["whys"] == want["whys"] and r["why_parents"] == want["why_parents"]
+            sheets = zipfile.ZipFile(io.BytesIO(data)).namelist()
+            assert ("xl/worksheets/sheet2.xml" in sheets) == bool(i % 2), sheets
+    print("round trip EN/ES: ok")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+# ===========================
+# Benchmark — XLSX export latency & peak memory
+# The fishbone PNG is rendered once per size, outside the timing (see bench_fishbone_layout.py)
+# Run: python benchmarks/bench_xlsx_export.py
+# ===========================
+
+import io
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from openpyxl import load_workbook
+
+from ishikawa import CATEGORIES, layout_ishikawa, layout_to_png
+from xlsx_export import build_8d_workbook, step_colors
+
+# Budget for one export of the largest report size below
+LATENCY_BUDGET_MS = 250.0
+PEAK_MEM_BUDGET_MB = 16.0
+
+STEPS = list(step_colors)[:8]
+
+
+def make_rows(n_whys, n_causes):
+    """Workbook rows and the fishbone PNG of a report with `n_causes` causes, spread over the categories."""
+    whys = "\n".join(f"Why {i}: operator skipped profile check on line {i % 7}" for i in range(n_whys))
+    cause_list = [f"Cause {i}: fixture wear on station {i % 11}" for i in range(n_causes)]
+    causes = "\n".join(cause_list)
+    fishbone = {cat: cause_list[k::len(CATEGORIES)] for k, cat in enumerate(CATEGORIES)}
+    fishbone_png = layout_to_png(layout_ishikawa(fishbone, list(CATEGORIES), "Solder profile not controlled"))
+    rows = []
+    for step in STEPS:
+        if step.startswith("D5"):
+            ans = f"Occurrence:\n{whys}\n\nDetection:\n{whys}\n\nFishbone:\n{causes}"
+            rows.append((step, ans, "Solder profile not controlled", "QE", "2025-01-31", "In progress"))
+        else:
+            rows.append((step, f"Answer for {step}", "", "Owner", None, "Not started"))
+    return rows, fishbone_png
+
+
+def check_fishbone(xlsx_bytes):
+    """The diagram is on its own sheet, anchored at A1."""
+    (image,) = load_workbook(io.BytesIO(xlsx_bytes))["Fishbone"]._images
+    assert (image.anchor._from.col, image.anchor._from.row) == (0, 0), "fishbone not anchored at A1"
+
+
+def measure(n_whys, n_causes, repeat=5):
+    rows, fishbone_png = make_rows(n_whys, n_causes)
+    check_fishbone(build_8d_workbook(rows, fishbone_png=fishbone_png))  # warm-up
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        build_8d_workbook(rows, "01/01/2025", "QE", "AMP-100", "Nissan", fishbone_png=fishbone_png)
+        best = min(best, time.perf_counter() - t0)
+    tracemalloc.start()
+    build_8d_workbook(rows, "01/01/2025", "QE", "AMP-100", "Nissan", fishbone_png=fishbone_png)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best * 1000, peak / 2**20
+
+
+if __name__ == "__main__":
+    cwd_before = set(os.listdir("."))
+    print(f"{'whys':>6} {'causes':>7} {'ms':>8} {'peak MB':>8}")
+    for n in (5, 50, 200, 500):
+        ms, mb = measure(n, n)
+        print(f"{n:>6} {n:>7} {ms:>8.2f} {mb:>8.2f}")
+    assert set(os.listdir(".")) == cwd_before, "export touched the filesystem"
+    assert ms <= LATENCY_BUDGET_MS, f"export latency {ms:.1f} ms over budget {LATENCY_BUDGET_MS} ms"
+    assert mb <= PEAK_MEM_BUDGET_MB, f"export peak memory {mb:.1f} MB over budget {PEAK_MEM_BUDGET_MB} MB"
@@ -0,0 +1,92 @@
+# ===========================
+# Benchmark — bulk import throughput (files/sec) and round-trip fidelity
+# Writes N workbooks with xlsx_export, imports them twice (second run must be
+# all duplicates), then checks a parsed EN and ES workbook field by field.
+# Run: python benchmarks/bench_xlsx_import.py [--files 1000] [--workers N]
+# ===========================
+
+import argparse
+import datetime
+import os
+import random
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from catalog import T
+from report_store import ReportStore
+from xlsx_export import build_8d_workbook
+from xlsx_import import import_workbooks, parse_8d_workbook
+
+
+def make_rows(rng, L, i):
+    """Rows exactly as app.advanced.py builds them on Save."""
+    occ = [f"occurrence why {k} for part {i}" for k in range(rng.randint(1, 6))]
+    det = [f"detection why {k}" for k in range(rng.randint(1, 4))]
+    root = f"root cause {i}: {rng.choice(['cold solder', 'loose connector', 'firmware drift'])}"
+    rows = []
+    for title, _, _ in L["npqp_steps"]:
+        if title.startswith("D5"):
+            ans = f"{L['occurrence']}:\n" + "\n".join(occ) + f"\n\n{L['detection']}:\n" + "\n".join(det)
+        else:
+            ans = f"{title} answer {i}"
+        due = datetime.date(2025, rng.randint(1, 12), rng.randint(1, 28)) if rng.random() < 0.7 else None
+        rows.append((title, ans, root if title.startswith("D5") else "", f"owner{rng.randrange(50)}", due,
+                     rng.choice(L["status_opts"])))
+    return rows, occ, det, root
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--files", type=int, default=1000)
+    ap.add_argument("--workers", type=int, default=None)
+    args = ap.parse_args()
+    rng = random.Random(3)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        src = os.path.join(tmp, "in")
+        os.makedirs(src)
+        for i in range(args.files):
+            L = T["es" if i % 3 == 0 else "en"]
+            rows, *_ = make_rows(rng, L, i)
+            with open(os.path.join(src, f"8d_{i:05d}.xlsx"), "wb") as f:
+                f.write(build_8d_workbook(rows, f"2025-01-{1 + i % 28:02d}", "QE", f"AMP-{i % 40}", "Nissan"))
+        # A byte-identical copy and a non-8D file
+        with open(os.path.join(src, "8d_00001.xlsx"), "rb") as f, open(os.path.join(src, "copy.xlsx"), "wb") as g:
+            g.write(f.read())
+        with open(os.path.join(src, "broken.xlsx"), "wb") as f:
+            f.write(b"not a workbook")
+
+        store = ReportStore(os.path.join(tmp, "import.sqlite3"))
+        first = import_workbooks([src], store, workers=args.workers)
+        again = import_workbooks([src], store, workers=args.workers)
+        for name, s in (("first import", first), ("re-import", again)):
+            print(f"{name:<13} {s['files']} files in {s['seconds']:.2f}s = {s['files_per_sec']:.1f} files/s "
+                  f"(imported {s['imported']}, duplicates {s['duplicates']}, failed {len(s['failed'])})")
+        assert first["imported"] == args.files and first["duplicates"] == 1 and len(first["failed"]) == 1
+        assert again["imported"] == 0 and store.count() == args.files, "re-import must be a no-op"
+
+        # Round trip, both languages
+        for code in ("en", "es"):
+            L = T[code]
+            rows, occ, det, root = make_rows(rng, L, 99999)
+            path = os.path.join(tmp, f"rt_{code}.xlsx")
+            with open(path, "wb") as f:
+                f.write(build_8d_workbook(rows, "2025-02-03", "QE", "AMP-1", "Nissan"))
+            r = parse_8d_workbook(path)
+            assert r["language"] == code
+            assert r["whys"] == {"occ": occ, "det": det}, r["whys"]
+            assert r["d5_root"] == root
+            assert r["info"] == {"report_date": "2025-02-03", "prepared_by": "QE", "product": "AMP-1",
+                                 "customer": "Nissan"}
+            for (title, ans, _, owner, due, status), sid in zip(rows, r["steps"]):
+                s = r["steps"][sid]
+                assert (s["answer"], s["owner"], s["due"]) == (ans, owner, due.isoformat() if due else None)
+                assert L["status_opts"][["not_started", "in_progress", "done"].index(s["status"])] == status
+        print("round trip EN/ES: ok")
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+# ===========================
+# Local stub of the OpenAI chat completions API (streaming + non-streaming)
+# Used by the coach benchmarks; never talks to the network.
+# ===========================
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class StubOpenAI:
+    """Serve /v1/chat/completions on 127.0.0.1 with configurable token count and pacing."""
+
+    def __init__(self, tokens=20, token_delay=0.002, first_token_delay=0.0):
+        self.tokens = tokens
+        self.token_delay = token_delay
+        self.first_token_delay = first_token_delay
+        self.requests = 0
+        self.connections = 0    # TCP connections accepted: fewer than requests when clients keep them alive
+        self.active = 0
+        self.max_active = 0
+        self._lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True    # tokens go out as written, like a real API server
+
+            def log_message(self, *args):
+                pass
+
+            def setup(self):
+                super().setup()
+                with stub._lock:
+                    stub.connections += 1
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                with stub._lock:
+                    stub.requests += 1
+                    stub.active += 1
+                    stub.max_active = max(stub.max_active, stub.active)
+                try:
+                    stub._reply(self, body)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass
+                finally:
+                    with stub._lock:
+                        stub.active -= 1
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        self._server.handle_error = lambda request, address: None   # clients dropping idle keep-alive connections
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self._server.server_address[1]}/v1"
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _words(self, body):
+        prompt = body.get("messages", [{}])[-1].get("content", "")
+        return [f"tok{i}:{len(prompt)} " for i in range(self.tokens)]
+
+    def _reply(self, h, body):
+        model = body.get("model", "stub")
+        words = self._words(body)
+        time.sleep(self.first_token_delay)
+        if not body.get("stream"):
+            payload = json.dumps({
+                "id": "stub", "object": "chat.completion", "created": 0, "model": model,
+                "choices": [{"index": 0, "finish_reason": "stop",
+                             "message": {"role": "assistant", "content": "".join(words)}}],
+            }).encode()
+            h.send_response(200)
+            h.send_header("Content-Type", "application/json")
+            h.send_header("Content-Length", str(len(payload)))
+            h.end_headers()
+            h.wfile.write(payload)
+            return
+
+        h.send_response(200)
+        h.send_header("Content-Type", "text/event-stream")
+        h.send_header("Transfer-Encoding", "chunked")
+        h.end_headers()
+
+        def send(data, last=False):
+            raw = f"data: {data}\n\n".encode()
+            # the terminating chunk goes with [DONE]: clients stop reading there and keep the connection
+            h.wfile.write(f"{len(raw):x}\r\n".encode() + raw + b"\r\n" + (b"0\r\n\r\n" if last else b""))
+            h.wfile.flush()
+
+        for i, w in enumerate(words):
+            if i:
+                time.sleep(self.token_delay)
+            send(json.dumps({
+                "id": "stub", "object": "chat.completion.chunk", "created": 0, "model": model,
+                "choices": [{"index": 0, "delta": {"content": w}, "finish_reason": None}],
+            }))
+        send("[DONE]", last=True)
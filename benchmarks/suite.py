@@ -0,0 +1,214 @@
+# ===========================
+# Benchmark suite — app.advanced.py end to end, headless (AppTest)
+# Rerun latency per interaction, export time / peak memory vs. size, and
+# memory per concurrent session. Results go to JSON and are compared with
+# benchmarks/baseline.json; a regression exits non-zero.
+# Run: python benchmarks/suite.py [--sizes 5,50,500] [--update-baseline]
+# ===========================
+
+import argparse
+import datetime
+import gc
+import json
+import logging
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, ".."))
+# Sessions autosave: keep the suite's drafts out of the working copy's database
+os.environ.setdefault("NPQP_DB_PATH", os.path.join(tempfile.mkdtemp(prefix="npqp-suite-"), "suite.sqlite3"))
+
+import streamlit
+
+from apptest_harness import FRAG_D1, FRAG_D5, FRAG_FISHBONE, CATEGORIES, new_app, timed_run
+from catalog import T
+from fishbone import render_cache, render_fishbone
+from jobs import get_executor
+
+# Bare-mode runs outside a script thread log this on every widget access
+# (a filter, because Streamlit resets its loggers' levels when AppTest loads config)
+logging.getLogger("streamlit.runtime.scriptrunner_utils.script_run_context").addFilter(
+    lambda record: "missing ScriptRunContext" not in record.getMessage())
+
+BASELINE = os.path.join(HERE, "baseline.json")
+RESULTS = os.path.join(HERE, "results", "latest.json")
+REPEAT = 5
+SESSIONS = 10
+
+# A metric regresses when value > baseline * (1 + rel) + abs, per unit
+TOLERANCE = {"ms": (0.75, 25.0), "kb": (0.25, 256.0)}
+
+
+def _median(values):
+    return statistics.median(values)
+
+
+def _toggle_language(at):
+    box = at.sidebar.selectbox[0]
+    box.set_value("Español" if box.value == "English" else "English")
+
+
+def _wait_jobs(at, timeout=30):
+    ex = get_executor()
+    for job_id in list(at.session_state.jobs.values()):
+        job = ex.get(job_id)
+        if job is not None:
+            job.wait(timeout)
+
+
+# (edit, fragment index or None for a full rerun)
+INTERACTIONS = {
+    "type_d1": (lambda at, k: at.text_area(key="ans_0").input(f"edit {k}"), FRAG_D1),
+    "add_why": (lambda at, k: at.button(key="add_occ").click(), FRAG_D5),
+    "add_cause": (lambda at, k: at.button(key="add_People").click(), FRAG_FISHBONE),
+    "render": (lambda at, k: at.button(key="render_fishbone").click(), FRAG_FISHBONE),
+    "save": (lambda at, k: at.button(key="save_report").click(), None),
+    "switch_language": (lambda at, k: _toggle_language(at), None),
+}
+
+
+def _repeats(n):
+    # Large sizes take tens of seconds per rerun, far above timer noise: one sample is enough
+    return REPEAT if n <= 50 else 1
+
+
+def measure_interactions(n):
+    out = {}
+    at = new_app(n=n)
+    for name, (edit, frag) in INTERACTIONS.items():
+        if name == "render":
+            render_cache.clear()  # a real render, not a cache hit
+        times = []
+        for k in range(_repeats(n)):
+            times.append(timed_run(at, lambda at: edit(at, k), frag))
+            _wait_jobs(at)
+        out[f"rerun.{name}.n{n}"] = _median(times)
+        # Click-to-result time of the background job (repeats share the first job)
+        for metric, job_name in (("render_to_image", "fishbone"), ("save_to_download", "xlsx")):
+            if name == metric.split("_")[0]:
+                job = get_executor().get(at.session_state.jobs[job_name])
+                out[f"{metric}.n{n}"] = (job.finished - job.created) * 1000
+        if frag is not None:
+            at.run()  # a fragment rerun leaves only that fragment in the tree
+    assert not at.exception, [e.value for e in at.exception]
+    return out
+
+
+def measure_export(n):
+    from xlsx_export import build_8d_workbook
+
+    L = T["en"]
+    fishbone = {c: [f"{c} cause {i} with some descriptive text" for i in range(n)] for c in CATEGORIES}
+    occ = [f"Occurrence why {i}: because the previous step allowed it" for i in range(n)]
+    det = [f"Detection why {i}: because the check could not see it" for i in range(n)]
+    rows = []
+    for title, _, _ in L["npqp_steps"]:
+        ans = (f"{L['occurrence']}:\n" + "\n".join(occ) + f"\n\n{L['detection']}:\n" + "\n".join(det)
+               if title.startswith("D5") else f"{title} answer")
+        rows.append((title, ans, "root cause" if title.startswith("D5") else "", "owner",
+                     datetime.date(2025, 1, 1), L["status_opts"][1]))
+    labels = [L[k] for k in ("people", "process", "machine", "material", "environment", "measurement")]
+
+    def export():
+        render_cache.clear()
+        png = render_fishbone(fishbone, "English", labels, fmt="png")
+        build_8d_workbook(rows, "2025-01-01", "QE", "AMP", "Nissan", fishbone_png=png)
+
+    # Timed and traced in separate passes: tracemalloc slows allocation-heavy code severalfold
+    times = []
+    for _ in range(_repeats(n)):
+        t0 = time.perf_counter()
+        export()
+        times.append((time.perf_counter() - t0) * 1000)
+    gc.collect()
+    tracemalloc.start()
+    export()
+    peak = tracemalloc.get_traced_memory()[1] / 1024
+    tracemalloc.stop()
+    return {f"export.ms.n{n}": _median(times), f"export.peak_kb.n{n}": peak}
+
+
+def measure_sessions(k=SESSIONS):
+    new_app(n=5)  # warm imports and process-wide caches first
+    gc.collect()
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    apps = [new_app(n=5) for _ in range(k)]
+    gc.collect()
+    per = (tracemalloc.get_traced_memory()[0] - base) / 1024 / k
+    tracemalloc.stop()
+    del apps
+    return {f"session.kb.x{k}": per}
+
+
+def compare(metrics, baseline):
+    """Rows of (name, value, base, limit, status) and whether anything regressed."""
+    rows, failed = [], False
+    for name, value in sorted(metrics.items()):
+        base = baseline.get(name)
+        if base is None:
+            rows.append((name, value, None, None, "new"))
+            continue
+        rel, slack = TOLERANCE["kb" if "kb" in name else "ms"]
+        limit = base * (1 + rel) + slack
+        bad = value > limit
+        failed |= bad
+        rows.append((name, value, base, limit, "REGRESSION" if bad else "ok"))
+    return rows, failed
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes", default="5,50,500", help="Whys per list / causes per category (500 takes minutes)")
+    ap.add_argument("--out", default=RESULTS)
+    ap.add_argument("--baseline", default=BASELINE)
+    ap.add_argument("--update-baseline", action="store_true", help="store these results as the new baseline")
+    args = ap.parse_args()
+    sizes = [int(x) for x in args.sizes.split(",")]
+
+    metrics = {}
+    for n in sizes:
+        metrics.update(measure_interactions(n))
+        metrics.update(measure_export(n))
+    metrics.update(measure_sessions())
+
+    result = {
+        "meta": {"timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+                 "python": platform.python_version(), "streamlit": streamlit.__version__,
+                 "platform": platform.platform(), "cpus": os.cpu_count(), "sizes": sizes},
+        "metrics": {k: round(v, 3) for k, v in metrics.items()},
+    }
+    os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+    with open(args.out, "w") as f:
+        json.dump(result, f, indent=2, sort_keys=True)
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)["metrics"]
+    rows, failed = compare(result["metrics"], baseline)
+    print(f"{'metric':<34} {'value':>10} {'baseline':>10} {'limit':>10}  status")
+    for name, value, base, limit, status in rows:
+        fmt = lambda v: f"{v:>10.1f}" if v is not None else f"{'—':>10}"
+        print(f"{name:<34} {fmt(value)} {fmt(base)} {fmt(limit)}  {status}")
+    print(f"results: {args.out}")
+
+    if args.update_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(result, f, indent=2, sort_keys=True)
+        print(f"baseline updated: {args.baseline}")
+        return 0
+    if failed:
+        print("performance regression against baseline", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,358 @@
+# ===========================
+# 8D Training App — Content Catalog
+# Bilingual labels, training text, step colors and heuristic questions.
+# Built once per process and frozen: every session and rerun shares the same objects.
+# ===========================
+
+from types import MappingProxyType
+
+
+def _freeze(obj):
+    """Recursively turn dicts into read-only mappings and lists into tuples."""
+    if isinstance(obj, dict):
+        return MappingProxyType({k: _freeze(v) for k, v in obj.items()})
+    if isinstance(obj, (list, tuple)):
+        return tuple(_freeze(v) for v in obj)
+    return obj
+
+
+# ---------- i18n / training content ----------
+_T = {
+    "en": {
+        "report_info": "Report Information",
+        "report_date": "Report Date",
+        "prepared_by": "Prepared By",
+        "product": "Product / Part",
+        "customer": "Customer",
+        "ai_helper": "AI Helper (optional)",
+        "ai_about": "Get guided prompts and suggestions. Works best with concise, factual inputs.",
+        "ai_key_info": "To enable AI, add your OpenAI API key in Streamlit secrets as OPENAI_API_KEY (and include 'openai' in requirements).",
+        "ai_enter_key": "Enter API Key (not stored)",
+        "start_coach": "Ask the Coach",
+        "coach_prompt": "Describe your issue or paste your draft 5-Why here",
+        "ai_not_installed": "AI package not installed. Showing heuristic helper only.",
+        "ai_no_key": "No API key configured. Using heuristic helper.",
+        "heuristic_title": "Heuristic Suggestions",
+        "heuristic_occ": "Occurrence probing questions",
+        "heuristic_det": "Detection probing questions",
+        "fishbone_title": "Fishbone Diagram (Ishikawa)",
+        "fishbone_note": "Enter causes by category, then click ‘Render Fishbone’.",
+        "people": "People",
+        "process": "Process/Method",
+        "machine": "Machine/Equipment",
+        "material": "Material/Components",
+        "environment": "Environment",
+        "measurement": "Measurement/Test",
+        "add_cause": "Add another cause",
+        "render_fishbone": "Render Fishbone",
+        "assignments": "Assignments & Due Dates (per D-step)",
+        "owner": "Owner",
+        "due": "Due Date",
+        "status": "Status",
+        "status_opts": ["Not started", "In progress", "Done"],
+        "npqp_steps": [
+            ("D1: Concern Details",
+             "Describe the customer concern clearly: what/where/when/how many. Include data and evidence.",
+             "Ex: Customer reports intermittent static in amplifier output at end-of-line at Plant A."),
+            ("D2: Similar Part Considerations",
+             "Check other models/generic parts/colors/opposite hand/front-rear to learn scope.",
+             "Ex: Same speaker used in Model B; compare front vs rear audio units; check opposite-hand variant."),
+            ("D3: Initial Analysis",
+             "Do quick checks, collect facts, and isolate the phenomenon.",
+             "Ex: Visual inspect solder joints; continuity checks; connector seating; quick A/B swaps."),
+            ("D4: Implement Containment",
+             "Temporary measures to protect customer while you find root cause.",
+             "Ex: 100% inspection, quarantine lot, temporary shielding, extra test step."),
+            ("D5: Final Analysis",
+             "Use 5-Why: Occurrence (why it happened) and Detection (why it escaped). Add more Whys if needed.",
+             ""),
+            ("D6: Permanent Corrective Actions",
+             "Define actions that eliminate the root cause and prevent recurrence.",
+             "Ex: Update solder profile, retrain, revise WI, add automated inspection."),
+            ("D7: Countermeasure Confirmation",
+             "Verify actions are effective over time.",
+             "Ex: Run verification builds, life tests, capability studies (CPK), monitor early field data."),
+            ("D8: Follow-up Activities (Lessons Learned / Recurrence Prevention)",
+             "Standardize changes, update PFMEA/Control Plan/SOP, communicate lessons learned.",
+             "Ex: Update PFMEA, add control plan checks, train team, add audit points.")
+        ],
+        "d5_training": (
+            "**Training Guidance:** Use 5-Why to reach process-level causes.\n\n"
+            "**Occurrence Example (5-Whys):**\n"
+            "1. Cold solder joint on DSP chip\n"
+            "2. Solder temp too low\n"
+            "3. Operator didn’t follow profile\n"
+            "4. Work instructions unclear\n"
+            "5. No visual confirmation step\n\n"
+            "**Detection Example (5-Whys):**\n"
+            "1. QA missed cold joint\n"
+            "2. Checklist incomplete\n"
+            "3. No automated vision/test\n"
+            "4. Batch testing not performed\n"
+            "5. Early warning trend not tracked\n\n"
+            "**Root Cause Example:**\n"
+            "Insufficient solder process control + inadequate QA checklist allowed defect to escape."
+        ),
+        "occurrence": "Occurrence Analysis",
+        "detection": "Detection Analysis",
+        "why": "Why",
+        "add_why": "Add another Why",
+        "add_branch": "Add a contributing cause",
+        "remove_why": "Remove",
+        "collapse": "Collapse",
+        "expand": "Expand",
+        "why_selected": "Selected Why",
+        "why_page": "Page",
+        "root_cause": "Root Cause (summary after 5-Whys)",
+        "your_answer": "Your Answer",
+        "save": "Save 8D Report",
+        "saved": "8D Report saved successfully.",
+        "download": "Download XLSX",
+        "no_answers": "No answers yet. Please complete some fields before saving.",
+        "saved_reports": "Saved Reports",
+        "new_report": "New report",
+        "open_report": "Open",
+        "any": "Any",
+        "no_reports": "No saved reports match the filters.",
+        "similar_title": "Similar past 8Ds",
+        "similar_heuristic": "From similar past 8Ds",
+        "similar_probe": "A similar 8D ({where}) traced it to “{root}”. Could the same cause apply here?",
+        "similar_lesson": "Its lesson learned: “{lesson}”. Has it been applied here?",
+        "suggested_causes": "Suggested causes from D3 / D5",
+        "add_suggestions": "Add suggested causes",
+        "dashboard": "Assignments Dashboard (all open 8Ds)",
+        "show_dashboard": "Show dashboard",
+        "open_reports": "Open 8Ds",
+        "open_steps": "Open steps",
+        "overdue": "Overdue",
+        "bucket_labels": ["Overdue", "Due in ≤ 7 days", "Due in 8–30 days", "Due later", "No due date"],
+        "by_owner": "Open and overdue steps by owner",
+        "by_step": "Status by D-step",
+        "step": "Step",
+        "unassigned": "(unassigned)",
+        "job_running": "Working…",
+        "job_queued": "Waiting for a free worker…",
+        "job_failed": "Failed",
+        "job_cancelled": "Cancelled.",
+        "cancel": "Cancel",
+        "busy": "The server is busy right now. Please try again in a moment.",
+        "resume_prompt": "You have an unfinished 8D",
+        "resume_draft": "Resume last draft",
+        "snapshot_download": "Download snapshot (.8d)",
+        "snapshot_restore": "Restore from snapshot (.8d)",
+        "snapshot_error": "Could not read the snapshot",
+        "coedit_conflict": "Another editor changed the same field first; their version was kept",
+        "analytics": "Cause Analytics (all 8Ds)",
+        "show_analytics": "Show analytics",
+        "month_range": "Months",
+        "reports_label": "8Ds",
+        "causes_label": "Causes",
+        "recurrence_rate": "Recurring root causes",
+        "pareto_categories": "Causes by fishbone category",
+        "pareto_terms": "Most frequent cause terms (8Ds mentioning them)",
+        "trend_title": "Causes per month by category",
+        "recurring_roots": "Recurring root causes",
+        "root_theme": "Root cause",
+        "count": "8Ds",
+        "no_data": "No 8Ds match the filters."
+    },
+    "es": {
+        "report_info": "Información del Reporte",
+        "report_date": "Fecha del Reporte",
+        "prepared_by": "Preparado por",
+        "product": "Producto / Parte",
+        "customer": "Cliente",
+        "ai_helper": "Asistente IA (opcional)",
+        "ai_about": "Obtenga preguntas guía y sugerencias. Funciona mejor con entradas concisas y objetivas.",
+        "ai_key_info": "Para habilitar IA, agregue su clave de OpenAI en secretos de Streamlit como OPENAI_API_KEY (y añada 'openai' a requirements).",
+        "ai_enter_key": "Ingrese la clave (no se guarda)",
+        "start_coach": "Preguntar al Asistente",
+        "coach_prompt": "Describa el problema o pegue su borrador 5-Why aquí",
+        "ai_not_installed": "Paquete de IA no instalado. Mostrando asistente heurístico.",
+        "ai_no_key": "No hay clave de API configurada. Usando asistente heurístico.",
+        "heuristic_title": "Sugerencias Heurísticas",
+        "heuristic_occ": "Preguntas para profundizar (Ocurrencia)",
+        "heuristic_det": "Preguntas para profundizar (Detección)",
+        "fishbone_title": "Diagrama de Espina de Pescado (Ishikawa)",
+        "fishbone_note": "Ingrese causas por categoría y luego haga clic en ‘Generar Diagrama’.",
+        "people": "Personas",
+        "process": "Proceso/Método",
+        "machine": "Máquina/Equipo",
+        "material": "Material/Componentes",
+        "environment": "Entorno",
+        "measurement": "Medición/Prueba",
+        "add_cause": "Agregar otra causa",
+        "render_fishbone": "Generar Diagrama",
+        "assignments": "Responsables y Fechas (por paso D)",
+        "owner": "Responsable",
+        "due": "Fecha Límite",
+        "status": "Estado",
+        "status_opts": ["No iniciado", "En progreso", "Terminado"],
+        "npqp_steps": [
+            ("D1: Detalles de la Queja",
+             "Describa claramente la queja: qué/dónde/cuándo/cuántos. Incluya datos y evidencias.",
+             "Ej: Cliente reporta estática intermitente en el amplificador en fin de línea en Planta A."),
+            ("D2: Consideración de Partes Similares",
+             "Revise otros modelos/partes genéricas/colores/mano opuesta/delantero-trasero para entender el alcance.",
+             "Ej: El mismo parlante usado en Modelo B; comparar delantero vs trasero; validar mano opuesta."),
+            ("D3: Análisis Inicial",
+             "Realice verificaciones rápidas, recolecte hechos y aísle el fenómeno.",
+             "Ej: Inspección visual de soldaduras; pruebas de continuidad; asientos de conectores; swaps A/B."),
+            ("D4: Implementar Contención",
+             "Medidas temporales para proteger al cliente mientras encuentra la causa raíz.",
+             "Ej: Inspección 100%, poner lote en cuarentena, blindaje temporal, paso de prueba adicional."),
+            ("D5: Análisis Final",
+             "Use 5-Why: Ocurrencia (por qué ocurrió) y Detección (por qué escapó). Agregue más ‘porqués’ si necesita.",
+             ""),
+            ("D6: Acciones Correctivas Permanentes",
+             "Defina acciones que eliminen la causa raíz y eviten recurrencia.",
+             "Ej: Actualizar perfil de soldadura, reentrenar, revisar instrucciones, añadir inspección automática."),
+            ("D7: Confirmación de Contramedidas",
+             "Verifique que las acciones sean efectivas en el tiempo.",
+             "Ej: Lotes de verificación, pruebas de vida, estudios de capacidad (CPK), monitoreo temprana de campo."),
+            ("D8: Seguimiento (Lecciones Aprendidas / Prevención de Recurrencia)",
+             "Estandarice cambios, actualice PFMEA/Plan de Control/POE, comunique lecciones aprendidas.",
+             "Ej: Actualizar PFMEA, sumar controles al plan, entrenar equipo, añadir puntos de auditoría.")
+        ],
+        "d5_training": (
+            "**Guía de Entrenamiento:** Use 5-Why para llegar a causas a nivel de proceso.\n\n"
+            "**Ejemplo Ocurrencia (5-Why):**\n"
+            "1. Unión fría de soldadura en DSP\n"
+            "2. Temperatura de soldado baja\n"
+            "3. Operador no siguió el perfil\n"
+            "4. Instrucciones poco claras\n"
+            "5. Sin verificación visual\n\n"
+            "**Ejemplo Detección (5-Why):**\n"
+            "1. QA no detectó la unión fría\n"
+            "2. Checklist incompleto\n"
+            "3. Sin visión/prueba automática\n"
+            "4. No se realizaron pruebas por lote\n"
+            "5. No se monitoreó la señal temprana\n\n"
+            "**Ejemplo Causa Raíz:**\n"
+            "Control insuficiente del proceso de soldadura + checklist de QA inadecuado permitió fuga del defecto."
+        ),
+        "occurrence": "Análisis de Ocurrencia",
+        "detection": "Análisis de Detección",
+        "why": "¿Por qué?",
+        "add_why": "Agregar otro ¿Por qué?",
+        "add_branch": "Agregar una causa contribuyente",
+        "remove_why": "Eliminar",
+        "collapse": "Contraer",
+        "expand": "Expandir",
+        "why_selected": "¿Por qué? seleccionado",
+        "why_page": "Página",
+        "root_cause": "Causa Raíz (resumen tras 5-Why)",
+        "your_answer": "Su Respuesta",
+        "save": "Guardar Reporte 8D",
+        "saved": "Reporte 8D guardado con éxito.",
+        "download": "Descargar XLSX",
+        "no_answers": "Aún no hay respuestas. Complete algunos campos antes de guardar.",
+        "saved_reports": "Reportes Guardados",
+        "new_report": "Nuevo reporte",
+        "open_report": "Abrir",
+        "any": "Cualquiera",
+        "no_reports": "No hay reportes guardados que coincidan con los filtros.",
+        "similar_title": "8D anteriores similares",
+        "similar_heuristic": "De 8D anteriores similares",
+        "similar_probe": "Un 8D similar ({where}) lo atribuyó a “{root}”. ¿Podría aplicar la misma causa aquí?",
+        "similar_lesson": "Su lección aprendida: “{lesson}”. ¿Se ha aplicado aquí?",
+        "suggested_causes": "Causas sugeridas a partir de D3 / D5",
+        "add_suggestions": "Agregar causas sugeridas",
+        "dashboard": "Tablero de Asignaciones (todos los 8D abiertos)",
+        "show_dashboard": "Mostrar tablero",
+        "open_reports": "8D abiertos",
+        "open_steps": "Pasos abiertos",
+        "overdue": "Vencidos",
+        "bucket_labels": ["Vencidos", "Vencen en ≤ 7 días", "Vencen en 8–30 días", "Vencen después", "Sin fecha"],
+        "by_owner": "Pasos abiertos y vencidos por responsable",
+        "by_step": "Estado por paso D",
+        "step": "Paso",
+        "unassigned": "(sin asignar)",
+        "job_running": "Procesando…",
+        "job_queued": "Esperando un procesador libre…",
+        "job_failed": "Falló",
+        "job_cancelled": "Cancelado.",
+        "cancel": "Cancelar",
+        "busy": "El servidor está ocupado. Intente de nuevo en un momento.",
+        "resume_prompt": "Tiene un 8D sin terminar",
+        "resume_draft": "Retomar último borrador",
+        "snapshot_download": "Descargar instantánea (.8d)",
+        "snapshot_restore": "Restaurar desde instantánea (.8d)",
+        "snapshot_error": "No se pudo leer la instantánea",
+        "coedit_conflict": "Otra persona cambió el mismo campo primero; se conservó su versión",
+        "analytics": "Análisis de Causas (todos los 8D)",
+        "show_analytics": "Mostrar análisis",
+        "month_range": "Meses",
+        "reports_label": "8D",
+        "causes_label": "Causas",
+        "recurrence_rate": "Causas raíz recurrentes",
+        "pareto_categories": "Causas por categoría del diagrama de Ishikawa",
+        "pareto_terms": "Términos de causa más frecuentes (8D que los mencionan)",
+        "trend_title": "Causas por mes y categoría",
+        "recurring_roots": "Causas raíz recurrentes",
+        "root_theme": "Causa raíz",
+        "count": "8D",
+        "no_data": "Ningún 8D coincide con los filtros."
+    }
+}
+
+# ---------- Step colors (EN + ES titles) ----------
+_STEP_COLORS = {
+    "D1: Concern Details": "ADD8E6",
+    "D2: Similar Part Considerations": "90EE90",
+    "D3: Initial Analysis": "FFFF99",
+    "D4: Implement Containment": "FFD580",
+    "D5: Final Analysis": "FF9999",
+    "D6: Permanent Corrective Actions": "D8BFD8",
+    "D7: Countermeasure Confirmation": "E0FFFF",
+    "D8: Follow-up Activities (Lessons Learned / Recurrence Prevention)": "D3D3D3",
+    "D1: Detalles de la Queja": "ADD8E6",
+    "D2: Consideración de Partes Similares": "90EE90",
+    "D3: Análisis Inicial": "FFFF99",
+    "D4: Implementar Contención": "FFD580",
+    "D5: Análisis Final": "FF9999",
+    "D6: Acciones Correctivas Permanentes": "D8BFD8",
+    "D7: Confirmación de Contramedidas": "E0FFFF",
+    "D8: Seguimiento (Lecciones Aprendidas / Prevención de Recurrencia)": "D3D3D3"
+}
+
+# ---------- Heuristic coach questions ----------
+_HEURISTIC_QUESTIONS = {
+    "en": {
+        "occ": [
+            "What changed (materials, machine, method, environment) right before the first failure?",
+            "Can you reproduce the defect reliably? Under what conditions?",
+            "Is the problem isolated to certain lots, lines, shifts, or suppliers?",
+            "Which CTQ or spec is violated? What data trend shows the shift?",
+            "What evidence rules out common red herrings?"
+        ],
+        "det": [
+            "Which check should have detected it (test, visual, measurement)?",
+            "Is the control plan/PFMEA aligned with actual risks?",
+            "Was the inspection capable (Gage R&R, sensitivity)?",
+            "Were criteria or sampling insufficient for this failure mode?",
+            "Any prior warnings, near-misses, or customer escapes?"
+        ],
+    },
+    "es": {
+        "occ": [
+            "¿Qué cambió (materiales, máquina, método, entorno) justo antes del primer fallo?",
+            "¿Puede reproducirse el defecto de forma confiable? ¿Bajo qué condiciones?",
+            "¿Se limita a ciertos lotes, líneas, turnos o proveedores?",
+            "¿Qué CTQ o especificación se viola? ¿Qué tendencia de datos muestra el cambio?",
+            "¿Qué evidencias descartan falsos indicios comunes?"
+        ],
+        "det": [
+            "¿Qué control debía detectarlo (prueba, visual, medición)?",
+            "¿El plan de control/PFMEA refleja los riesgos reales?",
+            "¿La inspección era capaz (R&R, sensibilidad)?",
+            "¿Criterios o muestreo insuficientes para este modo de falla?",
+            "¿Hubo alertas previas, casi-incidentes o fugas al cliente?"
+        ],
+    },
+}
+
+# ---------- Public, frozen views ----------
+T = _freeze(_T)
+step_colors = _freeze(_STEP_COLORS)
+HEURISTIC_QUESTIONS = _freeze(_HEURISTIC_QUESTIONS)
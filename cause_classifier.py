@@ -0,0 +1,223 @@
+# ===========================
+# 8D Training App — Cause Classifier
+# Buckets free-text causes (D3 sentences, D5 Whys) into the six fishbone
+# categories with a bilingual term-weight matrix and one NumPy matrix product.
+# Train offline from stored reports: python cause_classifier.py train [--db path]
+# ===========================
+
+import argparse
+import os
+import re
+import sys
+import threading
+import unicodedata
+
+import numpy as np
+
+from report_model import FISHBONE_CATEGORIES
+
+MODEL_PATH = os.environ.get("NPQP_CAUSE_MODEL", "cause_model.npz")
+MIN_SCORE = 1.0        # below this a text is left unclassified
+MIN_MARGIN = 0.25      # best minus runner-up, as a share of the best score
+STEM_LEN = 5           # crude shared EN/ES stemming: calibration/calibración -> "calib"
+SEED_PRIOR = 4.0       # training counts a seed term as this many labeled examples
+
+# Seed lexicon, EN + ES. Stems are matched, so one spelling per family is enough.
+_SEED = {
+    "People": (
+        "operator operador operaria worker trabajador technician tecnico training entrenamiento capacitacion "
+        "skill habilidad experience experiencia fatigue fatiga shift turno error human humano mistake "
+        "careless descuido staff personal supervisor attention atencion awareness handling manejo "
+        "instruction understood knowledge conocimiento certified certificado"
+    ),
+    "Process/Method": (
+        "process proceso method metodo procedure procedimiento instruction instructivo sop step paso "
+        "sequence secuencia standard estandar profile perfil parameter parametro setting ajuste recipe "
+        "receta rework retrabajo assembly ensamble workflow flujo specification especificacion "
+        "change cambio control plan pfmea torque soldering soldadura reflow"
+    ),
+    "Machine/Equipment": (
+        "machine maquina equipment equipo tool herramienta fixture dispositivo jig nozzle boquilla wear "
+        "desgaste maintenance mantenimiento breakdown falla robot conveyor transportador oven horno "
+        "press prensa feeder alimentador spindle motor worn gastado calibration preventive preventivo "
+        "stencil esténcil tip punta drift deriva"
+    ),
+    "Material/Components": (
+        "material component componente part pieza supplier proveedor lot lote batch capacitor "
+        "resistor resistencia connector conector cable harness arnes pcb board tarjeta plastic plastico "
+        "resin resina paste pasta alloy aleacion raw defective defectuoso purchased comprado incoming "
+        "vendor magnet iman screw tornillo label etiqueta"
+    ),
+    "Environment": (
+        "environment ambiente temperature temperatura humidity humedad dust polvo esd electrostatic "
+        "electrostatica contamination contaminacion vibration vibracion lighting iluminacion heat calor "
+        "season temporada weather clima airflow ventilation ventilacion moisture clean limpieza "
+        "storage almacenamiento"
+    ),
+    "Measurement/Test": (
+        "measurement medicion measure medir test prueba tester probador inspection inspeccion gage gauge "
+        "calibre sampling muestreo limit limite tolerance tolerancia spec accuracy exactitud resolution "
+        "resolucion aoi ict detection deteccion detect detectar escape escapo check verificacion "
+        "criteria criterio capability capacidad cpk repeatability repetibilidad"
+    ),
+}
+
+_WORD = re.compile(r"[^\W\d_]+", re.UNICODE)
+_SENTENCE = re.compile(r"(?<=[.;!?])\s+|\n+")
+
+
+def tokens(text):
+    """Lower-cased, accent-free word stems of `text` (EN and ES share stems where spelled alike)."""
+    folded = unicodedata.normalize("NFKD", text.lower())
+    folded = "".join(c for c in folded if not unicodedata.combining(c))
+    return [w[:STEM_LEN] for w in _WORD.findall(folded) if len(w) >= 3]
+
+
+def sentences(text):
+    """Split free text (e.g. a D3 answer) into trimmed, non-empty sentences."""
+    return [s.strip(" -•\t") for s in _SENTENCE.split(text or "") if s.strip(" -•\t")]
+
+
+class CauseClassifier:
+    """Term-weight matrix W (vocabulary x category); scores = presence(texts) @ W."""
+
+    def __init__(self, vocab, weights):
+        self.vocab = {t: i for i, t in enumerate(vocab)}
+        self.weights = np.asarray(weights, dtype=np.float32)
+        self.categories = FISHBONE_CATEGORIES
+
+    @classmethod
+    def seed(cls):
+        vocab, rows = [], {}
+        for cat in FISHBONE_CATEGORIES:
+            for stem in tokens(_SEED[cat]):
+                if stem not in rows:
+                    rows[stem] = len(vocab)
+                    vocab.append(stem)
+        weights = np.zeros((len(vocab), len(FISHBONE_CATEGORIES)), dtype=np.float32)
+        for c, cat in enumerate(FISHBONE_CATEGORIES):
+            for stem in set(tokens(_SEED[cat])):
+                weights[rows[stem], c] = 1.0
+        # A stem seeded under several categories is weaker evidence for each
+        weights /= np.maximum(weights.sum(axis=1, keepdims=True), 1.0)
+        return cls(vocab, weights)
+
+    @classmethod
+    def load(cls, path=MODEL_PATH):
+        with np.load(path, allow_pickle=False) as z:
+            if tuple(z["categories"]) != FISHBONE_CATEGORIES:
+                raise ValueError(f"{path}: categories do not match")
+            return cls(list(z["vocab"]), z["weights"])
+
+    def save(self, path=MODEL_PATH):
+        vocab = sorted(self.vocab, key=self.vocab.get)
+        np.savez_compressed(path, vocab=np.array(vocab), weights=self.weights,
+                            categories=np.array(FISHBONE_CATEGORIES))
+
+    def scores(self, texts):
+        """(len(texts), 6) category scores, one batched matrix product."""
+        rows, cols = [], []
+        for r, text in enumerate(texts):
+            for t in set(tokens(text)):
+                i = self.vocab.get(t)
+                if i is not None:
+                    rows.append(r)
+                    cols.append(i)
+        x = np.zeros((len(texts), len(self.vocab)), dtype=np.float32)
+        x[rows, cols] = 1.0
+        return x @ self.weights
+
+    def classify(self, texts):
+        """Best category per text, or None when the evidence is weak or ambiguous."""
+        if not texts:
+            return []
+        s = self.scores(texts)
+        order = np.argsort(s, axis=1)
+        best = s[np.arange(len(texts)), order[:, -1]]
+        second = s[np.arange(len(texts)), order[:, -2]]
+        ok = (best >= MIN_SCORE) & (best - second >= MIN_MARGIN * best)
+        return [self.categories[j] if k else None for j, k in zip(order[:, -1], ok)]
+
+    def propose(self, texts, fishbone):
+        """{category: [text, ...]} for classifiable texts not already on the fishbone."""
+        present = {c.strip().casefold() for causes in fishbone.values() for c in causes if c.strip()}
+        seen = set()
+        todo = []
+        for t in texts:
+            key = t.strip().casefold()
+            if key and key not in present and key not in seen:
+                seen.add(key)
+                todo.append(t.strip())
+        out = {}
+        for text, cat in zip(todo, self.classify(todo)):
+            if cat is not None:
+                out.setdefault(cat, []).append(text)
+        return out
+
+
+def train(examples, base=None, prior=SEED_PRIOR):
+    """Fit term weights from labeled (category, text) pairs, e.g. stored fishbone causes.
+
+    Weights are smoothed log-odds of a stem appearing under a category versus
+    the others; the seed lexicon enters as `prior` pseudo-examples per stem, so
+    a small archive refines it rather than replacing it.
+    """
+    base = base or CauseClassifier.seed()
+    n_cat = len(FISHBONE_CATEGORIES)
+    col = {c: j for j, c in enumerate(FISHBONE_CATEGORIES)}
+    vocab = dict(base.vocab)
+    docs = []
+    for cat, text in examples:
+        if cat in col:
+            stems = set(tokens(text))
+            for t in stems:
+                vocab.setdefault(t, len(vocab))
+            docs.append((col[cat], stems))
+    counts = np.zeros((len(vocab), n_cat), dtype=np.float64)
+    counts[:len(base.vocab)] = prior * base.weights
+    per_cat = np.full(n_cat, prior, dtype=np.float64)
+    for j, stems in docs:
+        per_cat[j] += 1
+        for t in stems:
+            counts[vocab[t], j] += 1
+    p_in = (counts + 0.1) / (per_cat + 0.2)
+    p_out = (counts.sum(axis=1, keepdims=True) - counts + 0.1) / (per_cat.sum() - per_cat + 0.2)
+    weights = np.maximum(np.log(p_in / p_out), 0.0)
+    # Stems seen fewer than twice carry no reliable signal
+    weights[counts.sum(axis=1) < 2] = 0.0
+    keep = weights.any(axis=1)
+    order = sorted(vocab, key=vocab.get)
+    return CauseClassifier([t for t, k in zip(order, keep) if k], weights[keep].astype(np.float32))
+
+
+_model = None
+_model_lock = threading.Lock()
+
+
+def get_classifier():
+    """The process-wide classifier: trained weights at MODEL_PATH if present, else the seed lexicon."""
+    global _model
+    with _model_lock:
+        if _model is None:
+            _model = CauseClassifier.load() if os.path.exists(MODEL_PATH) else CauseClassifier.seed()
+        return _model
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Train the fishbone cause classifier from stored reports.")
+    ap.add_argument("command", choices=["train"])
+    ap.add_argument("--db", help="store path (default: NPQP_DB_PATH or npqp_8d.sqlite3)")
+    ap.add_argument("--out", default=MODEL_PATH)
+    args = ap.parse_args(argv)
+
+    from report_store import ReportStore, get_store
+    store = ReportStore(args.db) if args.db else get_store()
+    examples = list(store.labeled_causes())
+    model = train(examples)
+    model.save(args.out)
+    print(f"trained on {len(examples)} causes: {len(model.vocab)} terms -> {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
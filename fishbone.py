@@ -0,0 +1,108 @@
+# ===========================
+# 8D Report — Fishbone Renderer
+# Ishikawa layout -> SVG/PNG + process-wide LRU cache of the rendered bytes
+# ===========================
+
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+
+from ishikawa import layout_ishikawa, layout_to_svg, layout_to_png
+
+FORMATS = {"png": "image/png", "svg": "image/svg+xml"}
+
+
+# ---------- LRU cache ----------
+class RenderCache:
+    """Bounded, thread-safe LRU of rendered diagram bytes with hit/miss/eviction counters."""
+
+    def __init__(self, maxsize=128):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            data = self._data.get(key)
+            if data is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return data
+
+    def put(self, key, data):
+        with self._lock:
+            self._data[key] = data
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "bytes": sum(len(v) for v in self._data.values()),
+            }
+
+
+render_cache = RenderCache()
+
+
+def fishbone_key(fishbone, language, labels, fmt="svg"):
+    """Content hash of everything that affects the rendered diagram."""
+    payload = json.dumps(
+        {"fb": {k: list(v) for k, v in fishbone.items()}, "lang": language, "labels": list(labels), "fmt": fmt},
+        sort_keys=True, ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+# ---------- Rendering ----------
+def _draw(fishbone, labels, center_text, fmt):
+    layout = layout_ishikawa(fishbone, labels, center_text)
+    if fmt == "svg":
+        return layout_to_svg(layout).encode("utf-8")
+    return layout_to_png(layout)
+
+
+def render_report_fishbone(report, fmt="png"):
+    """Render a report dict's fishbone in the report's own language; None when it has no causes."""
+    if not any(c.strip() for causes in report["fishbone"].values() for c in causes):
+        return None
+    from catalog import T
+    from report_model import category_labels
+
+    lang = report.get("language", "en")
+    return render_fishbone(report["fishbone"], "Español" if lang == "es" else "English",
+                           category_labels(T[lang]), fmt=fmt)
+
+
+def render_fishbone(fishbone, language, labels, fmt="svg"):
+    """Return the fishbone diagram as PNG/SVG bytes, served from the cache when possible.
+
+    `labels` are the localized category names, in the order of ishikawa.CATEGORIES.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unsupported fishbone format: {fmt}")
+    key = fishbone_key(fishbone, language, labels, fmt)
+    data = render_cache.get(key)
+    if data is None:
+        center_text = "Problem" if language == "English" else "Problema"
+        data = _draw(fishbone, labels, center_text, fmt)
+        render_cache.put(key, data)
+    return data
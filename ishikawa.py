@@ -0,0 +1,254 @@
+# ===========================
+# 8D Report — Ishikawa Layout Engine
+# Spine + angled category bones + cause sub-bones, laid out without overlaps.
+# Emits SVG directly (no matplotlib); PNG rasterization is optional and lazy.
+# ===========================
+
+import io
+import math
+import struct
+from xml.sax.saxutils import escape, quoteattr
+
+# Internal category keys, in display order: first three above the spine, last three below
+CATEGORIES = (
+    "People",
+    "Process/Method",
+    "Machine/Equipment",
+    "Material/Components",
+    "Environment",
+    "Measurement/Test",
+)
+
+FONT_FAMILY = "DejaVu Sans, Verdana, sans-serif"
+CAUSE_SIZE = 11
+LABEL_SIZE = 13
+HEAD_SIZE = 15
+LINE_H = 1.3            # line height, in font sizes
+BONE_ANGLE = 60         # degrees between category bone and spine
+MAX_CAUSE_W = 220       # wrap cause text beyond this width (px)
+MARGIN = 24
+COL_GAP = 28            # clearance between neighbouring bone columns
+SUB_PAD = 6             # gap between a sub-bone's text and its category bone
+MAX_PNG_PIXELS = 16_000_000   # raster budget (~64 MB RGBA); large diagrams get a lower dpi
+MIN_TEXT_PX = 4.0       # text smaller than this in the bitmap is drawn as a grey bar (it is unreadable anyway)
+
+# ---------- Text measurement ----------
+# Approximate advance widths (in em) for a DejaVu Sans / Verdana-like face
+_NARROW = set("iljtfrI.,:;!|'`()[]{} ")
+_WIDE = set("mwMW@%&")
+
+
+def text_width(text, size):
+    """Estimated rendered width of `text` in px at font `size`."""
+    w = 0.0
+    for ch in text:
+        if ch in _NARROW:
+            w += 0.36
+        elif ch in _WIDE:
+            w += 0.98
+        elif ch.isupper() or ch.isdigit():
+            w += 0.72
+        else:
+            w += 0.62
+    return w * size
+
+
+def wrap_text(text, size, max_w):
+    """Greedy word wrap by measured width; over-long words are hard-split."""
+    lines, cur = [], ""
+    for word in text.split():
+        cand = f"{cur} {word}" if cur else word
+        if text_width(cand, size) <= max_w:
+            cur = cand
+            continue
+        if cur:
+            lines.append(cur)
+        while text_width(word, size) > max_w:
+            cut = max(1, int(len(word) * max_w / text_width(word, size)))
+            lines.append(word[:cut])
+            word = word[cut:]
+        cur = word
+    if cur:
+        lines.append(cur)
+    return lines or [""]
+
+
+# ---------- Layout ----------
+def _branch(label, causes):
+    """Lay out one category branch relative to its bone base at (0, 0), growing away from the spine.
+
+    Returns (items, extent, depth, label_w): cause items with the distance of
+    their text block from the spine (`v`) and its height (`block`), how far
+    the causes reach left of the base, minimum bone depth and label box width.
+    """
+    cot = 1.0 / math.tan(math.radians(BONE_ANGLE))
+    line_h = CAUSE_SIZE * LINE_H
+    items = []
+    v = line_h  # first cause sits one line off the spine
+    extent = 0.0
+    for cause in causes:
+        lines = wrap_text(cause, CAUSE_SIZE, MAX_CAUSE_W)
+        tw = max(text_width(ln, CAUSE_SIZE) for ln in lines)
+        block = (len(lines) - 1) * line_h + CAUSE_SIZE + 4
+        # Keep the text block clear of the slanted bone across its full height
+        tx = -(v + block) * cot - SUB_PAD
+        items.append({"v": v, "block": block, "tx": tx, "lines": lines, "tw": tw})
+        extent = max(extent, -(tx - tw))
+        v += block + CAUSE_SIZE * 0.4
+    label_w = text_width(label, LABEL_SIZE) + 12
+    # Long enough that the label box at the tip never pokes right of the base
+    depth = max(v + LABEL_SIZE * 0.6, (label_w / 2) / cot)
+    return items, extent, depth, label_w
+
+
+def layout_ishikawa(fishbone, labels, head_text):
+    """Compute an Ishikawa diagram layout.
+
+    `fishbone` maps internal category keys to cause lists, `labels` are the
+    localized category names in CATEGORIES order. Returns a dict with the
+    canvas size and flat `lines`/`texts`/`boxes` primitives in px (y down),
+    usable by any backend (SVG, PNG, XLSX image).
+    """
+    branches = []
+    for key, label in zip(CATEGORIES, labels):
+        causes = [c.strip() for c in fishbone.get(key, []) if c and c.strip()]
+        branches.append((label, causes) + _branch(label, causes))
+
+    cot = 1.0 / math.tan(math.radians(BONE_ANGLE))
+    # Bones on the same side share one depth so the label row lines up
+    side_depth = [max(b[4] for b in branches[:3]), max(b[4] for b in branches[3:])]
+    spine_y = MARGIN + side_depth[0] + LABEL_SIZE * LINE_H
+
+    # Column positions: each column's content stays left of its base, clear of the previous column
+    bases = []
+    x = MARGIN
+    for col in range(3):
+        extent = 0.0
+        for side, b in enumerate((branches[col], branches[col + 3])):
+            extent = max(extent, b[3], side_depth[side] * cot + b[5] / 2)
+        x += extent
+        bases.append(x)
+        x += COL_GAP
+
+    head_lines = wrap_text(head_text, HEAD_SIZE, 160)
+    head_w = max(text_width(ln, HEAD_SIZE) for ln in head_lines) + 24
+    head_h = HEAD_SIZE * LINE_H * len(head_lines) + 16
+    spine_end = x + 12
+    width = spine_end + head_w + MARGIN
+    height = spine_y + side_depth[1] + LABEL_SIZE * LINE_H + MARGIN
+
+    lines, texts, boxes = [], [], []
+    lines.append({"x1": MARGIN / 2, "y1": spine_y, "x2": spine_end, "y2": spine_y, "w": 3})
+    boxes.append({"x": spine_end, "y": spine_y - head_h / 2, "w": head_w, "h": head_h, "fill": "#FFE4E1"})
+    hy = spine_y - head_h / 2 + 8 + HEAD_SIZE
+    for ln in head_lines:
+        texts.append({"x": spine_end + head_w / 2, "y": hy, "text": ln, "size": HEAD_SIZE,
+                      "anchor": "middle", "bold": True})
+        hy += HEAD_SIZE * LINE_H
+
+    for idx, (label, causes, items, extent, depth, label_w) in enumerate(branches):
+        base_x = bases[idx % 3]
+        sign = -1 if idx < 3 else 1  # top branches grow upward
+        depth = side_depth[idx // 3]
+        tip_x, tip_y = base_x - depth * cot, spine_y + sign * depth
+        lines.append({"x1": base_x, "y1": spine_y, "x2": tip_x, "y2": tip_y, "w": 2})
+        lh = LABEL_SIZE * LINE_H
+        box_y = tip_y - lh if sign < 0 else tip_y
+        boxes.append({"x": tip_x - label_w / 2, "y": box_y, "w": label_w, "h": lh, "fill": "#E8F0FE"})
+        texts.append({"x": tip_x, "y": box_y + LABEL_SIZE, "text": label, "size": LABEL_SIZE,
+                      "anchor": "middle", "bold": True})
+        for it in items:
+            # Text always sits on top of its sub-bone; below the spine the sub-bone is the block's far edge
+            dist = it["v"] if sign < 0 else it["v"] + it["block"]
+            px, py = base_x - dist * cot, spine_y + sign * dist
+            tx = base_x + it["tx"]
+            lines.append({"x1": px, "y1": py, "x2": tx - it["tw"], "y2": py, "w": 1})
+            ty = py - 3 - (len(it["lines"]) - 1) * CAUSE_SIZE * LINE_H
+            for ln in it["lines"]:
+                texts.append({"x": tx, "y": ty, "text": ln, "size": CAUSE_SIZE,
+                              "anchor": "end", "bold": False})
+                ty += CAUSE_SIZE * LINE_H
+
+    return {"width": math.ceil(width), "height": math.ceil(height),
+            "lines": lines, "texts": texts, "boxes": boxes}
+
+
+# ---------- Backends ----------
+def layout_to_svg(layout):
+    """Serialize a layout to a standalone SVG document (str)."""
+    out = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{layout["width"]}" height="{layout["height"]}" '
+        f'viewBox="0 0 {layout["width"]} {layout["height"]}" font-family={quoteattr(FONT_FAMILY)}>',
+        '<rect width="100%" height="100%" fill="#FFFFFF"/>',
+    ]
+    for b in layout["boxes"]:
+        out.append(f'<rect x="{b["x"]:.1f}" y="{b["y"]:.1f}" width="{b["w"]:.1f}" height="{b["h"]:.1f}" '
+                   f'rx="4" fill="{b["fill"]}" stroke="#333333"/>')
+    for ln in layout["lines"]:
+        out.append(f'<line x1="{ln["x1"]:.1f}" y1="{ln["y1"]:.1f}" x2="{ln["x2"]:.1f}" y2="{ln["y2"]:.1f}" '
+                   f'stroke="#333333" stroke-width="{ln["w"]}"/>')
+    for t in layout["texts"]:
+        weight = ' font-weight="bold"' if t["bold"] else ""
+        out.append(f'<text x="{t["x"]:.1f}" y="{t["y"]:.1f}" font-size="{t["size"]}" '
+                   f'text-anchor="{t["anchor"]}"{weight}>{escape(t["text"])}</text>')
+    out.append("</svg>")
+    return "\n".join(out)
+
+
+def layout_to_png(layout, dpi=144):
+    """Rasterize a layout to PNG bytes (imports matplotlib on first use).
+
+    `dpi` is lowered as needed to keep the bitmap within MAX_PNG_PIXELS; the
+    dpi actually used is recorded in the PNG (see png_scale). At a dpi that low,
+    text under MIN_TEXT_PX is greeked: one bar per line, in a single collection,
+    instead of thousands of glyph runs nobody could read.
+    """
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.collections import LineCollection
+    from matplotlib.patches import FancyBboxPatch
+
+    w, h = layout["width"], layout["height"]
+    dpi = min(dpi, 72 * math.sqrt(MAX_PNG_PIXELS / max(w * h, 1)))
+    # 72 px per inch, so layout px map 1:1 onto font points
+    fig = Figure(figsize=(w / 72, h / 72), dpi=72)
+    FigureCanvasAgg(fig)
+    try:
+        ax = fig.add_axes((0, 0, 1, 1))
+        ax.set_xlim(0, w)
+        ax.set_ylim(h, 0)
+        ax.axis('off')
+        for b in layout["boxes"]:
+            ax.add_patch(FancyBboxPatch((b["x"], b["y"]), b["w"], b["h"], boxstyle="round,pad=0,rounding_size=4",
+                                        facecolor=b["fill"], edgecolor="#333333", linewidth=0.8))
+        ax.add_collection(LineCollection([((ln["x1"], ln["y1"]), (ln["x2"], ln["y2"])) for ln in layout["lines"]],
+                                         colors="#333333", linewidths=[ln["w"] * 0.75 for ln in layout["lines"]],
+                                         capstyle="projecting"), autolim=False)
+        align = {"start": "left", "middle": "center", "end": "right"}
+        shift = {"start": 0.0, "middle": 0.5, "end": 1.0}
+        bars, bar_w = [], []
+        for t in layout["texts"]:
+            if t["size"] * dpi / 72 >= MIN_TEXT_PX:
+                ax.text(t["x"], t["y"], t["text"], fontsize=t["size"], ha=align[t["anchor"]], va="baseline",
+                        fontfamily="DejaVu Sans", fontweight="bold" if t["bold"] else "normal")
+                continue
+            x0 = t["x"] - shift[t["anchor"]] * text_width(t["text"], t["size"])
+            y = t["y"] - 0.35 * t["size"]
+            bars.append(((x0, y), (x0 + text_width(t["text"], t["size"]), y)))
+            bar_w.append(0.5 * t["size"])
+        if bars:
+            ax.add_collection(LineCollection(bars, colors="#999999", linewidths=bar_w), autolim=False)
+        buf = io.BytesIO()
+        fig.savefig(buf, format="png", dpi=dpi)
+        return buf.getvalue()
+    finally:
+        fig.clear()
+
+
+def png_scale(png):
+    """Bitmap pixels per layout px of a layout_to_png image, from its pHYs chunk (1.0 if absent)."""
+    i = png.find(b"pHYs", 8, 4096)
+    if i < 0:
+        return 1.0
+    per_metre, _, unit = struct.unpack(">IIB", png[i + 4:i + 13])
+    return per_metre * 0.0254 / 72 if unit == 1 and per_metre else 1.0
@@ -0,0 +1,223 @@
+# ===========================
+# 8D Training App — Background Jobs
+# Process-wide bounded worker pools: one for exports and renders, one for coach
+# streams (which mostly wait on the network and must not hold the others' workers).
+# Sessions keep job ids; identical in-flight jobs are shared; a full queue
+# rejects new work instead of piling it up.
+# ===========================
+
+import itertools
+import queue
+import threading
+import time
+
+MAX_WORKERS = 4
+MAX_QUEUE = 32            # queued (not yet running) jobs before submit() refuses
+RESULT_TTL = 600.0        # seconds a finished job stays available for pickup
+
+QUEUED, RUNNING, DONE, FAILED, CANCELLED = "queued", "running", "done", "failed", "cancelled"
+FINISHED = (DONE, FAILED, CANCELLED)
+
+
+class JobQueueFull(Exception):
+    """Raised by submit() when the queue is at capacity (back-pressure)."""
+
+
+class JobCancelled(Exception):
+    """Raised inside a job function by Job.report()/check() once the job is cancelled."""
+
+
+class Job:
+    """One unit of background work. Read `state`, `progress`, `message`, `result`, `error`."""
+
+    def __init__(self, job_id, key, kind, fn, args, kwargs):
+        self.id = job_id
+        self.key = key
+        self.kind = kind
+        self.state = QUEUED
+        self.progress = 0.0
+        self.message = ""
+        self.partial = None        # incremental output, e.g. streamed coach text
+        self.result = None
+        self.error = None
+        self.created = time.monotonic()
+        self.started = None
+        self.finished = None
+        self.holders = 1           # sessions holding a handle; cancelled when all let go
+        self._fn, self._args, self._kwargs = fn, args, kwargs
+        self._cancel = threading.Event()
+        self._finished = threading.Event()
+        self._on_cancel = []
+
+    @property
+    def done(self):
+        return self.state in FINISHED
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    def wait(self, timeout=None):
+        """Block up to `timeout` seconds for the job to finish; returns whether it has."""
+        return self._finished.wait(timeout)
+
+    def check(self):
+        if self._cancel.is_set():
+            raise JobCancelled()
+
+    def report(self, progress=None, message=None, partial=None):
+        """Called by the job function; also the cooperative cancellation point."""
+        self.check()
+        if progress is not None:
+            self.progress = max(0.0, min(1.0, progress))
+        if message is not None:
+            self.message = message
+        if partial is not None:
+            self.partial = partial
+
+    def on_cancel(self, fn):
+        """Register `fn()` to interrupt blocking work (e.g. close a network stream) on cancel."""
+        self._on_cancel.append(fn)
+        if self._cancel.is_set():
+            fn()
+
+    def _request_cancel(self):
+        self._cancel.set()
+        for fn in self._on_cancel:
+            try:
+                fn()
+            except Exception:
+                pass
+
+
+class JobExecutor:
+    """Bounded pool of daemon worker threads shared by every session.
+
+    Work here is openpyxl, SVG/PNG layout and network I/O: threads keep the
+    script thread free and results stay in-process (no pickling of bytes or
+    streams), while the bounded queue caps how much CPU all sessions can claim.
+    """
+
+    def __init__(self, max_workers=MAX_WORKERS, max_queue=MAX_QUEUE, result_ttl=RESULT_TTL):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.result_ttl = result_ttl
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._jobs = {}            # id -> Job
+        self._by_key = {}          # dedup key -> id (queued, running or done within TTL)
+        self._lock = threading.Lock()
+        self._threads = []
+        self.submitted = 0
+        self.deduped = 0
+        self.rejected = 0
+
+    def _start_workers(self):
+        while len(self._threads) < self.max_workers:
+            t = threading.Thread(target=self._work, name=f"job-worker-{len(self._threads)}", daemon=True)
+            t.start()
+            self._threads.append(t)
+
+    def _prune(self):
+        now = time.monotonic()
+        for job_id in [j.id for j in self._jobs.values() if j.done and now - j.finished > self.result_ttl]:
+            job = self._jobs.pop(job_id)
+            if self._by_key.get(job.key) == job_id:
+                del self._by_key[job.key]
+
+    def submit(self, kind, fn, *args, key=None, **kwargs):
+        """Queue `fn(job, *args, **kwargs)`; returns the Job.
+
+        With `key`, an identical job that is queued, running or recently done is
+        returned instead of starting a new one. Raises JobQueueFull when full.
+        """
+        with self._lock:
+            self._prune()
+            if key is not None:
+                existing = self._jobs.get(self._by_key.get(key))
+                if existing is not None and existing.state not in (FAILED, CANCELLED) and not existing.cancelled:
+                    existing.holders += 1
+                    self.deduped += 1
+                    return existing
+            job = Job(next(_job_ids), key, kind, fn, args, kwargs)
+            try:
+                self._queue.put_nowait(job)
+            except queue.Full:
+                self.rejected += 1
+                raise JobQueueFull(f"{self._queue.qsize()} jobs waiting")
+            self._jobs[job.id] = job
+            if key is not None:
+                self._by_key[key] = job.id
+            self.submitted += 1
+            self._start_workers()
+            return job
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def release(self, job_id):
+        """Drop one session's handle; the job is cancelled once nobody holds it."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job.done:
+                return
+            job.holders -= 1
+            if job.holders > 0:
+                return
+            if job.state == QUEUED:
+                job.state, job.finished = CANCELLED, time.monotonic()
+                job._finished.set()
+        job._request_cancel()
+
+    def _work(self):
+        while True:
+            job = self._queue.get()
+            try:
+                with self._lock:
+                    if job.state != QUEUED:
+                        continue
+                    job.state, job.started = RUNNING, time.monotonic()
+                try:
+                    result = job._fn(job, *job._args, **job._kwargs)
+                    job.check()
+                    job.result, job.progress, state = result, 1.0, DONE
+                except JobCancelled:
+                    state = CANCELLED
+                except Exception as e:
+                    job.error, state = e, FAILED
+                    if job.cancelled:
+                        state = CANCELLED
+                with self._lock:
+                    job.state, job.finished = state, time.monotonic()
+                    job._fn = job._args = job._kwargs = None
+                job._finished.set()
+            finally:
+                self._queue.task_done()
+
+    def stats(self):
+        with self._lock:
+            states = [j.state for j in self._jobs.values()]
+            return {
+                "workers": len(self._threads),
+                "max_workers": self.max_workers,
+                "queued": states.count(QUEUED),
+                "running": states.count(RUNNING),
+                "finished": sum(s in FINISHED for s in states),
+                "max_queue": self.max_queue,
+                "submitted": self.submitted,
+                "deduped": self.deduped,
+                "rejected": self.rejected,
+            }
+
+
+_job_ids = itertools.count(1)    # unique across executors
+_executors = {}
+_executor_lock = threading.Lock()
+
+
+def get_executor(name="work", max_workers=MAX_WORKERS):
+    """The process-wide executor `name`, created on first use ("work": exports and renders)."""
+    with _executor_lock:
+        if name not in _executors:
+            _executors[name] = JobExecutor(max_workers=max_workers)
+        return _executors[name]
@@ -0,0 +1,359 @@
+# ===========================
+# 8D Training App — Metrics
+# Timing spans, counters and gauges for the script's hot paths, exposed in
+# Prometheus text format on a local endpoint and/or a textfile.
+# Off unless NPQP_METRICS=1: disabled spans are a shared no-op context.
+# NPQP_PROFILE_SLOW_MS=<ms> also samples reruns and dumps slow ones as
+# folded stacks (flamegraph.pl / speedscope input) under NPQP_PROFILE_DIR.
+# ===========================
+
+import bisect
+import contextlib
+import functools
+import os
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ENABLED = os.environ.get("NPQP_METRICS", "") not in ("", "0", "false")
+PORT = int(os.environ.get("NPQP_METRICS_PORT", "0"))        # 0: no HTTP endpoint
+TEXTFILE = os.environ.get("NPQP_METRICS_FILE", "")          # e.g. node_exporter textfile collector
+TEXTFILE_INTERVAL = 5.0   # seconds between textfile rewrites
+PROFILE_SLOW_MS = float(os.environ.get("NPQP_PROFILE_SLOW_MS", "0"))   # 0: no profiling
+PROFILE_DIR = os.environ.get("NPQP_PROFILE_DIR", "profiles")
+PROFILE_INTERVAL = 0.005  # seconds between stack samples
+PROFILE_MAX_S = 120.0     # a run never stopped (script interrupted) is dropped after this
+PROFILE_KEEP = 50         # newest dumps kept
+SESSION_IDLE = 300.0      # seconds without a rerun before a session stops counting as active
+
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+_NULL = contextlib.nullcontext()
+
+
+def _labels(labels):
+    if not labels:
+        return ""
+    body = ",".join('%s="%s"' % (k, str(v).replace("\\", r"\\").replace('"', r'\"').replace("\n", r"\n"))
+                    for k, v in sorted(labels.items()))
+    return "{" + body + "}"
+
+
+def resident_bytes():
+    """Resident set size of this process (Linux /proc; peak RSS elsewhere)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        import resource
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return rss if sys.platform == "darwin" else rss * 1024
+
+
+class Histogram:
+    """Cumulative-bucket histogram per label set (Prometheus semantics)."""
+
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self.series = {}   # label tuple -> [bucket counts..., +Inf count, sum]
+
+    def observe(self, key, value):
+        s = self.series.get(key)
+        if s is None:
+            s = self.series[key] = [0] * (len(self.buckets) + 1) + [0.0]
+        s[bisect.bisect_left(self.buckets, value)] += 1
+        s[-1] += value
+
+
+class SlowRunProfiler:
+    """Samples script-thread stacks while reruns are in progress.
+
+    One daemon thread takes a sample of every active run each PROFILE_INTERVAL;
+    when a run ends above the threshold its samples are written as folded stacks.
+    Runs never stopped (the script was interrupted) are dropped when their thread
+    is gone or after PROFILE_MAX_S.
+    """
+
+    def __init__(self, threshold_ms, out_dir=PROFILE_DIR, interval=PROFILE_INTERVAL):
+        self.threshold = threshold_ms / 1000
+        self.out_dir = out_dir
+        self.interval = interval
+        self._runs = {}    # thread id -> (started, Counter of folded stacks)
+        self._lock = threading.Lock()
+        self._thread = None
+        self.dumps = 0
+
+    def start(self, tid):
+        with self._lock:
+            self._runs[tid] = (time.perf_counter(), Counter())
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._sample, name="rerun-profiler", daemon=True)
+                self._thread.start()
+
+    def stop(self, tid, name):
+        with self._lock:
+            run = self._runs.pop(tid, None)
+        if run is None:
+            return None
+        elapsed = time.perf_counter() - run[0]
+        if elapsed < self.threshold or not run[1]:
+            return None
+        return self._dump(name, elapsed, run[1])
+
+    def _sample(self):
+        me = threading.get_ident()
+        while True:
+            time.sleep(self.interval)
+            with self._lock:
+                if not self._runs:
+                    continue
+                frames = sys._current_frames()
+                now = time.perf_counter()
+                for tid, (started, stacks) in list(self._runs.items()):
+                    frame = frames.get(tid)
+                    if frame is None or tid == me or now - started > PROFILE_MAX_S:
+                        del self._runs[tid]
+                        continue
+                    stack = []
+                    while frame is not None:
+                        code = frame.f_code
+                        stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                        frame = frame.f_back
+                    stacks[";".join(reversed(stack))] += 1
+
+    def _dump(self, name, elapsed, stacks):
+        os.makedirs(self.out_dir, exist_ok=True)
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        path = os.path.join(self.out_dir, f"{stamp}-{name}-{elapsed * 1000:.0f}ms.folded")
+        with open(path, "w") as f:
+            for stack, n in stacks.most_common():
+                f.write(f"{stack} {n}\n")
+        self.dumps += 1
+        old = sorted(p for p in os.listdir(self.out_dir) if p.endswith(".folded"))
+        for p in old[:-PROFILE_KEEP]:
+            with contextlib.suppress(OSError):
+                os.remove(os.path.join(self.out_dir, p))
+        return path
+
+
+class _Span:
+    __slots__ = ("metrics", "section", "t0")
+
+    def __init__(self, metrics, section):
+        self.metrics = metrics
+        self.section = section
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+
+    def __exit__(self, *exc):
+        self.metrics.observe_section(self.section, time.perf_counter() - self.t0)
+
+
+class Metrics:
+    """Process-wide registry: section spans, counters, gauges; Prometheus text exposition.
+
+    Spans are histograms of `npqp_section_seconds{section=...}`; reruns add
+    `npqp_rerun_seconds{scope=full|fragment}`. Gauges are callables evaluated
+    only when scraped. With `enabled=False` every call returns immediately.
+    """
+
+    def __init__(self, enabled=ENABLED, profile_slow_ms=PROFILE_SLOW_MS):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._counters = {}     # (name, label tuple) -> value
+        self._help = {}
+        self._sections = Histogram()
+        self._reruns = Histogram()
+        self._gauges = {}       # name -> (help, fn, label names)
+        self._sessions = {}     # session id -> last seen (monotonic)
+        self._run_start = {}    # thread id -> (scope, perf_counter)
+        self.profiler = SlowRunProfiler(profile_slow_ms) if enabled and profile_slow_ms > 0 else None
+        self._textfile_at = 0.0
+        self.server = None
+        if enabled:
+            self.gauge("npqp_process_resident_bytes", "Resident memory of the app process.", resident_bytes)
+            self.gauge("npqp_sessions", f"Sessions with a rerun in the last {SESSION_IDLE:.0f}s.",
+                       self._active_sessions)
+
+    # ---------- recording ----------
+    def span(self, section):
+        """Context manager timing one script section."""
+        if not self.enabled:
+            return _NULL
+        return _Span(self, section)
+
+    def observe_section(self, section, seconds):
+        with self._lock:
+            self._sections.observe((("section", section),), seconds)
+
+    def timed(self, section):
+        """Decorator form of span(); returns `fn` unchanged when disabled."""
+        def wrap(fn):
+            if not self.enabled:
+                return fn
+
+            @functools.wraps(fn)
+            def inner(*args, **kwargs):
+                with _Span(self, section):
+                    return fn(*args, **kwargs)
+            return inner
+        return wrap
+
+    def inc(self, name, n=1, help="", **labels):
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + n
+            if help:
+                self._help.setdefault(name, help)
+
+    def gauge(self, name, help, fn, labels=()):
+        """Register `fn()` -> number, or -> {label value(s): number} for the label names `labels`."""
+        with self._lock:
+            self._gauges[name] = (help, fn, tuple(labels))
+
+    def touch_session(self, session_id):
+        if self.enabled:
+            with self._lock:
+                self._sessions[session_id] = time.monotonic()
+
+    def _active_sessions(self):
+        cutoff = time.monotonic() - SESSION_IDLE
+        with self._lock:
+            for sid in [s for s, t in self._sessions.items() if t < cutoff]:
+                del self._sessions[sid]
+            return len(self._sessions)
+
+    # ---------- reruns ----------
+    def start_rerun(self, scope="full"):
+        """Mark the start of a rerun on this thread (a flat script can't wrap itself in `with`)."""
+        if not self.enabled:
+            return
+        tid = threading.get_ident()
+        self._run_start[tid] = (scope, time.perf_counter())
+        if self.profiler is not None:
+            self.profiler.start(tid)
+
+    def end_rerun(self):
+        """Record the rerun started on this thread; an interrupted run is simply never ended."""
+        if not self.enabled:
+            return
+        tid = threading.get_ident()
+        started = self._run_start.pop(tid, None)
+        if started is None:
+            return
+        scope, t0 = started
+        dt = time.perf_counter() - t0
+        with self._lock:
+            self._reruns.observe((("scope", scope),), dt)
+        self.inc("npqp_reruns_total", help="Script reruns.", scope=scope)
+        if self.profiler is not None:
+            self.profiler.stop(tid, scope)
+        if TEXTFILE and time.monotonic() - self._textfile_at >= TEXTFILE_INTERVAL:
+            self._textfile_at = time.monotonic()
+            self.write_textfile(TEXTFILE)
+
+    @contextlib.contextmanager
+    def rerun(self, scope):
+        self.start_rerun(scope)
+        try:
+            yield
+        finally:
+            self.end_rerun()
+
+    # ---------- exposition ----------
+    def exposition(self):
+        """All metrics in the Prometheus text format (version 0.0.4)."""
+        out = []
+        with self._lock:
+            for name, help, hist, label in (
+                ("npqp_section_seconds", "Time spent in each script section.", self._sections, "section"),
+                ("npqp_rerun_seconds", "Script rerun duration.", self._reruns, "scope"),
+            ):
+                out += [f"# HELP {name} {help}", f"# TYPE {name} histogram"]
+                for key, s in sorted(hist.series.items()):
+                    labels = dict(key)
+                    cum = 0
+                    for le, n in zip(hist.buckets + (float("inf"),), s[:-1]):
+                        cum += n
+                        le = "+Inf" if le == float("inf") else repr(le)
+                        out.append(f"{name}_bucket{_labels({**labels, 'le': le})} {cum}")
+                    out.append(f"{name}_sum{_labels(labels)} {s[-1]:.6f}")
+                    out.append(f"{name}_count{_labels(labels)} {cum}")
+            by_name = {}
+            for (name, labels), v in sorted(self._counters.items()):
+                by_name.setdefault(name, []).append((dict(labels), v))
+            for name, series in by_name.items():
+                out += [f"# HELP {name} {self._help.get(name, name)}", f"# TYPE {name} counter"]
+                out += [f"{name}{_labels(labels)} {v}" for labels, v in series]
+            gauges = list(self._gauges.items())
+        for name, (help, fn, label_names) in gauges:
+            try:
+                value = fn()
+            except Exception:
+                continue
+            out += [f"# HELP {name} {help}", f"# TYPE {name} gauge"]
+            if isinstance(value, dict):
+                for k, v in value.items():
+                    labels = dict(zip(label_names, k if isinstance(k, tuple) else (k,)))
+                    out.append(f"{name}{_labels(labels)} {v}")
+            else:
+                out.append(f"{name} {value}")
+        return "\n".join(out) + "\n"
+
+    def write_textfile(self, path):
+        """Atomically (re)write the exposition to `path`."""
+        d = os.path.dirname(os.path.abspath(path))
+        fd, tmp = tempfile.mkstemp(dir=d, prefix=".metrics-")
+        with os.fdopen(fd, "w") as f:
+            f.write(self.exposition())
+        os.replace(tmp, path)
+
+    def serve(self, port=PORT, host="127.0.0.1"):
+        """Serve /metrics on a daemon thread; returns the server (None if the port is taken)."""
+        registry = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] not in ("/", "/metrics"):
+                    self.send_error(404)
+                    return
+                body = registry.exposition().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", CONTENT_TYPE)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        try:
+            self.server = ThreadingHTTPServer((host, port), Handler)
+        except OSError as e:
+            # e.g. a second app process on the same host: it simply isn't scraped
+            print(f"metrics: cannot listen on {host}:{port}: {e}", file=sys.stderr)
+            return None
+        threading.Thread(target=self.server.serve_forever, name="metrics-http", daemon=True).start()
+        return self.server
+
+
+_metrics = None
+_metrics_lock = threading.Lock()
+
+
+def get_metrics():
+    """The process-wide registry; starts the endpoint on first use if NPQP_METRICS_PORT is set."""
+    global _metrics
+    with _metrics_lock:
+        if _metrics is None:
+            _metrics = Metrics()
+            if _metrics.enabled and PORT:
+                _metrics.serve(PORT)
+        return _metrics
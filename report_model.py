@@ -0,0 +1,280 @@
+# ===========================
+# 8D Training App — Report Model
+# Language-neutral report dict <-> st.session_state, keyed by stable step IDs (D1..D8)
+# ===========================
+
+import datetime
+
+from catalog import T
+from ishikawa import CATEGORIES
+from why_tree import WhyTree, chain_parents, clean_parents
+
+STEP_IDS = ("D1", "D2", "D3", "D4", "D5", "D6", "D7", "D8")
+STATUS_CODES = ("not_started", "in_progress", "done")
+FISHBONE_CATEGORIES = CATEGORIES      # the layout engine's order: first three above the spine
+INFO_FIELDS = ("report_date", "prepared_by", "product", "customer")
+
+# Widget keys holding report data; cleared on load so widgets re-read their `value=`
+INFO_WIDGET_KEYS = {"report_date": "rp_date", "prepared_by": "rp_by", "product": "rp_prod", "customer": "rp_cust"}
+_WIDGET_PREFIXES = ("ans_", "own_", "due_", "st_", "why_", "fb_")
+WHY_KINDS = ("occ", "det")
+REMOVED = object()      # delta value of a field that no longer exists (e.g. a removed Why)
+# Session keys holding the report model itself (see session_model)
+STATE_KEYS = ("answers", "owners", "dues", "status", "d5_occ", "d5_det", "d5_root", "fishbone")
+
+# Both EN and ES status labels map onto one canonical code
+_STATUS_BY_LABEL = {label: STATUS_CODES[i] for lang in T.values() for i, label in enumerate(lang["status_opts"])}
+
+
+def step_id(title):
+    """'D5: Final Analysis' / 'D5: Análisis Final' -> 'D5'."""
+    return title.split(":", 1)[0].strip()
+
+
+def status_code(label):
+    return _STATUS_BY_LABEL.get(label, STATUS_CODES[0])
+
+
+def status_label(code, L):
+    return L["status_opts"][STATUS_CODES.index(code) if code in STATUS_CODES else 0]
+
+
+def category_labels(L):
+    """Localized fishbone category names, in FISHBONE_CATEGORIES order."""
+    return [L[k] for k in ("people", "process", "machine", "material", "environment", "measurement")]
+
+
+def why_parents(report, kind):
+    """Parent positions of the `kind` Whys; reports without them hold a plain chain."""
+    return clean_parents((report.get("why_parents") or {}).get(kind), len(report["whys"].get(kind, [])))
+
+
+def compose_d5(whys, L, parents=None):
+    """The D5 answer as written to the workbook: occurrence and detection Whys under localized headers.
+
+    `whys` maps kind -> WhyTree, or -> pre-order texts with `parents` (None: plain chains).
+    A chain reads one Why per line; branches are indented outline items (see why_tree).
+    """
+    def lines(kind):
+        w = whys.get(kind, [])
+        tree = w if isinstance(w, WhyTree) else WhyTree.from_lists(w, (parents or {}).get(kind))
+        return "\n".join(tree.outline())
+
+    return f"{L['occurrence']}:\n{lines('occ')}\n\n{L['detection']}:\n{lines('det')}"
+
+
+def report_rows(report, L):
+    """Workbook rows (title, answer, root cause, owner, due, status label), titles localized via `L`."""
+    rows = []
+    for title, _, _ in L["npqp_steps"]:
+        sid = step_id(title)
+        st_ = report["steps"].get(sid, {})
+        d5 = sid == "D5"
+        rows.append((title, compose_d5(report["whys"], L, report.get("why_parents")) if d5 else st_.get("answer", ""),
+                     report.get("d5_root", "") if d5 else "", st_.get("owner", ""), st_.get("due"),
+                     status_label(st_.get("status"), L)))
+    return rows
+
+
+def empty_report():
+    return {
+        "info": {f: "" for f in INFO_FIELDS},
+        "language": "en",
+        "steps": {sid: {"answer": "", "owner": "", "due": None, "status": STATUS_CODES[0]} for sid in STEP_IDS},
+        "d5_root": "",
+        "whys": {k: [""] * 5 for k in WHY_KINDS},
+        "why_parents": {k: chain_parents(5) for k in WHY_KINDS},
+        "fishbone": {c: [""] for c in FISHBONE_CATEGORIES},
+    }
+
+
+def _iso(d):
+    return d.isoformat() if isinstance(d, datetime.date) else d
+
+
+def parse_due(value):
+    """A due date from a date/datetime or ISO 'YYYY-MM-DD' text; None for anything else ('TBD', '18/10/2026')."""
+    if isinstance(value, datetime.datetime):
+        return value.date()
+    if isinstance(value, datetime.date):
+        return value
+    if isinstance(value, str) and len(value.strip()) >= 10:
+        try:
+            return datetime.date.fromisoformat(value.strip()[:10])
+        except ValueError:
+            return None
+    return None
+
+
+def due_iso(value):
+    """parse_due(value) as the report dict stores it: 'YYYY-MM-DD' or None."""
+    d = parse_due(value)
+    return d.isoformat() if d else None
+
+
+def _whys_from_trees(trees):
+    whys, parents = {}, {}
+    for kind, tree in trees.items():
+        whys[kind], parents[kind] = tree.to_lists() if tree is not None else ([], [])
+    return {"whys": whys, "why_parents": parents}
+
+
+def report_from_session(ss, L, lang):
+    """Snapshot the report held in session state as a language-neutral dict."""
+    steps = {}
+    for title, _, _ in L["npqp_steps"]:
+        steps[step_id(title)] = {
+            "answer": ss.answers.get(title, ""),
+            "owner": ss.owners.get(title, ""),
+            "due": _iso(ss.dues.get(title)),
+            "status": status_code(ss.status.get(title)),
+        }
+    return {
+        "info": {f: ss.get(INFO_WIDGET_KEYS[f], "") for f in INFO_FIELDS},
+        "language": lang,
+        "steps": steps,
+        "d5_root": ss.get("d5_root", ""),
+        **_whys_from_trees({"occ": ss.get("d5_occ"), "det": ss.get("d5_det")}),
+        "fishbone": {c: list(v) for c, v in ss.get("fishbone", {}).items()},
+    }
+
+
+def session_model(report, L):
+    """The STATE_KEYS values for `report` (titles localized via `L`); widget values are not included."""
+    answers, owners, dues, status = {}, {}, {}, {}
+    for title, _, _ in L["npqp_steps"]:
+        st_ = report["steps"].get(step_id(title), {})
+        answers[title] = st_.get("answer", "")
+        owners[title] = st_.get("owner", "")
+        dues[title] = parse_due(st_.get("due"))
+        status[title] = status_label(st_.get("status"), L)
+    d5_occ, d5_det = (WhyTree.from_lists(report["whys"].get(k) or [""], why_parents(report, k)) for k in WHY_KINDS)
+    return {"answers": answers, "owners": owners, "dues": dues, "status": status, "d5_occ": d5_occ,
+            "d5_det": d5_det, "d5_root": report.get("d5_root", ""),
+            "fishbone": {c: list(report["fishbone"].get(c, [])) or [""] for c in FISHBONE_CATEGORIES}}
+
+
+def load_into_session(ss, report, L):
+    """Replace the session's report state with `report` (titles localized via `L`)."""
+    for key in [k for k in ss.keys() if isinstance(k, str) and k.startswith(_WIDGET_PREFIXES)]:
+        del ss[key]
+    ss.pop("d5root", None)
+    for f, key in INFO_WIDGET_KEYS.items():
+        ss[key] = report["info"].get(f, "")
+    for key, value in session_model(report, L).items():
+        ss[key] = value
+
+
+def flatten(report):
+    """Field-level view of a report: {(kind, ...keys): value}, used for change detection."""
+    flat = {("language",): report.get("language", "en"), ("d5_root",): report.get("d5_root", "")}
+    for f, v in report["info"].items():
+        flat[("info", f)] = v
+    for sid, st_ in report["steps"].items():
+        for f, v in st_.items():
+            flat[("step", sid, f)] = v
+    for kind, items in report["whys"].items():
+        for i, (v, p) in enumerate(zip(items, why_parents(report, kind))):
+            flat[("why", kind, i)] = (v, p)
+    for cat, items in report["fishbone"].items():
+        for i, v in enumerate(items):
+            flat[("cause", cat, i)] = v
+    return flat
+
+
+def unflatten(flat):
+    """Inverse of flatten(): the report dict for a field-level view."""
+    report = empty_report()
+    whys, causes = {k: {} for k in WHY_KINDS}, {c: {} for c in FISHBONE_CATEGORIES}
+    for key, value in flat.items():
+        kind = key[0]
+        if kind in ("language", "d5_root"):
+            report[kind] = value
+        elif kind == "info":
+            report["info"][key[1]] = value
+        elif kind == "step":
+            report["steps"].setdefault(key[1], {})[key[2]] = value
+        elif kind == "why":
+            whys.setdefault(key[1], {})[key[2]] = value
+        elif kind == "cause":
+            causes.setdefault(key[1], {})[key[2]] = value
+    report["whys"] = {k: [items[i][0] for i in sorted(items)] for k, items in whys.items()}
+    report["why_parents"] = {k: [items[i][1] for i in sorted(items)] for k, items in whys.items()}
+    report["fishbone"] = {c: [items[i] for i in sorted(items)] for c, items in causes.items()}
+    return report
+
+
+# Session-side copies of a step field: (session dict, widget key prefix)
+_STEP_STATE = {"answer": ("answers", "ans_"), "owner": ("owners", "own_"), "due": ("dues", "due_"),
+               "status": ("status", "st_")}
+
+
+def apply_fields(ss, changes, L):
+    """Write fields changed elsewhere into session state, like load_into_session() for a delta.
+
+    `changes` is {flatten key: value or REMOVED}; a changed Why or cause list
+    is in it whole, since those are positional and get rebuilt whole.
+    The language and the composed D5 answer stay per session. Returns the
+    sections to redraw (step IDs, "info" and/or "fishbone") and the fields
+    whose edit in this session had not been synced yet and is now overwritten.
+    """
+    steps = {step_id(title): (i, title) for i, (title, _, _) in enumerate(L["npqp_steps"])}
+    sections, lost, why_kinds, cats = set(), set(), set(), set()
+
+    def drop_widget(key, field, model):
+        # A widget value that differs from the model is an edit this session has not synced
+        if ss.get(key, model) != model:
+            lost.add(field)
+        ss.pop(key, None)
+
+    for key, value in changes.items():
+        kind = key[0]
+        if kind == "info" and key[1] in INFO_WIDGET_KEYS:
+            ss[INFO_WIDGET_KEYS[key[1]]] = value
+            sections.add("info")
+        elif kind == "step" and key[1] in steps and key[2] in _STEP_STATE and key[1:] != ("D5", "answer"):
+            i, title = steps[key[1]]
+            store, prefix = _STEP_STATE[key[2]]
+            if key[2] == "due":
+                value = parse_due(value)
+            elif key[2] == "status":
+                value = status_label(value, L)
+            drop_widget(f"{prefix}{i}", key, ss[store].get(title))
+            ss[store][title] = value
+            sections.add(key[1])
+        elif kind == "d5_root":
+            drop_widget("d5root", key, ss.get("d5_root", ""))
+            ss.d5_root = value
+            sections.add("D5")
+        elif kind == "why":
+            why_kinds.add(key[1])
+        elif kind == "cause":
+            cats.add(key[1])
+    for kind in why_kinds & set(WHY_KINDS):
+        old = ss.get(f"d5_{kind}")
+        items = list(_positional(changes, "why", kind))
+        ss[f"d5_{kind}"] = WhyTree.from_lists([t for t, _ in items] or [""], [p for _, p in items])
+        # Rebuilt trees renumber their nodes: drop the widgets, selection and folds keyed by the old ids
+        prefix = f"why_{kind}_"
+        for key in [k for k in ss.keys() if isinstance(k, str) and k.startswith(prefix)]:
+            node = int(key[len(prefix):])
+            drop_widget(key, ("why", kind), old.text[node] if old is not None and node in old else None)
+        for key in (f"why_sel_{kind}", f"why_collapsed_{kind}"):
+            ss.pop(key, None)
+        sections.add("D5")
+    for cat in cats & set(FISHBONE_CATEGORIES):
+        old = ss.fishbone.get(cat, [])
+        ss.fishbone[cat] = list(_positional(changes, "cause", cat)) or [""]
+        prefix = f"fb_{cat}_"
+        for key in [k for k in ss.keys() if isinstance(k, str) and k.startswith(prefix)]:
+            j = int(key[len(prefix):])
+            drop_widget(key, ("cause", cat), old[j] if j < len(old) else None)
+        sections.add("fishbone")
+    return sections, lost
+
+
+def _positional(fields, kind, name):
+    i = 0
+    while fields.get((kind, name, i), REMOVED) is not REMOVED:
+        yield fields[(kind, name, i)]
+        i += 1
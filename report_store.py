@@ -0,0 +1,598 @@
+# ===========================
+# 8D Training App — Report Store
+# Embedded SQLite repository for 8D reports + debounced, field-level autosave
+# and an FTS5 index for "similar past 8Ds" search
+# ===========================
+
+import datetime
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+import uuid
+
+from report_model import FISHBONE_CATEGORIES, INFO_FIELDS, STEP_IDS, empty_report, flatten, why_parents
+
+DB_PATH = os.environ.get("NPQP_DB_PATH", "npqp_8d.sqlite3")
+SCHEMA_VERSION = 3
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS reports (
+    id          INTEGER PRIMARY KEY,
+    uid         TEXT NOT NULL UNIQUE,
+    report_date TEXT NOT NULL DEFAULT '',
+    prepared_by TEXT NOT NULL DEFAULT '',
+    product     TEXT NOT NULL DEFAULT '',
+    customer    TEXT NOT NULL DEFAULT '',
+    language    TEXT NOT NULL DEFAULT 'en',
+    d5_root     TEXT NOT NULL DEFAULT '',
+    status      TEXT NOT NULL DEFAULT 'not_started',
+    created_at  REAL NOT NULL,
+    updated_at  REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS steps (
+    report_id INTEGER NOT NULL REFERENCES reports(id) ON DELETE CASCADE,
+    step      TEXT NOT NULL,
+    answer    TEXT NOT NULL DEFAULT '',
+    owner     TEXT NOT NULL DEFAULT '',
+    due       TEXT,
+    status    TEXT NOT NULL DEFAULT 'not_started',
+    PRIMARY KEY (report_id, step)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS whys (
+    report_id INTEGER NOT NULL REFERENCES reports(id) ON DELETE CASCADE,
+    kind      TEXT NOT NULL,
+    idx       INTEGER NOT NULL,
+    text      TEXT NOT NULL DEFAULT '',
+    parent    INTEGER,               -- idx of the Why this one answers; NULL = idx - 1 (a plain chain)
+    PRIMARY KEY (report_id, kind, idx)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS causes (
+    report_id INTEGER NOT NULL REFERENCES reports(id) ON DELETE CASCADE,
+    category  TEXT NOT NULL,
+    idx       INTEGER NOT NULL,
+    text      TEXT NOT NULL DEFAULT '',
+    PRIMARY KEY (report_id, category, idx)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS ix_reports_customer ON reports(customer, updated_at);
+CREATE INDEX IF NOT EXISTS ix_reports_product  ON reports(product, updated_at);
+CREATE INDEX IF NOT EXISTS ix_reports_status   ON reports(status, updated_at);
+CREATE INDEX IF NOT EXISTS ix_reports_updated  ON reports(updated_at);
+CREATE INDEX IF NOT EXISTS ix_steps_owner      ON steps(owner, report_id);
+CREATE INDEX IF NOT EXISTS ix_steps_due        ON steps(due, report_id);
+CREATE INDEX IF NOT EXISTS ix_steps_status     ON steps(status, report_id);
+"""
+
+# Full-text index over the fields that describe what went wrong and what fixed it.
+# rowid = reports.id; kept in step with the tables by _write/apply_changes/delete_report.
+_SEARCH_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS report_search USING fts5(
+    d1, d5_root, d6, d8, tokenize = 'unicode61 remove_diacritics 2'
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS report_search_terms USING fts5vocab(report_search, 'row');
+"""
+SEARCH_STEPS = ("D1", "D6", "D8")
+SEARCH_WEIGHTS = (1.0, 2.0, 1.0, 1.5)   # bm25 column weights: d1, d5_root, d6, d8
+SEARCH_MAX_TERMS = 8                    # rarest query terms kept...
+SEARCH_MAX_POSTINGS = 5000              # ...while their summed document counts stay under this
+SEARCH_COMMON = 0.2                     # terms in more than this share of reports are ignored...
+SEARCH_COMMON_MIN = 50                  # ...once they appear in at least this many
+SEARCH_DF_TTL = 300.0                   # seconds; document counts only steer term choice, so may be stale
+_SEARCH_KEYS = {("d5_root",)} | {("step", sid, "answer") for sid in SEARCH_STEPS}
+_WORD = re.compile(r"\w+")
+
+
+_STEP_COLUMNS = ("answer", "owner", "due", "status")
+_WATCHED_KINDS = {"info", "d5_root", "cause"}   # flattened fields read by analytics_rows
+
+
+def overall_status(step_statuses):
+    codes = set(step_statuses)
+    if codes <= {"done"}:
+        return "done"
+    if codes <= {"not_started"}:
+        return "not_started"
+    return "in_progress"
+
+
+class ReportStore:
+    """Process-wide SQLite repository. One connection, serialized by a lock; WAL for readers."""
+
+    def __init__(self, path=DB_PATH):
+        self.path = path
+        self._lock = threading.RLock()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.row_factory = sqlite3.Row
+        if path != ":memory:":
+            self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute("PRAGMA foreign_keys=ON")
+        self._listeners = []
+        self._watchers = []
+        self._df = {}
+        self._df_total = 0
+        self._df_expires = 0.0
+        with self._lock:
+            version = self._db.execute("PRAGMA user_version").fetchone()[0]
+            self._db.executescript(_SCHEMA + _SEARCH_SCHEMA)
+            if version < 2:
+                self._rebuild_search()
+            if version < 3 and "parent" not in {r[1] for r in self._db.execute("PRAGMA table_info(whys)")}:
+                self._db.execute("ALTER TABLE whys ADD COLUMN parent INTEGER")
+            self._db.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    # ---------- helpers ----------
+    def _rid(self, uid):
+        row = self._db.execute("SELECT id FROM reports WHERE uid=?", (uid,)).fetchone()
+        if row is None:
+            raise KeyError(uid)
+        return row[0]
+
+    def _refresh_status(self, rid):
+        statuses = [r[0] for r in self._db.execute("SELECT status FROM steps WHERE report_id=?", (rid,))]
+        self._db.execute("UPDATE reports SET status=? WHERE id=?", (overall_status(statuses), rid))
+
+    def _notify(self, uid, steps):
+        for fn in self._listeners:
+            fn(uid, steps)
+
+    def _touch(self, uid):
+        for fn in self._watchers:
+            fn(uid)
+
+    def _index(self, rid):
+        self._db.execute("DELETE FROM report_search WHERE rowid=?", (rid,))
+        self._db.execute(
+            "INSERT INTO report_search (rowid, d1, d5_root, d6, d8)"
+            " SELECT r.id,"
+            " (SELECT answer FROM steps WHERE report_id=r.id AND step='D1'), r.d5_root,"
+            " (SELECT answer FROM steps WHERE report_id=r.id AND step='D6'),"
+            " (SELECT answer FROM steps WHERE report_id=r.id AND step='D8')"
+            " FROM reports r WHERE r.id=?", (rid,))
+
+    def _rebuild_search(self):
+        """Index every stored report (only needed once, when upgrading an older database)."""
+        self._db.execute("DELETE FROM report_search")
+        for (rid,) in self._db.execute("SELECT id FROM reports").fetchall():
+            self._index(rid)
+        self._df_expires = 0.0
+
+    def _doc_freq(self, terms):
+        """Indexed-report counts for `terms`, cached: counting a common term walks its whole doclist."""
+        now = time.monotonic()
+        if now >= self._df_expires:
+            self._df = {}
+            self._df_total = self._db.execute("SELECT COUNT(*) FROM reports").fetchone()[0]
+            self._df_expires = now + SEARCH_DF_TTL
+        for t in terms:
+            if t not in self._df:
+                row = self._db.execute("SELECT doc FROM report_search_terms WHERE term=?", (t,)).fetchone()
+                self._df[t] = row[0] if row else 0
+        return {t: self._df[t] for t in terms}
+
+    # ---------- writes ----------
+    def create_report(self, report=None, uid=None):
+        """Insert a new report (empty by default); returns its uid."""
+        uid = uid or uuid.uuid4().hex
+        self.save_report(uid, report or empty_report())
+        return uid
+
+    def save_report(self, uid, report):
+        """Write a whole report, replacing any previous content under `uid`."""
+        self.save_many([(uid, report)])
+        return uid
+
+    def save_many(self, items):
+        """Write many (uid, report) pairs in a single transaction."""
+        now = time.time()
+        items = list(items)
+        blank = empty_report()["steps"]
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                for uid, report in items:
+                    self._write(uid, report, now)
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+            if self._listeners:
+                for uid, report in items:
+                    steps = {sid: report["steps"].get(sid, blank[sid]) for sid in STEP_IDS}
+                    self._notify(uid, {sid: {f: s[f] for f in ("owner", "due", "status")} for sid, s in steps.items()})
+            for uid, _ in items:
+                self._touch(uid)
+
+    def _write(self, uid, report, now):
+        info = report["info"]
+        steps = report["steps"]
+        row = self._db.execute("SELECT id, created_at FROM reports WHERE uid=?", (uid,)).fetchone()
+        if row is not None:
+            self._db.execute("DELETE FROM reports WHERE id=?", (row[0],))
+            self._db.execute("DELETE FROM report_search WHERE rowid=?", (row[0],))
+        cur = self._db.execute(
+            "INSERT INTO reports (uid, report_date, prepared_by, product, customer, language, d5_root,"
+            " status, created_at, updated_at) VALUES (?,?,?,?,?,?,?,?,?,?)",
+            (uid, *(info.get(f, "") for f in INFO_FIELDS), report.get("language", "en"),
+             report.get("d5_root", ""), overall_status(s["status"] for s in steps.values()),
+             row[1] if row else now, now))
+        rid = cur.lastrowid
+        self._db.executemany(
+            "INSERT INTO steps (report_id, step, answer, owner, due, status) VALUES (?,?,?,?,?,?)",
+            [(rid, sid, s["answer"], s["owner"], s["due"], s["status"]) for sid, s in steps.items()])
+        self._db.executemany(
+            "INSERT INTO whys (report_id, kind, idx, text, parent) VALUES (?,?,?,?,?)",
+            [(rid, kind, i, t, p) for kind, items in report["whys"].items()
+             for i, (t, p) in enumerate(zip(items, why_parents(report, kind)))])
+        self._db.executemany(
+            "INSERT INTO causes (report_id, category, idx, text) VALUES (?,?,?,?)",
+            [(rid, cat, i, t) for cat, items in report["fishbone"].items() for i, t in enumerate(items)])
+        self._db.execute(
+            "INSERT INTO report_search (rowid, d1, d5_root, d6, d8) VALUES (?,?,?,?,?)",
+            (rid, steps.get("D1", {}).get("answer", ""), report.get("d5_root", ""),
+             steps.get("D6", {}).get("answer", ""), steps.get("D8", {}).get("answer", "")))
+
+    def apply_changes(self, uid, changed, removed=()):
+        """Write only the given fields in one transaction.
+
+        `changed` maps flattened field keys (see report_model.flatten) to new values;
+        `removed` lists keys that no longer exist (e.g. a shortened Why list).
+        """
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                rid = self._rid(uid)
+                status_dirty = False
+                assigned = {}
+                for key, value in changed.items():
+                    kind = key[0]
+                    if kind == "info" and key[1] in INFO_FIELDS:
+                        self._db.execute(f"UPDATE reports SET {key[1]}=? WHERE id=?", (value, rid))
+                    elif kind in ("language", "d5_root"):
+                        self._db.execute(f"UPDATE reports SET {kind}=? WHERE id=?", (value, rid))
+                    elif kind == "step" and key[2] in _STEP_COLUMNS:
+                        self._db.execute(f"UPDATE steps SET {key[2]}=? WHERE report_id=? AND step=?",
+                                         (value, rid, key[1]))
+                        status_dirty |= key[2] == "status"
+                        if key[2] != "answer":
+                            assigned.setdefault(key[1], {})[key[2]] = value
+                    elif kind == "why":
+                        self._db.execute(
+                            "INSERT OR REPLACE INTO whys (report_id, kind, idx, text, parent) VALUES (?,?,?,?,?)",
+                            (rid, key[1], key[2], *value))
+                    elif kind == "cause":
+                        self._db.execute(
+                            "INSERT OR REPLACE INTO causes (report_id, category, idx, text) VALUES (?,?,?,?)",
+                            (rid, key[1], key[2], value))
+                for key in removed:
+                    if key[0] == "why":
+                        self._db.execute("DELETE FROM whys WHERE report_id=? AND kind=? AND idx=?", (rid, *key[1:]))
+                    elif key[0] == "cause":
+                        self._db.execute("DELETE FROM causes WHERE report_id=? AND category=? AND idx=?",
+                                         (rid, *key[1:]))
+                if status_dirty:
+                    self._refresh_status(rid)
+                if not _SEARCH_KEYS.isdisjoint(changed):
+                    self._index(rid)
+                self._db.execute("UPDATE reports SET updated_at=? WHERE id=?", (time.time(), rid))
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+            if assigned:
+                self._notify(uid, assigned)
+            if any(k[0] in _WATCHED_KINDS for k in changed) or any(k[0] == "cause" for k in removed):
+                self._touch(uid)
+
+    def delete_report(self, uid):
+        with self._lock:
+            row = self._db.execute("SELECT id FROM reports WHERE uid=?", (uid,)).fetchone()
+            if row is not None:
+                self._db.execute("DELETE FROM reports WHERE id=?", (row[0],))
+                self._db.execute("DELETE FROM report_search WHERE rowid=?", (row[0],))
+                self._notify(uid, None)
+                self._touch(uid)
+
+    # ---------- reads ----------
+    def load_report(self, uid):
+        """Return the report dict for `uid`, or None."""
+        with self._lock:
+            row = self._db.execute("SELECT * FROM reports WHERE uid=?", (uid,)).fetchone()
+            if row is None:
+                return None
+            rid = row["id"]
+            steps = self._db.execute("SELECT step, answer, owner, due, status FROM steps WHERE report_id=?",
+                                     (rid,)).fetchall()
+            whys = self._db.execute("SELECT kind, idx, text, parent FROM whys WHERE report_id=? ORDER BY kind, idx",
+                                    (rid,)).fetchall()
+            causes = self._db.execute("SELECT category, idx, text FROM causes WHERE report_id=? ORDER BY category, idx",
+                                      (rid,)).fetchall()
+        report = empty_report()
+        report["uid"] = uid
+        report["info"] = {f: row[f] for f in INFO_FIELDS}
+        report["language"] = row["language"]
+        report["d5_root"] = row["d5_root"]
+        report["status"] = row["status"]
+        report["updated_at"] = row["updated_at"]
+        for s in steps:
+            report["steps"][s["step"]] = {"answer": s["answer"], "owner": s["owner"], "due": s["due"],
+                                          "status": s["status"]}
+        report["whys"] = {"occ": [], "det": []}
+        report["why_parents"] = {"occ": [], "det": []}
+        for w in whys:
+            report["whys"].setdefault(w["kind"], []).append(w["text"])
+            report["why_parents"].setdefault(w["kind"], []).append(w["idx"] - 1 if w["parent"] is None else w["parent"])
+        report["fishbone"] = {c: [] for c in FISHBONE_CATEGORIES}
+        for c in causes:
+            report["fishbone"].setdefault(c["category"], []).append(c["text"])
+        return report
+
+    def list_reports(self, customer=None, product=None, status=None, owner=None, due_before=None, limit=50):
+        """Most recently updated report summaries matching all given filters."""
+        where, args = [], []
+        if customer:
+            where.append("r.customer=?")
+            args.append(customer)
+        if product:
+            where.append("r.product=?")
+            args.append(product)
+        if status:
+            where.append("r.status=?")
+            args.append(status)
+        if owner:
+            where.append("EXISTS (SELECT 1 FROM steps s WHERE s.report_id=r.id AND s.owner=?)")
+            args.append(owner)
+        if due_before:
+            if isinstance(due_before, datetime.date):
+                due_before = due_before.isoformat()
+            where.append("EXISTS (SELECT 1 FROM steps s WHERE s.report_id=r.id AND s.due IS NOT NULL"
+                         " AND s.due<=? AND s.status!='done')")
+            args.append(due_before)
+        sql = ("SELECT r.uid, r.report_date, r.prepared_by, r.product, r.customer, r.status, r.updated_at"
+               " FROM reports r")
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY r.updated_at DESC LIMIT ?"
+        args.append(limit)
+        with self._lock:
+            return [dict(r) for r in self._db.execute(sql, args)]
+
+    def latest_draft(self, exclude_uid=None):
+        """Summary of the most recently updated report not yet done, or None."""
+        sql = ("SELECT uid, report_date, prepared_by, product, customer, status, updated_at"
+               " FROM reports WHERE status!='done'")
+        args = []
+        if exclude_uid:
+            sql += " AND uid!=?"
+            args.append(exclude_uid)
+        sql += " ORDER BY updated_at DESC LIMIT 1"
+        with self._lock:
+            row = self._db.execute(sql, args).fetchone()
+        return dict(row) if row is not None else None
+
+    def similar_reports(self, text, limit=5, exclude_uid=None, completed_only=True):
+        """Past reports whose D1 / D5 root cause / D6 / D8 text best matches `text`.
+
+        Only the rarest few terms of `text` are searched (very common words carry no
+        signal and make the match expensive), ranked by bm25. Returns summaries with
+        the matched fields and a score (lower is better).
+        """
+        terms = search_terms(text)
+        if not terms:
+            return []
+        with self._lock:
+            df = self._doc_freq(terms)
+            common = max(SEARCH_COMMON_MIN, self._df_total * SEARCH_COMMON)
+            keep, postings = [], 0
+            for n, t in sorted((n, t) for t, n in df.items() if 0 < n <= common):
+                if len(keep) == SEARCH_MAX_TERMS or (keep and postings + n > SEARCH_MAX_POSTINGS):
+                    break
+                keep.append(t)
+                postings += n
+            if not keep:
+                return []
+            query = " OR ".join(f'"{t}"' for t in keep)
+            sql = ("SELECT r.uid, r.customer, r.product, r.report_date, r.status,"
+                   " r.d5_root, report_search.d1, report_search.d6, report_search.d8, bm25(report_search, ?, ?, ?, ?) AS score"
+                   " FROM report_search JOIN reports r ON r.id = report_search.rowid"
+                   " WHERE report_search MATCH ?")
+            args = [*SEARCH_WEIGHTS, query]
+            if completed_only:
+                sql += " AND r.status='done'"
+            if exclude_uid:
+                sql += " AND r.uid!=?"
+                args.append(exclude_uid)
+            sql += " ORDER BY score LIMIT ?"
+            args.append(limit)
+            return [dict(r) for r in self._db.execute(sql, args)]
+
+    def assignment_rows(self, subscribe=None):
+        """(uid, step, owner, due, status) for every step on file.
+
+        `subscribe(uid, steps)` is registered atomically with the read, so it sees
+        every later write: `steps` maps step IDs to changed owner/due/status fields,
+        or is None when the report was deleted. Listeners run under the store lock
+        and must not block.
+        """
+        with self._lock:
+            rows = self._db.execute("SELECT r.uid, s.step, s.owner, s.due, s.status"
+                                    " FROM steps s JOIN reports r ON r.id = s.report_id").fetchall()
+            if subscribe is not None:
+                self._listeners.append(subscribe)
+            return rows
+
+    def analytics_rows(self, uids=None, subscribe=None):
+        """Report and cause columns for analytics: all reports, or only `uids`.
+
+        Returns (reports, causes): reports are (uid, customer, product, report_date,
+        created_at, d5_root); causes are (uid, category, text), non-empty only.
+        `subscribe(uid)` is registered atomically with the read and then called
+        whenever a report's info, root cause or causes are written, or it is
+        deleted. Like assignment listeners it runs under the store lock.
+        """
+        report_sql = "SELECT uid, customer, product, report_date, created_at, d5_root FROM reports"
+        cause_sql = ("SELECT r.uid, c.category, c.text FROM causes c JOIN reports r ON r.id = c.report_id"
+                     " WHERE c.text != ''")
+        with self._lock:
+            if uids is None:
+                reports = self._db.execute(report_sql).fetchall()
+                causes = self._db.execute(cause_sql).fetchall()
+            else:
+                uids = list(uids)
+                reports, causes = [], []
+                for i in range(0, len(uids), 500):
+                    chunk = uids[i:i + 500]
+                    marks = ",".join("?" * len(chunk))
+                    reports += self._db.execute(f"{report_sql} WHERE uid IN ({marks})", chunk).fetchall()
+                    causes += self._db.execute(f"{cause_sql} AND r.uid IN ({marks})", chunk).fetchall()
+            if subscribe is not None:
+                self._watchers.append(subscribe)
+            return reports, causes
+
+    def labeled_causes(self):
+        """(category, text) for every non-empty fishbone cause on file: training data for the classifier."""
+        with self._lock:
+            return self._db.execute("SELECT category, text FROM causes WHERE text != ''").fetchall()
+
+    def existing(self, uids):
+        """The subset of `uids` already stored."""
+        found = set()
+        with self._lock:
+            for i in range(0, len(uids), 500):
+                chunk = uids[i:i + 500]
+                marks = ",".join("?" * len(chunk))
+                found.update(r[0] for r in self._db.execute(f"SELECT uid FROM reports WHERE uid IN ({marks})", chunk))
+        return found
+
+    def count(self):
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM reports").fetchone()[0]
+
+
+def search_terms(text):
+    """Distinct search terms of `text`, normalized like the FTS5 unicode61 tokenizer."""
+    folded = unicodedata.normalize("NFKD", text.lower())
+    folded = "".join(c for c in folded if not unicodedata.combining(c))
+    seen = {}
+    for w in _WORD.findall(folded):
+        if len(w) >= 3 or any(c.isdigit() for c in w):
+            seen.setdefault(w, None)
+    return list(seen)
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    """The process-wide store at DB_PATH, opened on first use."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = ReportStore()
+        return _store
+
+
+# ---------- Debounced autosave ----------
+_MISSING = object()
+
+
+class Autosaver:
+    """Collects field-level changes for one report and flushes them in batches.
+
+    Call sync(report) as often as you like (e.g. every rerun); only fields that
+    differ from the last flushed state are written, at most once per `delay`
+    seconds of quiet and at least every `max_wait` seconds while edits continue.
+    Pass `report=None` for a report that is not stored yet: its row is created
+    by the first flush, so untouched drafts never reach the database.
+    """
+
+    def __init__(self, store, uid, report=None, delay=1.0, max_wait=5.0):
+        self.store = store
+        self.uid = uid
+        self.delay = delay
+        self.max_wait = max_wait
+        self.flushes = 0
+        self._saved = flatten(report) if report is not None else {}
+        self._exists = report is not None
+        self._latest = report
+        self._pending = {}
+        self._removed = set()
+        self._first_pending = None
+        self._timer = None
+        self._lock = threading.Lock()
+
+    def sync(self, report):
+        flat = flatten(report)
+        with self._lock:
+            self._queue(flat, self._saved.keys() - flat.keys(), report)
+
+    def queue(self, changed, removed=(), report=None):
+        """Like sync(), from field deltas (keys as in report_model.flatten) instead of a whole report.
+
+        `report` (the whole current report) is only needed while the report is not stored yet.
+        """
+        with self._lock:
+            self._queue(changed, removed, report)
+
+    def _queue(self, changed, removed, report):
+        if report is not None:
+            self._latest = report
+        for key, value in changed.items():
+            if self._saved.get(key, _MISSING) != value:
+                self._pending[key] = value
+                self._removed.discard(key)
+            else:
+                self._pending.pop(key, None)
+        for key in removed:
+            self._pending.pop(key, None)
+            if key in self._saved:
+                self._removed.add(key)
+        if not self._pending and not self._removed:
+            return
+        now = time.monotonic()
+        if self._first_pending is None:
+            self._first_pending = now
+        wait = min(self.delay, max(0.0, self._first_pending + self.max_wait - now))
+        if self._timer is not None:
+            self._timer.cancel()
+        self._timer = threading.Timer(wait, self.flush)
+        self._timer.daemon = True
+        self._timer.start()
+
+    @property
+    def stored(self):
+        """Whether the report has reached the database (drafts are stored on their first edit)."""
+        return self._exists
+
+    @property
+    def dirty(self):
+        return bool(self._pending or self._removed)
+
+    def flush(self):
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            changed, removed = self._pending, self._removed
+            if not changed and not removed:
+                return
+            if self._exists:
+                self.store.apply_changes(self.uid, changed, removed)
+                self._saved.update(changed)
+                for key in removed:
+                    self._saved.pop(key, None)
+            else:
+                self.store.save_report(self.uid, self._latest)
+                self._saved = flatten(self._latest)
+                self._exists = True
+            # Cleared only after a successful write, so a failed flush is retried on the next sync
+            self._pending, self._removed, self._first_pending = {}, set(), None
+            self.flushes += 1
+
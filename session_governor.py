@@ -0,0 +1,220 @@
+# ===========================
+# 8D Training App — Session Memory Governor
+# Tracks each session's report-state footprint and last interaction. A session
+# idle for long enough, or the least recently active ones while all sessions
+# together are over the memory budget, have their report state spilled to a
+# compressed file on disk; it is read back on their next interaction.
+# The app decides what a session's report state is and when it is safe to
+# swap it (see app.advanced.py); the governor decides who, and keeps the bytes.
+# ===========================
+
+import atexit
+import collections
+import os
+import pickle
+import shutil
+import tempfile
+import threading
+import time
+import zlib
+
+BUDGET_MB = float(os.environ.get("NPQP_SESSION_BUDGET_MB", "256"))   # report state in RAM, all sessions
+IDLE_SECONDS = float(os.environ.get("NPQP_SESSION_IDLE", "900"))      # spilled after this long untouched
+SPILL_DIR = os.environ.get("NPQP_SPILL_DIR", "")                      # default: the system temp dir
+MIN_RESIDENT = 60.0       # seconds after an interaction during which a session is never spilled
+GONE_SECONDS = 600.0      # no run at all (not even a poll): the tab is closed, stop counting it
+SPILL_TTL = 86400.0       # seconds a spill file waits for a session that never comes back
+SWEEP_SECONDS = 30.0      # how often closed sessions and stale files are swept
+COMPRESS_LEVEL = 6
+RAM_PER_PICKLED_BYTE = 2.0   # live dicts, strings and trees vs their pickle (benchmarks/bench_session_governor.py)
+
+SPILLED = "spilled"       # check(): already on disk
+
+
+def footprint(state):
+    """Estimated bytes of RAM `state` (a dict of session values) holds, from its pickled size."""
+    return int(len(pickle.dumps(state, pickle.HIGHEST_PROTOCOL)) * RAM_PER_PICKLED_BYTE)
+
+
+class _Session:
+    __slots__ = ("active", "seen", "nbytes", "spilled", "file_bytes")
+
+    def __init__(self, now):
+        self.active = now         # last interaction
+        self.seen = now           # last run of any kind, polls included
+        self.nbytes = 0
+        self.spilled = False
+        self.file_bytes = 0
+
+
+class SessionGovernor:
+    """Resident/spilled bookkeeping for every session, plus the spill files.
+
+    Sessions report interactions (activity) and poll periodically (check);
+    check() answers whether the session should spill itself now. Spilling and
+    restoring are done by the session's own script thread, so session state is
+    never touched from another thread.
+    """
+
+    def __init__(self, budget_bytes=BUDGET_MB * 2 ** 20, idle=IDLE_SECONDS, min_resident=MIN_RESIDENT,
+                 spill_dir=SPILL_DIR, clock=time.monotonic):
+        self.budget = int(budget_bytes)
+        self.idle = idle
+        self.min_resident = min_resident
+        self._clock = clock
+        # One directory per process: session ids do not outlive it
+        self.spill_dir = tempfile.mkdtemp(prefix="npqp_spill_", dir=spill_dir or None)
+        atexit.register(shutil.rmtree, self.spill_dir, True)
+        self._sessions = collections.OrderedDict()   # session id -> _Session, least recently active first
+        self._lock = threading.Lock()
+        self._resident_bytes = 0
+        self._swept = clock()
+        self.spills = collections.Counter()           # reason -> count
+        self.restores = 0
+        self.lost = 0                                 # spill files that could not be read back
+
+    def _path(self, sid):
+        return os.path.join(self.spill_dir, f"{sid}.pkl.z")
+
+    # ---------- bookkeeping ----------
+    def activity(self, sid, nbytes):
+        """Session `sid` ran because of its user; `nbytes` is its footprint now. It must be resident."""
+        with self._lock:
+            now = self._clock()
+            s = self._sessions.get(sid)
+            if s is None:
+                s = self._sessions[sid] = _Session(now)
+            self._sessions.move_to_end(sid)
+            s.active = s.seen = now
+            if not s.spilled:
+                self._resident_bytes += nbytes - s.nbytes
+                s.nbytes = nbytes
+            self._sweep(now)
+
+    def is_spilled(self, sid):
+        s = self._sessions.get(sid)
+        return s is not None and s.spilled
+
+    def check(self, sid):
+        """From the session's periodic poll: SPILLED if it already is, "idle" or "budget" if it
+        should spill now, else None."""
+        with self._lock:
+            now = self._clock()
+            self._sweep(now)
+            s = self._sessions.get(sid)
+            if s is None:
+                return None
+            s.seen = now
+            if s.spilled:
+                return SPILLED
+            quiet = now - s.active
+            if quiet < self.min_resident:
+                return None
+            if quiet >= self.idle:
+                return "idle"
+            excess = self._resident_bytes - self.budget
+            if excess <= 0:
+                return None
+            # Over budget: the least recently active sessions go first, as many as it takes
+            for other, o in self._sessions.items():
+                if o.spilled or now - o.active < self.min_resident:
+                    continue
+                if other == sid:
+                    return "budget"
+                excess -= o.nbytes
+                if excess <= 0:
+                    return None
+            return None
+
+    def _sweep(self, now):
+        if now - self._swept < SWEEP_SECONDS:
+            return
+        self._swept = now
+        for sid, s in list(self._sessions.items()):
+            if s.spilled and now - s.seen > SPILL_TTL:
+                self._drop(sid)
+            elif not s.spilled and now - s.seen > GONE_SECONDS:
+                self._drop(sid)     # Streamlit frees the state of a closed session itself
+
+    def _drop(self, sid):
+        s = self._sessions.pop(sid)
+        if s.spilled:
+            _unlink(self._path(sid))
+        else:
+            self._resident_bytes -= s.nbytes
+
+    # ---------- spill files ----------
+    def spill(self, sid, state, reason="idle"):
+        """Write `state` (picklable values) to disk; the caller then drops them from the session."""
+        data = zlib.compress(pickle.dumps(state, pickle.HIGHEST_PROTOCOL), COMPRESS_LEVEL)
+        path = self._path(sid)
+        with open(path + ".tmp", "wb") as f:
+            f.write(data)
+        os.replace(path + ".tmp", path)
+        with self._lock:
+            now = self._clock()
+            s = self._sessions.get(sid)
+            if s is None:
+                s = self._sessions[sid] = _Session(now)
+            if not s.spilled:
+                self._resident_bytes -= s.nbytes
+            s.spilled, s.nbytes, s.file_bytes, s.seen = True, 0, len(data), now
+            self.spills[reason] += 1
+
+    def restore(self, sid):
+        """The state spilled for `sid` (its file is removed), or None if nothing could be read back.
+
+        Afterwards the session counts as resident again; its next activity() sets its footprint.
+        """
+        path = self._path(sid)
+        try:
+            with open(path, "rb") as f:
+                state = pickle.loads(zlib.decompress(f.read()))
+        except (OSError, zlib.error, pickle.UnpicklingError, EOFError):
+            state = None
+        _unlink(path)
+        with self._lock:
+            s = self._sessions.get(sid)
+            if s is not None and s.spilled:
+                s.spilled, s.file_bytes = False, 0
+            if state is None:
+                self.lost += 1
+            else:
+                self.restores += 1
+        return state
+
+    def stats(self):
+        with self._lock:
+            spilled = [s for s in self._sessions.values() if s.spilled]
+            return {
+                "sessions": len(self._sessions),
+                "resident": len(self._sessions) - len(spilled),
+                "spilled": len(spilled),
+                "resident_bytes": self._resident_bytes,
+                "spilled_bytes": sum(s.file_bytes for s in spilled),
+                "budget_bytes": self.budget,
+                "spills_idle": self.spills["idle"],
+                "spills_budget": self.spills["budget"],
+                "restores": self.restores,
+                "lost": self.lost,
+            }
+
+
+def _unlink(path):
+    try:
+        os.unlink(path)
+    except OSError:
+        pass
+
+
+_governor = None
+_governor_lock = threading.Lock()
+
+
+def get_governor():
+    """The process-wide session governor, created on first use."""
+    global _governor
+    with _governor_lock:
+        if _governor is None:
+            _governor = SessionGovernor()
+        return _governor
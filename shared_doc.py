@@ -0,0 +1,256 @@
+# ===========================
+# 8D Training App — Shared Documents
+# One live, process-wide copy of every open report, shared by all sessions
+# editing it: per-field version counters, small deltas in both directions,
+# field-level conflict detection, and one debounced Autosaver per report
+# (not one per session). A session polls with a single integer comparison.
+# ===========================
+
+import collections
+import itertools
+import threading
+import time
+
+from report_model import REMOVED, empty_report, flatten, unflatten
+from report_store import Autosaver, get_store
+
+LOG_SIZE = 512          # recent (version, field) entries; a session further behind rescans the version table
+DOC_IDLE = 900.0        # seconds untouched before a document is dropped (after its last flush)
+POLL_SECONDS = 2.0      # how often an open session looks for other sessions' edits
+
+# Per-session fields: the UI language, and the D5 answer composed in it. They are
+# shared only along with a real edit, so sessions in different languages do not
+# keep overwriting each other's.
+SESSION_FIELDS = frozenset({("language",), ("step", "D5", "answer")})
+LIST_KINDS = ("why", "cause")   # positional fields: a change to one item sends the whole list
+
+_UNKNOWN = object()     # synced value of a field rewritten beyond the log: any local value conflicts
+_authors = itertools.count(1)   # editor ids: small ints keep the write log compact
+
+
+class SharedDocument:
+    """Live fields of one report. Memory is O(fields): nothing is kept per session.
+
+    Each write is logged with the value it replaced, so the fields a session
+    last synced are rebuilt from the current ones, its version and its own
+    writes, instead of every session keeping a copy.
+    """
+
+    def __init__(self, store, uid, report=None, draft=None):
+        self.uid = uid
+        # A draft starts from what the page fills in (`draft`), so those defaults are not edits to store
+        self.fields = flatten(report if report is not None else draft or empty_report())
+        self.versions = dict.fromkeys(self.fields, 0)   # field -> version of its last write
+        self.authors = {}                                # field -> session that wrote it last
+        self.version = 0
+        self.autosaver = Autosaver(store, uid, report)
+        self.last_used = time.monotonic()
+        self.closed = False       # dropped from the hub; its editors move to the reloaded copy
+        self._log = collections.deque(maxlen=LOG_SIZE)   # (version, field, author, value it replaced)
+        self._lock = threading.Lock()
+
+    def state(self):
+        """(fields, version), consistent with each other."""
+        with self._lock:
+            self.last_used = time.monotonic()
+            return dict(self.fields), self.version
+
+    def synced(self, seen, author):
+        """{field: value} as session `author` last synced them: the fields at version `seen` plus its own writes."""
+        with self._lock:
+            self.last_used = time.monotonic()
+            older = self._older(seen, author)
+            fields = {k: v for k, v in self.fields.items() if k not in older}
+            fields.update((k, v) for k, v in older.items() if v is not REMOVED)
+            return fields
+
+    def _older(self, seen, author):
+        """Fields written after version `seen` -> the value `author` synced for them (REMOVED: none)."""
+        if seen == self.version:
+            return {}
+        covered = self._log and self._log[0][0] <= seen + 1
+        older, after, own = {}, {}, set()
+        for version, key, by, previous in reversed(self._log):
+            if version <= seen:
+                break
+            if key not in own:
+                if by == author:
+                    # Its own write is what it has: the value the next write replaced, or the current one
+                    older[key] = after.get(key, self.fields.get(key, REMOVED))
+                    own.add(key)
+                else:
+                    older[key] = previous if covered else _UNKNOWN
+            after[key] = previous
+        if not covered:
+            older.update((k, _UNKNOWN) for k, v in self.versions.items()
+                         if v > seen and k not in older and self.authors.get(k) != author)
+        return older
+
+    def changes_since(self, seen, author):
+        """({field: value or REMOVED} written by others after version `seen`, current version).
+
+        A changed Why or cause comes with the rest of its list (they are positional).
+        """
+        self.last_used = time.monotonic()
+        if seen == self.version:
+            return {}, seen
+        with self._lock:
+            if self._log and self._log[0][0] <= seen + 1:
+                keys = set()
+                for version, key, _, _ in reversed(self._log):
+                    if version <= seen:
+                        break
+                    keys.add(key)
+            else:
+                keys = {k for k, v in self.versions.items() if v > seen}
+            changes = {k: self.fields.get(k, REMOVED) for k in keys if self.authors.get(k) != author}
+            return _whole_lists(changes, self.fields), self.version
+
+    def commit(self, author, seen, flat):
+        """Apply one session's report (flattened) as it stands after syncing version `seen`.
+
+        Only the fields that differ from what the session last synced are
+        written; returns the ones rejected as conflicts. A field conflicts when
+        another session wrote it after `seen`: the first write wins, and the
+        late author picks it up on its next poll.
+        """
+        conflicts, applied, dropped = set(), {}, []
+        with self._lock:
+            self.last_used = time.monotonic()
+            older = self._older(seen, author)
+
+            def synced(key):
+                return older[key] if key in older else self.fields.get(key, REMOVED)
+
+            changed = {k: v for k, v in flat.items() if synced(k) != v}
+            removed = [k for k in dict.fromkeys([*self.fields, *older]) if k not in flat and synced(k) is not REMOVED]
+            if not changed.keys() - SESSION_FIELDS and not removed:
+                return conflicts
+            for key in [*changed, *removed]:
+                if self.versions.get(key, 0) > seen and self.authors.get(key) != author:
+                    conflicts.add(key)
+                    continue
+                self.version += 1
+                self.versions[key] = self.version
+                self.authors[key] = author
+                self._log.append((self.version, key, author, self.fields.get(key, REMOVED)))
+                if key in changed:
+                    self.fields[key] = applied[key] = changed[key]
+                elif self.fields.pop(key, REMOVED) is not REMOVED:
+                    dropped.append(key)
+            if applied or dropped:
+                report = None if self.autosaver.stored else unflatten(self.fields)
+                self.autosaver.queue(applied, dropped, report)
+        return conflicts
+
+
+def _whole_lists(changes, fields):
+    """`changes` plus every item of each Why / cause list it touches."""
+    for kind, name in {k[:2] for k in changes if k[0] in LIST_KINDS}:
+        i = 0
+        while (kind, name, i) in fields:
+            changes[(kind, name, i)] = fields[(kind, name, i)]
+            i += 1
+    return changes
+
+
+class Editor:
+    """One session's handle on a shared report: its author id and the document version it last synced.
+
+    Nothing per field is kept here; what the session synced is rebuilt by the
+    document (SharedDocument.synced), so memory per session stays constant.
+    """
+
+    def __init__(self, hub, uid, draft=None):
+        self.hub = hub
+        self.uid = uid
+        self.author = next(_authors)
+        self.doc = hub.document(uid, draft)
+        self.seen = self.doc.version
+        self.conflicts = set()     # fields whose local edit lost, until the session has shown them
+
+    @property
+    def report(self):
+        """The report as this session last synced it."""
+        return unflatten(self.doc.synced(self.seen, self.author))
+
+    @property
+    def autosaver(self):
+        return self.doc.autosaver
+
+    @property
+    def behind(self):
+        """Whether other sessions wrote since the last pull (one integer comparison)."""
+        return self.doc.closed or self.doc.version != self.seen
+
+    def pull(self):
+        """Fields other sessions changed since the last pull: {field: value or REMOVED}.
+
+        A changed Why or cause comes with the rest of its list.
+        """
+        if self.doc.closed:
+            return self._reattach()
+        changes, self.seen = self.doc.changes_since(self.seen, self.author)
+        return changes
+
+    def push(self, report):
+        """Send the fields of `report` that differ from the last sync; returns the conflicting ones."""
+        if self.doc.closed:
+            return set()    # pulled first on the next run
+        conflicts = self.doc.commit(self.author, self.seen, flatten(report))
+        conflicts -= SESSION_FIELDS
+        self.conflicts |= conflicts
+        return conflicts
+
+    def _reattach(self):
+        """Move to the hub's current copy after an idle eviction; returns how it differs from ours."""
+        synced = self.doc.synced(self.seen, self.author)
+        self.doc = self.hub.document(self.uid, unflatten(synced))   # an unsaved draft resumes as we left it
+        fresh, self.seen = self.doc.state()
+        changes = {k: v for k, v in fresh.items() if synced.get(k, REMOVED) != v}
+        changes.update((k, REMOVED) for k in synced.keys() - fresh.keys())
+        return _whole_lists(changes, fresh)
+
+
+class DocumentHub:
+    """Process-wide registry of SharedDocuments, loaded from the store on first open."""
+
+    def __init__(self, store=None, idle=DOC_IDLE):
+        self.store = store or get_store()
+        self.idle = idle
+        self._docs = {}
+        self._lock = threading.Lock()
+
+    def open(self, uid, draft=None):
+        """Editor on report `uid` for one session (a new, unsaved draft from `draft` if the store does not have it)."""
+        return Editor(self, uid, draft)
+
+    def document(self, uid, draft=None):
+        with self._lock:
+            self._evict()
+            doc = self._docs.get(uid)
+            if doc is None:
+                doc = self._docs[uid] = SharedDocument(self.store, uid, self.store.load_report(uid), draft)
+            return doc
+
+    def __len__(self):
+        return len(self._docs)
+
+    def _evict(self):
+        cutoff = time.monotonic() - self.idle
+        for uid, doc in list(self._docs.items()):
+            if doc.last_used < cutoff and not doc.autosaver.dirty:
+                doc.closed = True
+                del self._docs[uid]
+
+
+_hub = None
+_hub_lock = threading.Lock()
+
+
+def get_hub():
+    global _hub
+    with _hub_lock:
+        if _hub is None:
+            _hub = DocumentHub()
+        return _hub
@@ -0,0 +1,191 @@
+# ===========================
+# 8D Training App — Report Snapshots
+# Compact, versioned binary form of one report: a short header plus
+# zlib-compressed canonical JSON, keyed by stable step IDs (D1..D8).
+# Download/restore in the app, and the interchange format of the export paths.
+# Run: python snapshot.py {save,load,xlsx} ...
+# ===========================
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+import zlib
+
+from report_model import FISHBONE_CATEGORIES, INFO_FIELDS, STATUS_CODES, STEP_IDS, WHY_KINDS, due_iso, empty_report
+from why_tree import chain_parents, clean_parents
+
+MAGIC = b"NPQP8D"
+FORMAT_VERSION = 2
+EXTENSION = ".8d"
+MIME = "application/octet-stream"
+LEVEL = 6                 # zlib level: ~all of level 9's size at a fraction of the time
+MAX_SIZE = 16 << 20       # decompressed bytes accepted from an uploaded snapshot
+
+
+def _v1_why_chains(doc):
+    """Format 1 had flat Why lists: each one a plain chain."""
+    whys = doc.get("whys") if isinstance(doc.get("whys"), dict) else {}
+    return {**doc, "why_parents": {k: chain_parents(len(whys[k]) if isinstance(whys.get(k), list) else 0)
+                                   for k in WHY_KINDS}}
+
+
+# Upgrades older payloads one version at a time: {version: fn(doc) -> doc of version + 1}
+_MIGRATIONS = {1: _v1_why_chains}
+
+
+class SnapshotError(ValueError):
+    """The data is not a readable 8D snapshot."""
+
+
+def _text(value):
+    return value if isinstance(value, str) else "" if value is None else str(value)
+
+
+def _object(value, what):
+    """`value` if it is a dict, {} if missing; SnapshotError for anything else."""
+    if value is None:
+        return {}
+    if not isinstance(value, dict):
+        raise SnapshotError(f"{what} must be an object")
+    return value
+
+
+def _array(value, what):
+    """`value` if it is a list, [] if missing; SnapshotError for anything else."""
+    if value is None:
+        return []
+    if not isinstance(value, list):
+        raise SnapshotError(f"{what} must be a list")
+    return value
+
+
+def normalize(doc):
+    """Coerce `doc` onto the report shape: known fields only, strings where text is expected.
+
+    Missing parts are filled from empty_report(), so a snapshot written by an
+    older or partial producer always loads; a due date that is not an ISO date
+    becomes None. Raises SnapshotError when a part has the wrong type.
+    """
+    report = empty_report()
+    doc = _object(doc, "report")
+    info = _object(doc.get("info"), "info")
+    report["info"] = {f: _text(info.get(f)) for f in INFO_FIELDS}
+    report["language"] = "es" if doc.get("language") == "es" else "en"
+    steps = _object(doc.get("steps"), "steps")
+    for sid in STEP_IDS:
+        s = _object(steps.get(sid), f"step {sid}")
+        report["steps"][sid] = {
+            "answer": _text(s.get("answer")),
+            "owner": _text(s.get("owner")),
+            "due": due_iso(s.get("due")),
+            "status": s.get("status") if s.get("status") in STATUS_CODES else STATUS_CODES[0],
+        }
+    report["d5_root"] = _text(doc.get("d5_root"))
+    whys = _object(doc.get("whys"), "whys")
+    report["whys"] = {k: [_text(w) for w in _array(whys.get(k), f"whys {k}")] for k in WHY_KINDS}
+    parents = doc.get("why_parents") if isinstance(doc.get("why_parents"), dict) else {}
+    report["why_parents"] = {k: clean_parents(parents.get(k), len(report["whys"][k])) for k in WHY_KINDS}
+    fishbone = _object(doc.get("fishbone"), "fishbone")
+    report["fishbone"] = {c: [_text(t) for t in _array(fishbone.get(c), f"fishbone {c}")] for c in FISHBONE_CATEGORIES}
+    return report
+
+
+def dumps(report, level=LEVEL):
+    """Encode `report` as snapshot bytes. Equal reports give identical bytes."""
+    doc = normalize(report)
+    body = json.dumps(doc, ensure_ascii=False, sort_keys=True, separators=(",", ":")).encode("utf-8")
+    return MAGIC + bytes([FORMAT_VERSION]) + zlib.compress(body, level)
+
+
+def loads(blob):
+    """Decode snapshot bytes back into a report dict; raises SnapshotError."""
+    if not isinstance(blob, (bytes, bytearray, memoryview)) or bytes(blob[:len(MAGIC)]) != MAGIC:
+        raise SnapshotError("not an 8D snapshot")
+    version = blob[len(MAGIC)] if len(blob) > len(MAGIC) else 0
+    if version > FORMAT_VERSION:
+        raise SnapshotError(f"snapshot format {version} is newer than this app ({FORMAT_VERSION})")
+    try:
+        d = zlib.decompressobj()
+        body = d.decompress(bytes(blob[len(MAGIC) + 1:]), MAX_SIZE)
+        if d.unconsumed_tail:
+            raise SnapshotError("snapshot too large")
+        doc = json.loads(body.decode("utf-8"))
+    except (zlib.error, UnicodeDecodeError, json.JSONDecodeError) as e:
+        raise SnapshotError(f"corrupt snapshot: {e}") from None
+    if not isinstance(doc, dict):
+        raise SnapshotError("report must be an object")
+    while version < FORMAT_VERSION:
+        migrate = _MIGRATIONS.get(version)
+        if migrate is None:
+            raise SnapshotError(f"no upgrade from snapshot format {version}")
+        doc, version = migrate(doc), version + 1
+    return normalize(doc)
+
+
+def digest(blob):
+    """Content key of a snapshot (stable across processes: the encoding is canonical)."""
+    return hashlib.sha256(blob).hexdigest()
+
+
+def filename(report):
+    """Download name, e.g. 'NPQP_8D_Nissan_AMP.8d'."""
+    parts = [p for p in (report["info"].get("customer"), report["info"].get("product")) if p]
+    stem = "_".join(["NPQP_8D", *parts])
+    return "".join(c if c.isalnum() or c in "-_." else "_" for c in stem) + EXTENSION
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Convert 8D report snapshots to and from the store and XLSX.")
+    ap.add_argument("--db", help="store path (default: NPQP_DB_PATH or npqp_8d.sqlite3)")
+    sub = ap.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("save", help="write a stored report as a snapshot")
+    p.add_argument("uid")
+    p.add_argument("-o", "--out")
+    p = sub.add_parser("load", help="add snapshots to the store")
+    p.add_argument("paths", nargs="+")
+    p = sub.add_parser("xlsx", help="build the 8D workbook from a snapshot")
+    p.add_argument("path")
+    p.add_argument("-o", "--out")
+    args = ap.parse_args(argv)
+
+    if args.command == "xlsx":
+        from fishbone import render_report_fishbone
+        from xlsx_export import build_report_workbook
+        with open(args.path, "rb") as f:
+            report = loads(f.read())
+        out = args.out or os.path.splitext(args.path)[0] + ".xlsx"
+        with open(out, "wb") as f:
+            f.write(build_report_workbook(report, render_report_fishbone(report)))
+        print(out)
+        return 0
+
+    from report_store import ReportStore, get_store
+    store = ReportStore(args.db) if args.db else get_store()
+    if args.command == "save":
+        report = store.load_report(args.uid)
+        if report is None:
+            print(f"no report {args.uid}", file=sys.stderr)
+            return 1
+        out = args.out or filename(report)
+        with open(out, "wb") as f:
+            f.write(dumps(report))
+        print(out)
+        return 0
+    failed = 0
+    for path in args.paths:
+        try:
+            with open(path, "rb") as f:
+                blob = f.read()
+            uid = digest(blob)[:32]
+            store.save_report(uid, loads(blob))
+            print(f"{path}: {uid}")
+        except (OSError, SnapshotError) as e:
+            print(f"failed: {path}: {e}", file=sys.stderr)
+            failed += 1
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,19 @@
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+sys.path.append(os.path.join(ROOT, "benchmarks"))   # the AppTest harness
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    """A fresh report store (and shared-document hub over it) for app tests."""
+    import report_store
+    import shared_doc
+
+    monkeypatch.setattr(report_store, "_store", report_store.ReportStore(str(tmp_path / "npqp.sqlite3")))
+    monkeypatch.setattr(shared_doc, "_hub", None)
+    return report_store._store
@@ -0,0 +1,65 @@
+import time
+
+import pytest
+
+import ai_pool
+from ai_coach import CoachError, TTLCache, ask_coach, build_prompt, cache_key, response_cache
+from ai_pool import ClientPool
+from stub_openai import StubOpenAI
+
+
+def test_cache_entries_expire_and_the_oldest_is_dropped():
+    cache = TTLCache(maxsize=2, ttl=0.05)
+    cache.put("a", "A")
+    cache.put("b", "B")
+    cache.put("c", "C")
+    assert cache.get("a") is None and cache.get("c") == "C"
+    time.sleep(0.06)
+    assert cache.get("c") is None
+    assert cache.stats()["size"] == 1       # "b": expired, dropped on its next lookup
+
+
+def test_notes_differing_in_spacing_or_case_share_a_key():
+    keys = {cache_key(build_prompt(note, "English"), "English", "gpt", "key")
+            for note in ("No  audio on AMP-200 ", "no audio on amp-200")}
+    assert len(keys) == 1
+    assert cache_key(build_prompt("no audio", "English"), "English", "gpt", "key") != \
+        cache_key(build_prompt("no audio", "Español"), "Español", "gpt", "key")
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    monkeypatch.setattr(ai_pool, "_pool", ClientPool(rate=1000, burst=1000))
+    response_cache.clear()
+    yield
+    response_cache.clear()
+
+
+def test_reply_streams_then_comes_from_the_cache(pool):
+    with StubOpenAI(tokens=5) as stub:
+        stream = ask_coach("no audio", "English", "key", base_url=stub.base_url)
+        parts = list(stream.tokens())
+        again = ask_coach("no audio", "English", "key", base_url=stub.base_url)
+        assert len(parts) == 5 and not stream.cached
+        assert again.cached and "".join(again.tokens()) == "".join(parts)
+        assert stub.requests == 1
+
+
+def test_stalled_upstream_times_out(pool):
+    with StubOpenAI(tokens=5, first_token_delay=2.0) as stub:
+        stream = ask_coach("slow", "English", "key", timeout=0.2, base_url=stub.base_url)
+        t0 = time.monotonic()
+        with pytest.raises(CoachError, match="timed out"):
+            list(stream.tokens())
+        assert time.monotonic() - t0 < 1.5
+        assert response_cache.get(stream.key) is None
+
+
+def test_closing_the_stream_cancels_it_uncached(pool):
+    with StubOpenAI(tokens=200, token_delay=0.01) as stub:
+        stream = ask_coach("cancel me", "English", "key", base_url=stub.base_url)
+        tokens = stream.tokens()
+        next(tokens)
+        tokens.close()
+        assert stream.join(timeout=2)
+        assert response_cache.get(stream.key) is None
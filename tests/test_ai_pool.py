@@ -0,0 +1,114 @@
+import threading
+
+import pytest
+
+import ai_coach
+import ai_pool
+from ai_coach import ask_coach, response_cache
+from ai_pool import ClientPool, PoolBusy, TokenBucket
+from stub_openai import StubOpenAI
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeClient:
+    closed = False
+
+    def close(self):
+        self.closed = True
+
+
+def test_bucket_allows_a_burst_then_spaces_requests_at_the_rate():
+    clock = FakeClock()
+    bucket = TokenBucket(rate=2.0, burst=3, clock=clock)
+    assert [bucket.reserve() for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert bucket.reserve() == pytest.approx(0.5)
+    assert bucket.reserve() == pytest.approx(1.0)     # queued behind the previous reservation
+    bucket.refund()                                     # ...which gave up waiting
+    clock.now += 1.0
+    assert bucket.available == pytest.approx(1.0)
+    clock.now += 10.0
+    assert bucket.available == 3                        # never more than the burst
+
+
+def test_cap_queues_callers_and_records_the_depth():
+    pool = ClientPool(rate=1000, burst=1000, max_concurrent=2, factory=lambda key, url: FakeClient())
+    inside, release = threading.Semaphore(0), threading.Event()
+
+    def call(i):
+        with pool.lease(f"key-{i % 2}"):
+            inside.release()
+            release.wait(5)
+
+    threads = [threading.Thread(target=call, args=(i,)) for i in range(5)]
+    for t in threads:
+        t.start()
+    assert inside.acquire(timeout=5) and inside.acquire(timeout=5)
+    while pool.stats()["max_waiting"] < 3:
+        release.wait(0.01)
+    assert not inside.acquire(timeout=0.1)              # the other three are held at the cap
+    assert pool.stats()["active"] == 2
+    release.set()
+    for t in threads:
+        t.join(5)
+    st = pool.stats()
+    assert (st["calls"], st["active"], st["waiting"], st["max_waiting"]) == (5, 0, 0, 3)
+    assert st["clients"] == st["clients_created"] == 2   # one per key, reused
+
+
+def test_lease_gives_up_after_its_timeout():
+    pool = ClientPool(rate=1000, burst=1000, max_concurrent=1, factory=lambda key, url: FakeClient())
+    with pool.lease("key"):
+        with pytest.raises(PoolBusy):
+            with pool.lease("key", timeout=0.05):
+                pass
+    assert pool.stats()["rejected"] == 1 and pool.stats()["waiting"] == 0
+
+
+def test_idle_clients_beyond_the_limit_are_closed():
+    clients = []
+
+    def factory(key, url):
+        clients.append(FakeClient())
+        return clients[-1]
+
+    pool = ClientPool(rate=1000, burst=1000, max_clients=2, factory=factory)
+    for key in ("a", "b", "c"):
+        with pool.lease(key):
+            pass
+    assert [c.closed for c in clients] == [True, False, False]
+
+
+@pytest.fixture
+def stub(monkeypatch):
+    monkeypatch.setattr(ai_pool, "_pool", ClientPool(rate=1000, burst=1000))
+    response_cache.clear()
+    with StubOpenAI(tokens=40, token_delay=0.005) as stub:
+        yield stub
+    response_cache.clear()
+
+
+def test_identical_prompts_share_one_upstream_request(stub):
+    before = ai_coach.coalesced
+    streams = [ask_coach(note, "English", "key", base_url=stub.base_url)
+               for note in ("No  audio on AMP-200 ", "no audio on amp-200", "no audio on AMP-200")]
+    texts = {"".join(s.tokens()) for s in streams}
+    assert stub.requests == 1 and len(texts) == 1 and "" not in texts
+    assert ai_coach.coalesced - before == 2
+    assert ask_coach("no audio on amp-200", "English", "key", base_url=stub.base_url).cached
+
+
+def test_prompts_on_other_keys_are_not_shared(stub):
+    streams = [ask_coach("no audio on amp-200", "English", key, base_url=stub.base_url) for key in ("a", "b")]
+    for s in streams:
+        list(s.tokens())
+    assert stub.requests == 2 and not any(s.coalesced for s in streams)
+    other = ask_coach("no audio on amp-200", "English", "c", base_url=stub.base_url)
+    assert not other.cached
+    list(other.tokens())
@@ -0,0 +1,68 @@
+import datetime
+
+import pytest
+
+from analytics import NO_MONTH, AnalyticsIndex, month_index, month_label
+
+CREATED = datetime.datetime(2026, 10, 18).timestamp()
+
+
+@pytest.mark.parametrize("report_date", [
+    "2024-03-01",               # ISO, as imports and batch CSVs store it
+    "March 01, 2024",           # the app's default in English ("%B %d, %Y")
+    "01/03/2024",               # the app's default in Spanish ("%d/%m/%Y"): day first
+    "1 de marzo de 2024",
+    "Mar 1, 2024",
+])
+def test_month_of_each_date_format(report_date):
+    assert month_label(month_index(report_date, CREATED)) == "2024-03"
+
+
+def test_app_default_dates_are_read():
+    today = datetime.date(2024, 3, 1)
+    for fmt in ("%B %d, %Y", "%d/%m/%Y"):
+        assert month_label(month_index(today.strftime(fmt), CREATED)) == "2024-03"
+
+
+@pytest.mark.parametrize("report_date", ["Q1 2024", "13/13/2024", "Smarch 01, 2024", ""])
+def test_other_text_falls_back_to_created_at(report_date):
+    assert month_label(month_index(report_date, CREATED)) == "2026-10"
+    assert month_index(report_date) == NO_MONTH
+
+
+def test_index_months_from_app_dates():
+    index = AnalyticsIndex()
+    index.load([("a", "Nissan", "AMP-1", "March 01, 2024", CREATED, ""),
+                ("b", "Nissan", "AMP-1", "15/04/2024", CREATED, "")], [])
+    assert index.options()["months"] == ["2024-03", "2024-04"]
+
+
+def test_ties_at_the_cutoff_match_a_rebuild():
+    # 21 terms and 11 recurring root causes, all tied: which make the cut must not depend on edit history
+    words = ("anvil bracket cable damper enclosure fuse gasket heatsink insulator jumper knob lever "
+             "magnet nozzle oscillator pulley relay spring terminal valve washer").split()
+    rows, causes = {}, {}
+
+    def put(uid, word, root=""):
+        rows[uid] = ("Nissan", "AMP-1", "2024-03-01", CREATED, root)
+        causes[uid] = [("Material/Components", word)]
+
+    def fetch(uids):
+        uids = [u for u in uids if u in rows]
+        return [(u, *rows[u]) for u in uids], [(u, *c) for u in uids for c in causes[u]]
+
+    index = AnalyticsIndex(fetch)
+    for word in reversed(words):            # incremental: the names that sort last get the lowest ids
+        put(word, word, word)
+        index.notify(word)
+        index.query()
+    for word in words[:11]:                 # an edit elsewhere makes these root causes recur
+        put(f"{word}-2", "", word)
+        index.notify(f"{word}-2")
+    rebuilt = AnalyticsIndex()
+    rebuilt.load(*fetch(sorted(rows)))
+
+    got = index.query()
+    assert got == rebuilt.query()
+    assert [t for t, _ in got["terms"]] == words[:20]
+    assert [t for t, _ in got["themes"]] == words[:10]
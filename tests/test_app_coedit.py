@@ -0,0 +1,23 @@
+import sys
+
+import pytest
+from streamlit.testing.v1 import AppTest
+
+from apptest_harness import APP, new_app, timed_run
+
+
+@pytest.mark.parametrize("internals", ["present", "missing"])
+def test_a_polled_edit_reaches_the_step_tab(store, monkeypatch, internals):
+    a = new_app()
+    a.text_area(key="ans_0").input("Customer reports no audio").run()
+    b = AppTest.from_file(APP, default_timeout=60)
+    b.secrets["OPENAI_API_KEY"] = ""
+    b.query_params["report"] = a.session_state.report_uid
+    b.run()
+    if internals == "missing":
+        # The keyed rerun cannot be queued: the poll falls back to rerunning the whole app
+        monkeypatch.setitem(sys.modules, "streamlit.runtime.scriptrunner_utils.script_requests", None)
+    a.text_area(key="ans_3").input("Containment: quarantine lot 42").run()
+    timed_run(b, lambda at: None, len(list(b._fragment_storage._fragments)) - 1)   # the co-editing poll
+    assert not b.exception
+    assert b.text_area(key="ans_3").value == "Containment: quarantine lot 42"
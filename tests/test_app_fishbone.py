@@ -0,0 +1,18 @@
+from apptest_harness import new_app
+
+
+def _cause_keys(at, cat):
+    return [t.key for t in at.text_input if t.key and t.key.startswith(f"fb_{cat}_")]
+
+
+def test_only_one_page_of_causes_gets_widgets(store):
+    at = new_app(n=45)
+    assert _cause_keys(at, "People") == [f"fb_People_{j}" for j in range(20)]
+    at.button(key="add_People").click().run()
+    assert at.number_input(key="fb_page_People").value == 3       # the new, 46th slot
+    assert _cause_keys(at, "People") == [f"fb_People_{j}" for j in range(40, 46)]
+    at.text_input(key="fb_People_45").input("Operator skipped the torque check").run()
+    at.number_input(key="fb_page_People").set_value(1).run()
+    assert _cause_keys(at, "People")[0] == "fb_People_0"
+    assert at.session_state.fishbone["People"][45] == "Operator skipped the torque check"
+    assert not at.exception
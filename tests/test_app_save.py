@@ -0,0 +1,21 @@
+import snapshot
+from apptest_harness import new_app
+
+
+def test_reruns_do_not_serialize_the_snapshot(store, monkeypatch):
+    calls = []
+
+    def dumps(report):
+        calls.append(report)
+        return real(report)
+
+    real = snapshot.dumps
+    monkeypatch.setattr(snapshot, "dumps", dumps)
+    at = new_app(n=5)
+    at.text_input(key="rp_prod").input("AMP-1").run()
+    at.text_area(key="ans_0").input("Customer reports no audio").run()
+    assert not calls
+    at.button(key="save_report").click().run()
+    assert len(calls) == 1
+    assert calls[0]["info"]["product"] == "AMP-1"
+    assert not at.exception
@@ -0,0 +1,24 @@
+import datetime
+
+from assignments import AssignmentIndex
+
+TODAY = datetime.date(2026, 10, 18)
+
+
+def test_tied_owners_are_listed_by_name_as_in_a_rebuild():
+    rows = [("r1", "D1", "Zoe", "2026-10-01", "in_progress"),
+            ("r2", "D1", "Maria", "2026-10-01", "in_progress"),
+            ("r3", "D1", "Ana", "2026-12-01", "in_progress")]
+    index = AssignmentIndex()
+    index.load(rows[:1])
+    for uid, sid, owner, due, status in rows[1:]:
+        index.notify(uid, {sid: {"owner": owner, "due": due, "status": status}})
+    index.notify("r4", {"D2": {"owner": "Bea", "due": "2026-12-01", "status": "not_started"}})
+    index.notify("r4", None)
+
+    rebuilt = AssignmentIndex()
+    rebuilt.load(rows)
+    summary = index.summary(TODAY)
+    assert summary == rebuilt.summary(TODAY)
+    # overdue first, then open steps (the other 7 steps of each report are unassigned), then the name
+    assert summary["owners"] == [("Maria", 1, 1), ("Zoe", 1, 1), ("", 0, 21), ("Ana", 0, 1)]
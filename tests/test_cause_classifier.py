@@ -0,0 +1,42 @@
+from cause_classifier import CauseClassifier, sentences, tokens, train
+
+
+def test_stems_fold_case_accents_and_language():
+    assert tokens("Calibración VENCIDA") == tokens("calibracion vencida")
+    assert tokens("calibration")[0] == tokens("calibración")[0]
+    assert tokens("a 5V ok") == []                          # short words and digits carry nothing
+
+
+def test_sentences():
+    assert sentences("Operator not trained. Oven drifted;\n- Paste expired") == \
+        ["Operator not trained.", "Oven drifted;", "Paste expired"]
+
+
+def test_seed_lexicon_buckets_clear_causes_and_leaves_the_rest():
+    model = CauseClassifier.seed()
+    assert model.classify([
+        "Operator was not trained on the new fixture",
+        "Oven temperature profile drifted",
+        "Solder paste batch from new supplier",
+        "Humidity in the storage room too high",
+        "Work instruction missing the torque step",
+        "the thing broke",
+    ]) == ["People", "Machine/Equipment", "Material/Components", "Environment", "Process/Method", None]
+    assert model.classify([]) == []
+
+
+def test_propose_skips_causes_already_on_the_fishbone():
+    model = CauseClassifier.seed()
+    fishbone = {"People": ["Operator was not trained"]}
+    proposed = model.propose(["operator was NOT trained ", "Humidity too high", "Humidity too high"], fishbone)
+    assert proposed == {"Environment": ["Humidity too high"]}
+
+
+def test_training_learns_terms_from_stored_causes(tmp_path):
+    text = "Glue bead too thin"
+    assert CauseClassifier.seed().classify([text]) == [None]
+    model = train([("Material/Components", "Glue bead cracked"), ("Material/Components", "Glue lot expired"),
+                   ("Material/Components", "Thin glue bead")])
+    assert model.classify([text]) == ["Material/Components"]
+    model.save(str(tmp_path / "model.npz"))
+    assert CauseClassifier.load(str(tmp_path / "model.npz")).classify([text]) == ["Material/Components"]
@@ -0,0 +1,23 @@
+from fishbone import RenderCache, fishbone_key
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = RenderCache(maxsize=2)
+    cache.put("a", b"A")
+    cache.put("b", b"B")
+    assert cache.get("a") == b"A"          # "b" is now the least recently used
+    cache.put("c", b"C")
+    assert cache.get("b") is None
+    assert cache.get("a") == b"A" and cache.get("c") == b"C"
+    assert cache.stats() == {"size": 2, "maxsize": 2, "hits": 3, "misses": 1, "evictions": 1, "bytes": 2}
+
+
+def test_key_covers_causes_language_labels_and_format():
+    fishbone = {"People": ["Operator skipped the torque check"]}
+    labels = ["People", "Method"]
+    key = fishbone_key(fishbone, "English", labels)
+    assert key == fishbone_key({"People": ("Operator skipped the torque check",)}, "English", tuple(labels))
+    assert key != fishbone_key({"People": ["Operator skipped the torque check", ""]}, "English", labels)
+    assert key != fishbone_key(fishbone, "Español", labels)
+    assert key != fishbone_key(fishbone, "English", ["Personas", "Método"])
+    assert key != fishbone_key(fishbone, "English", labels, fmt="png")
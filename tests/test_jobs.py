@@ -0,0 +1,90 @@
+import threading
+
+import pytest
+
+from jobs import CANCELLED, DONE, RUNNING, JobExecutor, JobQueueFull
+
+
+def _blocking(started, gate):
+    def fn(job):
+        started.set()
+        while not gate.wait(0.01):
+            job.check()
+        return "built"
+    return fn
+
+
+def test_identical_jobs_are_shared():
+    ex = JobExecutor(max_workers=1)
+    started, gate = threading.Event(), threading.Event()
+    first = ex.submit("xlsx", _blocking(started, gate), key="k")
+    second = ex.submit("xlsx", _blocking(started, gate), key="k")
+    assert second is first and first.holders == 2
+    other = ex.submit("xlsx", lambda job: "other", key="k2")
+    assert other is not first
+    gate.set()
+    assert first.wait(5) and other.wait(5)
+    assert (first.state, first.result, other.result) == (DONE, "built", "other")
+    assert ex.submit("xlsx", lambda job: "again", key="k") is first     # recently done: still shared
+    assert ex.stats()["deduped"] == 2
+
+
+def test_running_job_is_cancelled_when_the_last_holder_releases():
+    ex = JobExecutor(max_workers=1)
+    started, gate = threading.Event(), threading.Event()
+    interrupted = threading.Event()
+    job = ex.submit("render", _blocking(started, gate), key="k")
+    job.on_cancel(interrupted.set)
+    ex.submit("render", _blocking(started, gate), key="k")
+    assert started.wait(5)
+    ex.release(job.id)
+    assert not job.cancelled                 # the other session still holds it
+    ex.release(job.id)
+    assert interrupted.is_set()
+    assert job.wait(5) and job.state == CANCELLED
+    # A cancelled job is not handed out again
+    assert ex.submit("render", lambda job: "fresh", key="k") is not job
+
+
+def test_queued_job_is_cancelled_without_running():
+    ex = JobExecutor(max_workers=1)
+    started, gate = threading.Event(), threading.Event()
+    ran = []
+    running = ex.submit("xlsx", _blocking(started, gate))
+    assert started.wait(5)
+    queued = ex.submit("xlsx", lambda job: ran.append(1))
+    ex.release(queued.id)
+    assert queued.done and queued.state == CANCELLED
+    gate.set()
+    assert running.wait(5)
+    ex._queue.join()
+    assert not ran
+
+
+def test_full_queue_rejects():
+    ex = JobExecutor(max_workers=1, max_queue=1)
+    started, gate = threading.Event(), threading.Event()
+    ex.submit("xlsx", _blocking(started, gate))
+    assert started.wait(5)
+    ex.submit("xlsx", lambda job: None)
+    with pytest.raises(JobQueueFull):
+        ex.submit("xlsx", lambda job: None)
+    gate.set()
+    assert ex.stats()["rejected"] == 1
+
+
+def test_report_is_the_cancellation_point():
+    ex = JobExecutor(max_workers=1)
+    go = threading.Event()
+
+    def fn(job):
+        go.wait(5)
+        job.report(0.5)
+        return "not cancelled"
+
+    job = ex.submit("xlsx", fn)
+    while job.state != RUNNING:
+        job.wait(0.01)
+    ex.release(job.id)
+    go.set()
+    assert job.wait(5) and job.state == CANCELLED and job.result is None
@@ -0,0 +1,63 @@
+import urllib.request
+
+from metrics import CONTENT_TYPE, Metrics
+
+
+def test_disabled_registry_records_nothing():
+    m = Metrics(enabled=False)
+    fn = lambda: None  # noqa: E731
+    assert m.timed("x")(fn) is fn
+    with m.span("x"):
+        m.inc("npqp_saves_total")
+    m.start_rerun()
+    m.end_rerun()
+    assert all(line.startswith("# ") for line in m.exposition().splitlines())   # headers, no samples
+
+
+def test_exposition_format():
+    m = Metrics(enabled=True)
+    with m.span("save"):
+        pass
+    m.observe_section("save", 0.3)
+    m.inc("npqp_saves_total", help="Excel saves.")
+    m.inc("npqp_saves_total", 2)
+    m.inc("npqp_ai_calls_total", cached="true")
+    m.gauge("npqp_jobs", "Jobs by state.", lambda: {"queued": 1, "running": 2}, labels=("state",))
+    m.gauge("npqp_broken", "Raises when scraped.", lambda: 1 / 0)
+    with m.rerun("fragment"):
+        pass
+    lines = m.exposition().splitlines()
+
+    assert "# TYPE npqp_section_seconds histogram" in lines
+    assert 'npqp_section_seconds_bucket{le="0.25",section="save"} 1' in lines
+    assert 'npqp_section_seconds_bucket{le="0.5",section="save"} 2' in lines
+    assert 'npqp_section_seconds_bucket{le="+Inf",section="save"} 2' in lines
+    assert 'npqp_section_seconds_count{section="save"} 2' in lines
+    assert 'npqp_rerun_seconds_count{scope="fragment"} 1' in lines
+    assert "# HELP npqp_saves_total Excel saves." in lines and "npqp_saves_total 3" in lines
+    assert 'npqp_ai_calls_total{cached="true"} 1' in lines
+    assert 'npqp_reruns_total{scope="fragment"} 1' in lines
+    assert 'npqp_jobs{state="queued"} 1' in lines and 'npqp_jobs{state="running"} 2' in lines
+    assert not any("npqp_broken" in line for line in lines)       # a failing gauge is skipped
+    assert any(line.startswith("npqp_process_resident_bytes ") for line in lines)
+
+
+def test_label_values_are_escaped():
+    m = Metrics(enabled=True)
+    m.inc("npqp_errors_total", kind='say "hi"\\\n')
+    assert 'npqp_errors_total{kind="say \\"hi\\"\\\\\\n"} 1' in m.exposition().splitlines()
+
+
+def test_textfile_and_http_endpoint(tmp_path):
+    m = Metrics(enabled=True)
+    m.inc("npqp_saves_total")
+    path = tmp_path / "npqp.prom"
+    m.write_textfile(str(path))
+    assert "npqp_saves_total 1" in path.read_text().splitlines()
+    server = m.serve(port=0)
+    try:
+        with urllib.request.urlopen(f"http://127.0.0.1:{server.server_address[1]}/metrics") as r:
+            assert r.headers["Content-Type"] == CONTENT_TYPE
+            assert b"npqp_saves_total 1" in r.read()
+    finally:
+        server.shutdown()
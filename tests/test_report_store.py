@@ -0,0 +1,78 @@
+import copy
+import time
+
+from report_model import empty_report
+from report_store import Autosaver, ReportStore
+
+
+def _report():
+    report = empty_report()
+    report["info"].update(customer="Nissan", product="AMP-1")
+    report["steps"]["D1"].update(answer="No audio on power-up", owner="Ana", due="2026-10-01",
+                                 status="in_progress")
+    report["d5_root"] = "Mute line left floating"
+    report["whys"]["occ"], report["why_parents"]["occ"] = ["Muted", "Line floating", "Firmware"], [-1, 0, 0]
+    report["fishbone"]["People"] = ["Operator skipped the check"]
+    return report
+
+
+def _content(report):
+    return {k: v for k, v in report.items() if k not in ("uid", "status", "updated_at")}
+
+
+def test_round_trip_and_field_updates(tmp_path):
+    store = ReportStore(str(tmp_path / "db.sqlite3"))
+    report = _report()
+    uid = store.create_report(report)
+    assert _content(store.load_report(uid)) == _content(report)
+
+    store.apply_changes(uid, {("step", "D1", "status"): "done", ("cause", "People", 1): "Shift change"},
+                        removed=[("why", "occ", 2)])
+    loaded = store.load_report(uid)
+    assert loaded["steps"]["D1"]["status"] == "done"
+    assert loaded["fishbone"]["People"] == ["Operator skipped the check", "Shift change"]
+    assert loaded["whys"]["occ"] == ["Muted", "Line floating"]
+    assert store.load_report("missing") is None
+
+
+def test_filters(tmp_path):
+    store = ReportStore(str(tmp_path / "db.sqlite3"))
+    late = store.create_report(_report())
+    other = copy.deepcopy(_report())
+    other["info"]["customer"] = "Ford"
+    other["steps"]["D1"]["due"] = "2026-12-01"
+    store.create_report(other)
+    assert [r["uid"] for r in store.list_reports(customer="Nissan")] == [late]
+    assert [r["uid"] for r in store.list_reports(due_before="2026-10-18")] == [late]
+    assert len(store.list_reports(owner="Ana")) == 2 and store.list_reports(owner="Bea") == []
+
+
+def test_edits_are_batched_and_an_untouched_draft_is_never_stored(tmp_path):
+    store = ReportStore(str(tmp_path / "db.sqlite3"))
+    draft = empty_report()
+    saver = Autosaver(store, "d1", delay=60, max_wait=60)
+    saver.flush()
+    assert not saver.stored and store.load_report("d1") is None
+
+    for answer in ("N", "No", "No audio"):
+        draft["steps"]["D1"]["answer"] = answer
+        saver.queue({("step", "D1", "answer"): answer}, report=draft)
+    assert saver.dirty and store.load_report("d1") is None
+    saver.flush()
+    assert saver.stored and saver.flushes == 1
+    assert store.load_report("d1")["steps"]["D1"]["answer"] == "No audio"
+
+    saver.sync(copy.deepcopy(draft))
+    assert not saver.dirty                    # nothing differs from what was stored
+
+
+def test_quiet_edits_flush_on_their_own(tmp_path):
+    store = ReportStore(str(tmp_path / "db.sqlite3"))
+    uid = store.create_report()
+    saver = Autosaver(store, uid, store.load_report(uid), delay=0.01, max_wait=0.05)
+    saver.queue({("info", "customer"): "Nissan"})
+    deadline = time.monotonic() + 2
+    while saver.dirty and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert saver.flushes == 1
+    assert store.load_report(uid)["info"]["customer"] == "Nissan"
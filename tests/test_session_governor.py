@@ -0,0 +1,68 @@
+import os
+
+from report_model import empty_report
+from session_governor import SPILLED, SessionGovernor, footprint
+from why_tree import WhyTree
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def _state():
+    report = empty_report()
+    report["info"]["product"] = "AMP-1"
+    return {"report": report, "d5_occ": WhyTree.chain(["Why 1", "Why 2"]), "fishbone": {"People": ["Operator"]}}
+
+
+def test_spilled_state_comes_back_intact(tmp_path):
+    gov = SessionGovernor(spill_dir=str(tmp_path))
+    state = _state()
+    gov.activity("s1", footprint(state))
+    gov.spill("s1", state)
+    assert gov.is_spilled("s1") and gov.check("s1") == SPILLED
+    st = gov.stats()
+    assert (st["resident_bytes"], st["spilled"]) == (0, 1) and st["spilled_bytes"] > 0
+
+    restored = gov.restore("s1")
+    assert restored["report"] == state["report"] and restored["fishbone"] == state["fishbone"]
+    assert restored["d5_occ"].to_lists() == state["d5_occ"].to_lists()
+    assert not gov.is_spilled("s1") and os.listdir(gov.spill_dir) == []
+    assert gov.stats()["restores"] == 1
+
+
+def test_unreadable_spill_file_is_counted_lost(tmp_path):
+    gov = SessionGovernor(spill_dir=str(tmp_path))
+    gov.spill("s1", _state())
+    with open(os.path.join(gov.spill_dir, "s1.pkl.z"), "wb") as f:
+        f.write(b"not zlib")
+    assert gov.restore("s1") is None
+    assert not gov.is_spilled("s1") and gov.stats()["lost"] == 1
+
+
+def test_idle_session_is_told_to_spill(tmp_path):
+    clock = FakeClock()
+    gov = SessionGovernor(idle=900, min_resident=60, spill_dir=str(tmp_path), clock=clock)
+    gov.activity("s1", 100)
+    polls = []
+    for _ in range(30):                       # the open tab polls every 30 s
+        clock.now += 30
+        polls.append(gov.check("s1"))
+    assert polls == [None] * 29 + ["idle"]
+
+
+def test_over_budget_the_least_recently_active_spill_first(tmp_path):
+    clock = FakeClock()
+    gov = SessionGovernor(budget_bytes=250, min_resident=60, spill_dir=str(tmp_path), clock=clock)
+    for sid in ("old", "mid", "new"):
+        gov.activity(sid, 100)
+        clock.now += 10
+    assert gov.check("old") is None           # everyone was active within min_resident
+    clock.now += 60
+    assert [gov.check(sid) for sid in ("old", "mid", "new")] == ["budget", None, None]
+    gov.spill("old", {}, reason="budget")
+    assert gov.check("mid") is None and gov.stats()["resident_bytes"] == 200
@@ -0,0 +1,73 @@
+from report_model import REMOVED, empty_report, flatten
+from report_store import ReportStore
+from shared_doc import LOG_SIZE, DocumentHub
+
+
+def _hub():
+    store = ReportStore(":memory:")
+    report = empty_report()
+    report["fishbone"]["People"] = ["Operator skipped the check", "Shift handover missing"]
+    return DocumentHub(store), store.create_report(report)
+
+
+def test_edits_reach_other_sessions_and_first_write_wins():
+    hub, uid = _hub()
+    a, b = hub.open(uid), hub.open(uid)
+    ra, rb = a.report, b.report
+    ra["steps"]["D4"]["answer"] = "Quarantine lot 42"
+    ra["steps"]["D6"]["answer"] = "A's fix"
+    assert a.push(ra) == set()
+    rb["steps"]["D6"]["answer"] = "B's fix"       # made before B pulled A's D6
+    assert b.push(rb) == {("step", "D6", "answer")}
+    changes = b.pull()
+    assert changes[("step", "D4", "answer")] == "Quarantine lot 42"
+    assert changes[("step", "D6", "answer")] == "A's fix"
+    assert a.pull() == {}
+
+
+def test_a_changed_list_item_comes_with_the_whole_list():
+    hub, uid = _hub()
+    a, b = hub.open(uid), hub.open(uid)
+    report = a.report
+    report["fishbone"]["People"] = ["Operator skipped the check"]
+    a.push(report)
+    assert b.pull() == {("cause", "People", 0): "Operator skipped the check", ("cause", "People", 1): REMOVED}
+
+
+def test_sessions_keep_no_copy_of_the_report():
+    hub, uid = _hub()
+    editors = [hub.open(uid) for _ in range(50)]
+    for i, ed in enumerate(editors):
+        ed.pull()
+        report = ed.report
+        report["steps"]["D2"]["answer"] = f"edit {i}"
+        ed.push(report)
+    assert all(not isinstance(v, dict) or not v for ed in editors for v in vars(ed).values())
+    assert flatten(editors[-1].report) == editors[-1].doc.state()[0]
+
+
+def test_a_session_behind_the_log_does_not_overwrite_newer_edits():
+    hub, uid = _hub()
+    a, b = hub.open(uid), hub.open(uid)
+    stale = b.report
+    for i in range(LOG_SIZE + 10):
+        report = a.report
+        report["steps"]["D3"]["answer"] = f"edit {i}"
+        a.push(report)
+    stale["steps"]["D7"]["answer"] = "B's own edit"
+    assert b.push(stale) == {("step", "D3", "answer")}
+    assert a.pull() == {("step", "D7", "answer"): "B's own edit"}
+    assert b.pull()[("step", "D3", "answer")] == f"edit {LOG_SIZE + 9}"
+
+
+def test_a_draft_is_stored_on_its_first_edit_not_its_defaults():
+    hub, _ = _hub()
+    draft = empty_report()
+    draft["info"]["report_date"] = "October 18, 2026"
+    a = hub.open("new-draft", draft)
+    a.push(draft)
+    assert not a.autosaver.dirty and not a.autosaver.stored
+    draft["steps"]["D1"]["answer"] = "No audio on AMP-200"
+    a.push(draft)
+    a.autosaver.flush()
+    assert hub.store.load_report("new-draft")["info"]["report_date"] == "October 18, 2026"
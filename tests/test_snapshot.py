@@ -0,0 +1,75 @@
+import json
+import zlib
+
+import pytest
+
+import snapshot
+from catalog import T
+from report_model import empty_report, session_model
+from snapshot import SnapshotError
+
+
+def _blob(doc, version=snapshot.FORMAT_VERSION):
+    """Snapshot bytes for `doc` as written, skipping the normalization dumps() applies."""
+    body = json.dumps(doc).encode("utf-8")
+    return snapshot.MAGIC + bytes([version]) + zlib.compress(body)
+
+
+def test_round_trip():
+    report = empty_report()
+    report["steps"]["D3"]["due"] = "2026-10-18"
+    assert snapshot.loads(snapshot.dumps(report)) == report
+
+
+@pytest.mark.parametrize("due", ["TBD", "18/10/2026", "2026-13-01", 20261018, ["2026-10-18"]])
+def test_non_iso_due_loads_as_no_due(due):
+    doc = empty_report()
+    doc["steps"]["D3"]["due"] = due
+    report = snapshot.loads(_blob(doc))
+    assert report["steps"]["D3"]["due"] is None
+    assert session_model(report, T["en"])["dues"]["D3: Initial Analysis"] is None
+
+
+def test_iso_datetime_due_keeps_the_date():
+    doc = empty_report()
+    doc["steps"]["D3"]["due"] = "2026-10-18T09:30:00"
+    assert snapshot.loads(_blob(doc))["steps"]["D3"]["due"] == "2026-10-18"
+
+
+@pytest.mark.parametrize("path, value", [
+    ((), []),
+    (("info",), ["Nissan"]),
+    (("steps",), "D1"),
+    (("steps", "D2"), ["answer"]),
+    (("whys",), ["why 1"]),
+    (("whys", "occ"), "why 1"),
+    (("fishbone",), [["cause"]]),
+    (("fishbone", "People"), {"0": "cause"}),
+])
+def test_wrong_container_type_is_a_snapshot_error(path, value):
+    doc = empty_report()
+    if path:
+        parent = doc
+        for key in path[:-1]:
+            parent = parent[key]
+        parent[path[-1]] = value
+    else:
+        doc = value
+    for version in (1, snapshot.FORMAT_VERSION):
+        with pytest.raises(SnapshotError):
+            snapshot.loads(_blob(doc, version))
+    with pytest.raises(SnapshotError):
+        snapshot.normalize(doc)
+
+
+def test_xlsx_command_embeds_the_fishbone(tmp_path, capsys):
+    from openpyxl import load_workbook
+
+    report = empty_report()
+    report["fishbone"]["People"] = ["Operator skipped the torque check"]
+    path = tmp_path / "report.8d"
+    path.write_bytes(snapshot.dumps(report))
+    assert snapshot.main(["xlsx", str(path)]) == 0
+    wb = load_workbook(capsys.readouterr().out.strip())
+    (image,) = wb["Fishbone"]._images
+    assert (image.anchor._from.col, image.anchor._from.row) == (0, 0)
@@ -0,0 +1,48 @@
+import pytest
+
+from why_tree import ROOT, WhyTree, chain_parents, clean_parents, parse_outline
+
+
+def _branched():
+    tree = WhyTree()
+    a = tree.add(text="No audio")
+    b = tree.add(a, "Amplifier muted")
+    tree.add(b, "Mute line floating")
+    c = tree.add(b, "Firmware mutes on boot")
+    tree.add(c, "Boot flag not cleared")
+    tree.add(a, "Speaker open")
+    tree.add(text="Test passed anyway")
+    return tree
+
+
+def test_chain_outline_is_one_why_per_line():
+    tree = WhyTree.chain(["Why 1", "", "Why 3"])
+    assert tree.outline() == ["Why 1", "Why 3"]
+    assert parse_outline(tree.outline()) == (["Why 1", "Why 3"], chain_parents(2))
+
+
+@pytest.mark.parametrize("make", [_branched, lambda: WhyTree.chain(["only"]), WhyTree])
+def test_outline_round_trip(make):
+    tree = make()
+    texts, parents = parse_outline(tree.outline())
+    assert WhyTree.from_lists(texts, parents).to_lists() == tree.to_lists()
+
+
+def test_outline_round_trip_ignores_blank_lines():
+    lines = _branched().outline()
+    assert parse_outline(lines[:2] + ["", "   "] + lines[2:]) == parse_outline(lines)
+
+
+def test_remove_drops_the_subtree():
+    tree = _branched()
+    muted = tree.children(tree.children(ROOT)[0])[0]
+    assert tree.subtree_size(muted) == 3
+    assert tree.remove(muted) == 4
+    assert len(tree) == 3 and muted not in tree
+    assert tree.to_lists() == (["No audio", "Speaker open", "Test passed anyway"], [-1, 0, -1])
+    assert tree.add(tree.children(ROOT)[1], "Waiver") == 8     # ids are never reused
+
+
+def test_invalid_or_missing_parents_continue_the_chain():
+    assert clean_parents([-1, 0, 5, -1, True, "x"], 7) == [-1, 0, 1, -1, 3, 4, 5]
+    assert clean_parents(None, 3) == chain_parents(3)
@@ -0,0 +1,56 @@
+import io
+import zipfile
+
+import pytest
+
+from report_model import empty_report
+from snapshot import SnapshotError
+from why_tree import chain_parents
+from xlsx_batch import coerce, generate_workbooks, report_from_row, workbook_name
+
+
+@pytest.mark.parametrize("status, code", [
+    ("done", "done"),
+    ("In progress", "in_progress"),
+    (" Terminado ", "done"),
+    ("En progreso", "in_progress"),
+    ("finished", "not_started"),
+    (None, "not_started"),
+])
+def test_status_codes_and_labels_are_read(status, code):
+    doc = empty_report()
+    doc["steps"]["D3"]["status"] = status
+    name, report = coerce(doc)
+    assert name is None and report["steps"]["D3"]["status"] == code
+
+
+def test_record_name_and_missing_fields():
+    name, report = coerce({"name": "lot-7", "info": {"customer": "Nissan"}})
+    assert name == "lot-7"
+    assert report["info"]["customer"] == "Nissan" and report["steps"]["D1"]["answer"] == ""
+    assert workbook_name(3, name, report) == "lot-7.xlsx"
+    assert workbook_name(3, None, report) == "00003_NPQP_8D_Nissan.xlsx"
+
+
+@pytest.mark.parametrize("doc", [[], "report", {"steps": ["D1"]}])
+def test_malformed_record_is_a_snapshot_error(doc):
+    with pytest.raises(SnapshotError):
+        coerce(doc)
+
+
+def test_csv_row():
+    _, report = coerce(report_from_row({
+        "customer": "Nissan", "language": "ES", "D3_status": "En progreso",
+        "whys_occ": "Why 1\n\nWhy 2", "People": "Operator\n  \nShift change",
+    }))
+    assert report["language"] == "es" and report["steps"]["D3"]["status"] == "in_progress"
+    assert report["whys"]["occ"] == ["Why 1", "Why 2"] and report["why_parents"]["occ"] == chain_parents(2)
+    assert report["fishbone"]["People"] == ["Operator", "Shift change"]
+
+
+def test_zip_output_keeps_going_past_a_bad_record():
+    buf = io.BytesIO()
+    stats = generate_workbooks([{"name": "a"}, ["not a report"], {"name": "b"}], zip_to=buf, workers=1,
+                               fishbone=False)
+    assert (stats["reports"], stats["written"], len(stats["failed"])) == (3, 2, 1)
+    assert sorted(zipfile.ZipFile(buf).namelist()) == ["a.xlsx", "b.xlsx"]
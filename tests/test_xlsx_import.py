@@ -0,0 +1,34 @@
+import datetime
+import io
+
+from openpyxl import load_workbook
+
+from catalog import T
+from report_model import empty_report, report_rows, session_model
+from xlsx_export import build_8d_workbook
+from xlsx_import import FIRST_STEP_ROW, parse_8d_workbook
+
+
+def _workbook(dues):
+    """An exported 8D workbook whose due cells (D1, D2, ...) are overwritten with `dues`."""
+    wb = load_workbook(io.BytesIO(build_8d_workbook(report_rows(empty_report(), T["en"]))))
+    ws = wb.active
+    for i, due in enumerate(dues):
+        ws.cell(row=FIRST_STEP_ROW + i, column=5, value=due)
+    buf = io.BytesIO()
+    wb.save(buf)
+    buf.seek(0)
+    return buf
+
+
+def test_non_iso_due_cells_import_as_no_due():
+    report = parse_8d_workbook(_workbook(["TBD", "next week", "18/10/2026"]))
+    assert [report["steps"][sid]["due"] for sid in ("D1", "D2", "D3")] == [None, None, None]
+    # The imported report opens
+    assert set(session_model(report, T["en"])["dues"].values()) == {None}
+
+
+def test_date_and_iso_due_cells_import_as_iso_dates():
+    report = parse_8d_workbook(_workbook([datetime.datetime(2026, 10, 18, 9, 30), "2026-11-02", " 2026-12-01 "]))
+    assert [report["steps"][sid]["due"] for sid in ("D1", "D2", "D3")] == ["2026-10-18", "2026-11-02", "2026-12-01"]
+    assert session_model(report, T["en"])["dues"]["D1: Concern Details"] == datetime.date(2026, 10, 18)
@@ -0,0 +1,205 @@
+# ===========================
+# 8D Training App — 5-Why Cause Tree
+# Occurrence / Detection chains that may branch: one Why can have several
+# contributing causes. Nodes live in flat parallel arrays indexed by a stable
+# integer id (O(1) lookup, no per-node objects); reports carry the tree as a
+# pre-order text list plus a parent index per entry, and export it as the
+# plain D5 outline text.
+# ===========================
+
+from array import array
+
+ROOT = 0          # hidden root: its children are the first Whys of each chain
+_DEAD = -2        # parent of a removed node (ids are never reused: they key widgets)
+INDENT = "  "
+BULLET = "- "
+
+
+def chain_parents(n):
+    """Parents of a plain chain of `n` Whys (each one answers the previous): [-1, 0, 1, ...]."""
+    return list(range(-1, n - 1))
+
+
+def clean_parents(parents, n):
+    """`parents` made valid for `n` pre-order entries: an int in [-1, i) for entry i, else i - 1.
+
+    Missing parents (None, or a short list) therefore continue a plain chain.
+    """
+    parents = list(parents or ())[:n]
+    out = []
+    for i in range(n):
+        p = parents[i] if i < len(parents) else None
+        out.append(p if isinstance(p, int) and not isinstance(p, bool) and -1 <= p < i else i - 1)
+    return out
+
+
+class WhyTree:
+    """One Why chain with branches. Node ids are array slots; ROOT is a hidden sentinel."""
+
+    __slots__ = ("text", "parent", "first", "last", "next", "size")
+
+    def __init__(self):
+        self.text = [""]
+        self.parent = array("i", [-1])
+        self.first = array("i", [-1])     # first child
+        self.last = array("i", [-1])      # last child: appending a child is O(1)
+        self.next = array("i", [-1])      # next sibling
+        self.size = 0                     # live nodes, ROOT excluded
+
+    @classmethod
+    def from_lists(cls, texts, parents=None):
+        """Tree from pre-order `texts` and their parent positions (-1 = top level; None = a chain)."""
+        tree = cls()
+        texts = list(texts or ())
+        parents = clean_parents(chain_parents(len(texts)) if parents is None else parents, len(texts))
+        ids = []
+        for text, p in zip(texts, parents):
+            ids.append(tree.add(ROOT if p < 0 else ids[p], text))
+        return tree
+
+    @classmethod
+    def chain(cls, texts):
+        return cls.from_lists(texts)
+
+    def to_lists(self):
+        """(texts, parents) in pre-order with positions renumbered; inverse of from_lists."""
+        texts, parents, pos = [], [], {ROOT: -1}
+        for node, _ in self.walk():
+            pos[node] = len(texts)
+            texts.append(self.text[node])
+            parents.append(pos[self.parent[node]])
+        return texts, parents
+
+    def __len__(self):
+        return self.size
+
+    def __contains__(self, node):
+        return isinstance(node, int) and 0 < node < len(self.text) and self.parent[node] != _DEAD
+
+    # ---------- edits ----------
+    def add(self, parent=ROOT, text=""):
+        """Append a new last child of `parent`; returns its id."""
+        if parent != ROOT and parent not in self:
+            raise KeyError(parent)
+        node = len(self.text)
+        self.text.append(text)
+        self.parent.append(parent)
+        self.first.append(-1)
+        self.last.append(-1)
+        self.next.append(-1)
+        if self.first[parent] < 0:
+            self.first[parent] = node
+        else:
+            self.next[self.last[parent]] = node
+        self.last[parent] = node
+        self.size += 1
+        return node
+
+    def remove(self, node):
+        """Drop `node` and everything below it; returns the number of nodes removed."""
+        if node not in self:
+            raise KeyError(node)
+        parent = self.parent[node]
+        prev, cur = -1, self.first[parent]
+        while cur != node:
+            prev, cur = cur, self.next[cur]
+        if prev < 0:
+            self.first[parent] = self.next[node]
+        else:
+            self.next[prev] = self.next[node]
+        if self.last[parent] == node:
+            self.last[parent] = prev
+        removed = 0
+        stack = [node]
+        while stack:
+            cur = stack.pop()
+            stack.extend(self.children(cur))
+            self.parent[cur] = _DEAD
+            self.text[cur] = ""
+            removed += 1
+        self.size -= removed
+        return removed
+
+    # ---------- reads ----------
+    def children(self, node=ROOT):
+        out, cur = [], self.first[node]
+        while cur >= 0:
+            out.append(cur)
+            cur = self.next[cur]
+        return out
+
+    def subtree_size(self, node):
+        """Nodes below `node` (itself excluded)."""
+        n, stack = 0, self.children(node)
+        while stack:
+            cur = stack.pop()
+            n += 1
+            stack.extend(self.children(cur))
+        return n
+
+    def texts(self):
+        """Non-empty Why texts in pre-order."""
+        return [self.text[n] for n, _ in self.walk() if self.text[n].strip()]
+
+    def walk(self, collapsed=()):
+        """Yield (id, depth) in pre-order, not descending into ids in `collapsed`."""
+        stack = [(c, 0) for c in reversed(self.children(ROOT))]
+        while stack:
+            node, depth = stack.pop()
+            yield node, depth
+            if node not in collapsed:
+                stack.extend((c, depth + 1) for c in reversed(self.children(node)))
+
+    def rows(self, collapsed=()):
+        """Yield (id, depth, level, branch) for display and export.
+
+        `level` counts branching ancestors: a chain stays at level 0, the causes
+        under a Why with several of them sit one level deeper, and each of those
+        is a `branch` (drawn with a bullet).
+        """
+        top = self.children(ROOT)
+        fork = len(top) > 1
+        stack = [(c, 0, int(fork), fork) for c in reversed(top)]
+        while stack:
+            node, depth, level, branch = stack.pop()
+            yield node, depth, level, branch
+            if node in collapsed:
+                continue
+            kids = self.children(node)
+            fork = len(kids) > 1
+            stack.extend((c, depth + 1, level + fork, fork) for c in reversed(kids))
+
+    def outline(self):
+        """The tree as D5 answer lines; a plain chain gives exactly its non-empty Whys, one per line."""
+        lines = []
+        for node, _, level, branch in self.rows():
+            text = self.text[node].strip()
+            if text:
+                lines.append(INDENT * (level - branch) + BULLET + text if branch else INDENT * level + text)
+        return lines
+
+
+def parse_outline(lines):
+    """Inverse of WhyTree.outline: (texts, parents) from outline lines (blank lines ignored)."""
+    texts, parents, stack = [], [], []   # stack: (content indent, position) along the current path
+    for line in lines:
+        body = line.lstrip()
+        if not body:
+            continue
+        indent = len(line) - len(body)
+        branch = body.startswith(BULLET)
+        if branch:
+            body = body[len(BULLET):].lstrip()
+        while stack and stack[-1][0] > indent:
+            stack.pop()
+        parent = stack[-1][1] if stack and stack[-1][0] == indent else -1
+        if branch:
+            content = indent + len(BULLET)
+        else:
+            content = indent
+            if parent >= 0:
+                stack.pop()     # the chain continues from the last Why at this indent
+        texts.append(body)
+        parents.append(parent)
+        stack.append((content, len(texts) - 1))
+    return texts, parents
@@ -0,0 +1,255 @@
+# ===========================
+# 8D Report — Batch Workbook Generator
+# Builds NPQP workbooks from structured report data (JSON, JSON Lines or CSV,
+# e.g. D1-D4 pre-filled from defect records) without Streamlit, across a
+# process pool; one file per report, or all of them streamed into one zip.
+# Same builder as the app's export: layout, step colors, bilingual labels.
+# Run: python xlsx_batch.py INPUT [INPUT ...] (-o DIR | --zip OUT.zip) [--workers N] [--no-fishbone]
+# ===========================
+
+import argparse
+import collections
+import csv
+import io
+import json
+import os
+import sys
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+
+from report_model import FISHBONE_CATEGORIES, INFO_FIELDS, STATUS_CODES, STEP_IDS, WHY_KINDS, status_code
+from snapshot import SnapshotError, normalize
+from why_tree import parse_outline
+
+CHUNK_SIZE = 32        # reports per pool task
+WINDOW = 4             # chunks in flight per worker: bounds memory however long the input is
+STEP_FIELDS = ("answer", "owner", "due", "status")
+
+# CSV columns: report_date, prepared_by, product, customer, language, name,
+# D1_answer .. D8_status, d5_root, whys_occ / whys_det (the D5 outline text,
+# one Why per line), and one column per fishbone category (one cause per line).
+CSV_COLUMNS = (
+    "name", *INFO_FIELDS, "language",
+    *(f"{sid}_{f}" for sid in STEP_IDS for f in STEP_FIELDS),
+    "d5_root", *(f"whys_{k}" for k in WHY_KINDS), *FISHBONE_CATEGORIES,
+)
+
+
+class BatchInputError(ValueError):
+    """An input file is not report data in a supported format."""
+
+
+def _lines(text):
+    return [line for line in (text or "").splitlines() if line.strip()]
+
+
+def report_from_row(row):
+    """Report dict from one CSV row keyed by CSV_COLUMNS (unknown columns are ignored)."""
+    doc = {
+        "info": {f: row.get(f, "") for f in INFO_FIELDS},
+        "language": (row.get("language") or "en").strip().lower()[:2],
+        "steps": {sid: {f: row.get(f"{sid}_{f}", "") for f in STEP_FIELDS} for sid in STEP_IDS},
+        "d5_root": row.get("d5_root", ""),
+        "whys": {}, "why_parents": {},
+        "fishbone": {c: _lines(row.get(c)) for c in FISHBONE_CATEGORIES},
+    }
+    for kind in WHY_KINDS:
+        doc["whys"][kind], doc["why_parents"][kind] = parse_outline(_lines(row.get(f"whys_{kind}")))
+    return doc
+
+
+def coerce(doc):
+    """(name, report) from one input record; step status may be a code or an EN/ES label."""
+    if not isinstance(doc, dict):
+        raise SnapshotError("report must be an object")
+    steps = doc.get("steps")
+    if isinstance(steps, dict):
+        steps = {sid: {**s, "status": s.get("status") if s.get("status") in STATUS_CODES
+                       else status_code((s.get("status") or "").strip())}
+                 for sid, s in steps.items() if isinstance(s, dict)}
+        doc = {**doc, "steps": steps}
+    name = doc.get("name")
+    return (str(name) if name else None), normalize(doc)
+
+
+def read_reports(path):
+    """Yield one raw record per report from a .json / .jsonl / .csv file ("-": JSON or JSON Lines on stdin)."""
+    ext = os.path.splitext(path)[1].lower()
+    if path == "-":
+        text = sys.stdin.read()
+        ext = ".json" if _is_json(text) else ".jsonl"
+        f = io.StringIO(text)
+    else:
+        f = open(path, encoding="utf-8-sig", newline="" if ext == ".csv" else None)
+    with f:
+        if ext == ".csv":
+            for row in csv.DictReader(f):
+                yield report_from_row(row)
+        elif ext in (".jsonl", ".ndjson"):
+            for n, line in enumerate(f, start=1):
+                if line.strip():
+                    try:
+                        yield json.loads(line)
+                    except json.JSONDecodeError as e:
+                        raise BatchInputError(f"{path}:{n}: {e}") from None
+        elif ext == ".json":
+            try:
+                data = json.load(f)
+            except json.JSONDecodeError as e:
+                raise BatchInputError(f"{path}: {e}") from None
+            if isinstance(data, dict) and isinstance(data.get("reports"), list):
+                data = data["reports"]
+            yield from data if isinstance(data, list) else [data]
+        else:
+            raise BatchInputError(f"{path}: expected .json, .jsonl or .csv")
+
+
+def _is_json(text):
+    try:
+        json.loads(text)
+        return True
+    except json.JSONDecodeError:
+        return False
+
+
+def _safe(stem):
+    return "".join(c if c.isalnum() or c in "-_." else "_" for c in stem)
+
+
+def workbook_name(i, name, report):
+    """File name inside the output: the record's `name`, else numbered customer/product."""
+    if name:
+        stem = _safe(name[:-5] if name.lower().endswith(".xlsx") else name)
+    else:
+        parts = [p for p in (report["info"]["customer"], report["info"]["product"]) if p]
+        stem = f"{i:05d}_" + _safe("_".join(["NPQP_8D", *parts]))
+    return stem + ".xlsx"
+
+
+def _build_chunk(chunk, fishbone):
+    """Pool worker: [(name, xlsx bytes, error)] for [(name, report)]."""
+    from fishbone import render_report_fishbone
+    from xlsx_export import build_report_workbook
+
+    out = []
+    for name, report in chunk:
+        try:
+            png = render_report_fishbone(report) if fishbone else None
+            out.append((name, build_report_workbook(report, png), None))
+        except Exception as e:
+            out.append((name, None, f"{type(e).__name__}: {e}"))
+    return out
+
+
+def _chunks(records, stats, size):
+    """Coerce and name records into lists of `size`; bad records go to stats["failed"]."""
+    chunk, used = [], collections.Counter()
+    for i, doc in enumerate(records, start=1):
+        stats["reports"] += 1
+        try:
+            name, report = coerce(doc)
+        except (ValueError, TypeError, AttributeError) as e:
+            stats["failed"].append((f"record {i}", f"{type(e).__name__}: {e}"))
+            continue
+        fname = workbook_name(i, name, report)
+        used[fname] += 1
+        if used[fname] > 1:
+            fname = f"{fname[:-5]}_{used[fname]}.xlsx"
+        chunk.append((fname, report))
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _results(chunks, fishbone, workers):
+    """Built chunks in input order, at most WINDOW chunks per worker in flight."""
+    if workers == 1:
+        for chunk in chunks:
+            yield _build_chunk(chunk, fishbone)
+        return
+    pool = ProcessPoolExecutor(max_workers=workers)
+    try:
+        pending = collections.deque()
+        for chunk in chunks:
+            pending.append(pool.submit(_build_chunk, chunk, fishbone))
+            if len(pending) >= workers * WINDOW:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+    finally:
+        pool.shutdown(cancel_futures=True)
+
+
+def generate_workbooks(records, out_dir=None, zip_to=None, workers=None, fishbone=True, chunksize=CHUNK_SIZE):
+    """Build one workbook per record; returns a summary dict.
+
+    Writes `out_dir`/<name>.xlsx, or streams every workbook into the zip
+    `zip_to` (a path or a binary file object; stored, not recompressed, since
+    XLSX is already deflated). Records are report dicts as in snapshots (see
+    snapshot.normalize) or CSV rows via report_from_row.
+    """
+    if (out_dir is None) == (zip_to is None):
+        raise ValueError("give exactly one of out_dir or zip_to")
+    stats = {"reports": 0, "written": 0, "bytes": 0, "failed": [], "seconds": 0.0}
+    t0 = time.perf_counter()
+    workers = workers or os.cpu_count() or 1
+    zf, stamp = None, time.localtime()[:6]
+    if zip_to is not None:
+        zf = zipfile.ZipFile(zip_to, "w", compression=zipfile.ZIP_STORED)
+    else:
+        os.makedirs(out_dir, exist_ok=True)
+    try:
+        for built in _results(_chunks(records, stats, chunksize), fishbone, workers):
+            for name, data, error in built:
+                if error:
+                    stats["failed"].append((name, error))
+                    continue
+                if zf is not None:
+                    zf.writestr(zipfile.ZipInfo(name, stamp), data)
+                else:
+                    with open(os.path.join(out_dir, name), "wb") as f:
+                        f.write(data)
+                stats["written"] += 1
+                stats["bytes"] += len(data)
+    finally:
+        if zf is not None:
+            zf.close()
+    stats["seconds"] = time.perf_counter() - t0
+    stats["per_minute"] = stats["written"] / stats["seconds"] * 60 if stats["seconds"] else 0.0
+    return stats
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Generate 8D workbooks from JSON / JSON Lines / CSV report data.")
+    ap.add_argument("inputs", nargs="+", help=".json, .jsonl or .csv files ('-' reads JSON from stdin)")
+    out = ap.add_mutually_exclusive_group(required=True)
+    out.add_argument("-o", "--out-dir", help="write one .xlsx per report here")
+    out.add_argument("--zip", help="stream all workbooks into this zip ('-' for stdout)")
+    ap.add_argument("--workers", type=int, default=None, help="processes (default: CPU count)")
+    ap.add_argument("--no-fishbone", action="store_true", help="skip the Fishbone sheet (faster)")
+    args = ap.parse_args(argv)
+
+    def records():
+        for path in args.inputs:
+            yield from read_reports(path)
+
+    zip_to = (sys.stdout.buffer if args.zip == "-" else args.zip) if args.zip else None
+    try:
+        stats = generate_workbooks(records(), args.out_dir, zip_to, workers=args.workers,
+                                   fishbone=not args.no_fishbone)
+    except (OSError, BatchInputError) as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 2
+    for name, error in stats["failed"]:
+        print(f"failed: {name}: {error}", file=sys.stderr)
+    print(f"{stats['written']}/{stats['reports']} workbooks in {stats['seconds']:.2f}s "
+          f"({stats['per_minute']:.0f}/min, {stats['bytes'] / 1024:.0f} KB), {len(stats['failed'])} failed",
+          file=sys.stderr if args.zip == "-" else sys.stdout)
+    return 1 if stats["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,112 @@
+# ===========================
+# 8D Report — XLSX Export Engine
+# Streams the NPQP workbook straight into memory (write-only mode, shared named styles)
+# ===========================
+
+import io
+
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font, Alignment, PatternFill, NamedStyle
+from openpyxl.utils import get_column_letter
+
+from catalog import step_colors
+
+XLSX_FILENAME = "NPQP_8D_Advanced.xlsx"
+XLSX_MIME = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+REPORT_TITLE = "Nissan NPQP 8D Report"
+HEADERS = ["Step", "Your Answer", "Root Cause", "Owner", "Due Date", "Status"]
+COL_WIDTHS = [28, 46, 40, 20, 18, 18]
+
+
+def _register_styles(wb):
+    """Add the shared named styles to `wb`; returns {color: style name} for step rows."""
+    wb.add_named_style(NamedStyle(
+        name="npqp_title",
+        font=Font(size=14, bold=True),
+        alignment=Alignment(horizontal="center", vertical="center"),
+    ))
+    wb.add_named_style(NamedStyle(
+        name="npqp_header",
+        font=Font(bold=True),
+        alignment=Alignment(horizontal="center", vertical="center", wrap_text=True),
+        fill=PatternFill(start_color="C0C0C0", end_color="C0C0C0", fill_type="solid"),
+    ))
+    step_styles = {}
+    for color in set(step_colors.values()) | {"FFFFFF"}:
+        name = f"npqp_step_{color}"
+        wb.add_named_style(NamedStyle(
+            name=name,
+            alignment=Alignment(wrap_text=True, vertical="top"),
+            fill=PatternFill(start_color=color, end_color=color, fill_type="solid"),
+        ))
+        step_styles[color] = name
+    return step_styles
+
+
+def _styled(ws, value, style):
+    cell = WriteOnlyCell(ws, value=value)
+    cell.style = style
+    return cell
+
+
+def build_8d_workbook(data_rows, report_date="", prepared_by="", product="", customer="", fishbone_png=None):
+    """Build the 8D workbook and return it as XLSX bytes.
+
+    `data_rows` is an iterable of (step, answer, root_cause, owner, due, status)
+    tuples, one per D-step. `fishbone_png` (PNG bytes of the Ishikawa layout)
+    adds a "Fishbone" sheet with the diagram. Nothing is written to disk.
+    """
+    wb = Workbook(write_only=True)
+    step_styles = _register_styles(wb)
+    ws = wb.create_sheet("NPQP 8D Report")
+
+    # Row/column dimensions and merges must be set before rows are streamed
+    for col, w in enumerate(COL_WIDTHS, start=1):
+        ws.column_dimensions[get_column_letter(col)].width = w
+    ws.row_dimensions[1].height = 24
+    ws.merged_cells.add("A1:F1")
+
+    # Title
+    ws.append([_styled(ws, REPORT_TITLE, "npqp_title")])
+    ws.append([])
+
+    # Report info (rows 3-6)
+    ws.append(["Report Date / Fecha", report_date])
+    ws.append(["Prepared By / Preparado por", prepared_by])
+    ws.append(["Product / Part", product])
+    ws.append(["Customer / Cliente", customer])
+    ws.append([])
+
+    # Headers (row 8)
+    ws.append([_styled(ws, h, "npqp_header") for h in HEADERS])
+
+    # Content (row 9+)
+    for step, ans, root, owner, due, status in data_rows:
+        style = step_styles[step_colors.get(step, "FFFFFF")]
+        values = (step, ans, root, owner, str(due) if due else "", status)
+        ws.append([_styled(ws, v, style) for v in values])
+
+    if fishbone_png:
+        from openpyxl.drawing.image import Image
+        from ishikawa import png_scale
+        fb_ws = wb.create_sheet("Fishbone")
+        img = Image(io.BytesIO(fishbone_png))
+        # Rendered at up to 2x (large diagrams at less); show at layout size
+        scale = png_scale(fishbone_png)
+        img.width, img.height = round(img.width / scale), round(img.height / scale)
+        fb_ws.add_image(img, "A1")
+
+    buf = io.BytesIO()
+    wb.save(buf)
+    return buf.getvalue()
+
+
+def build_report_workbook(report, fishbone_png=None):
+    """Build the workbook for a report dict (e.g. a decoded snapshot), step titles in its language."""
+    from catalog import T
+    from report_model import report_rows
+
+    rows = report_rows(report, T[report.get("language", "en")])
+    return build_8d_workbook(rows, fishbone_png=fishbone_png, **report["info"])
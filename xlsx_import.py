@@ -0,0 +1,212 @@
+# ===========================
+# 8D Report — XLSX Bulk Import
+# Reads workbooks in the layout written by xlsx_export (title A1, info B3:B6,
+# step rows from row 9) back into reports, across a process pool.
+# Run: python xlsx_import.py PATH [PATH ...] [--workers N] [--db path]
+# ===========================
+
+import argparse
+import datetime
+import hashlib
+import json
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from catalog import T
+from report_model import INFO_FIELDS, STEP_IDS, due_iso, empty_report, status_code, step_id
+from why_tree import parse_outline
+
+SHEET_NAME = "NPQP 8D Report"
+INFO_ROWS = range(3, 7)   # B3:B6, in INFO_FIELDS order
+FIRST_STEP_ROW = 9
+BATCH_SIZE = 500          # reports per store transaction
+
+# Every localized step title -> stable step ID
+_STEP_BY_TITLE = {title: step_id(title) for L in T.values() for title, _, _ in L["npqp_steps"]}
+_ES_TITLES = {title for title, _, _ in T["es"]["npqp_steps"]}
+
+# D5 answers are written as "<occurrence label>:\n<whys>\n\n<detection label>:\n<whys>";
+# accept the labels of both languages plus the bare words
+_WHY_HEADERS = {}
+for _L in T.values():
+    _WHY_HEADERS[_L["occurrence"].casefold()] = "occ"
+    _WHY_HEADERS[_L["detection"].casefold()] = "det"
+_WHY_HEADERS.update({"occurrence": "occ", "ocurrencia": "occ", "detection": "det", "detección": "det"})
+_WHY_PREFIX = re.compile(r"^\s*(?:why|¿por qué\?)\s*#?\d+\s*[:.)-]?\s*", re.IGNORECASE)
+
+
+class WorkbookFormatError(ValueError):
+    """The workbook is not in the NPQP 8D layout."""
+
+
+def split_whys(text):
+    """Split a combined D5 answer back into Whys and their parents, each {"occ": [...], "det": [...]}.
+
+    Branches are read back from the outline indentation (see why_tree.WhyTree.outline).
+    """
+    lines = {"occ": [], "det": []}
+    kind = "occ"
+    for line in (text or "").splitlines():
+        bare = line.strip()
+        header = _WHY_HEADERS.get(bare.rstrip(":").strip().casefold()) if bare.endswith(":") else None
+        if header:
+            kind = header
+        else:
+            lines[kind].append(line)
+    whys, parents = {}, {}
+    for kind, items in lines.items():
+        texts, parents[kind] = parse_outline(items)
+        whys[kind] = [_WHY_PREFIX.sub("", t) for t in texts]
+    return whys, parents
+
+
+def _cell_text(value):
+    if value is None:
+        return ""
+    if isinstance(value, datetime.datetime):
+        # Spreadsheet apps may turn "2025-03-01" into a real date
+        return value.date().isoformat()
+    if isinstance(value, datetime.date):
+        return value.isoformat()
+    return str(value).strip()
+
+
+def parse_8d_workbook(source):
+    """Read one 8D workbook (path or file-like) into a report dict.
+
+    Opened read-only, so rows are streamed and the file is never fully loaded.
+    Raises WorkbookFormatError if no step rows are found.
+    """
+    from openpyxl import load_workbook
+
+    wb = load_workbook(source, read_only=True, data_only=True)
+    try:
+        ws = wb[SHEET_NAME] if SHEET_NAME in wb.sheetnames else wb.worksheets[0]
+        report = empty_report()
+        seen, spanish = set(), False
+        for r, row in enumerate(ws.iter_rows(min_row=1, max_col=6, values_only=True), start=1):
+            row = [_cell_text(v) for v in row] + [""] * (6 - len(row))
+            if r in INFO_ROWS:
+                report["info"][INFO_FIELDS[r - INFO_ROWS.start]] = row[1]
+                continue
+            if r < FIRST_STEP_ROW:
+                continue
+            title, answer, root, owner, due, status = row[:6]
+            sid = _STEP_BY_TITLE.get(title) or step_id(title)
+            if sid not in STEP_IDS:
+                continue
+            spanish |= title in _ES_TITLES
+            seen.add(sid)
+            report["steps"][sid] = {"answer": answer, "owner": owner, "due": due_iso(due),
+                                    "status": status_code(status)}
+            if sid == "D5":
+                report["d5_root"] = root
+                report["whys"], report["why_parents"] = split_whys(answer)
+    finally:
+        wb.close()
+    if not seen:
+        raise WorkbookFormatError("no 8D step rows found")
+    report["language"] = "es" if spanish else "en"
+    report["fishbone"] = {c: [] for c in report["fishbone"]}   # the diagram sheet is only a picture
+    return report
+
+
+def content_hash(report):
+    """Stable hash of a report's content; re-saving the same workbook yields the same hash."""
+    blob = json.dumps(report, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+def _parse_file(path):
+    """Pool worker: (path, uid, report, error)."""
+    try:
+        report = parse_8d_workbook(path)
+        return path, content_hash(report)[:32], report, None
+    except Exception as e:
+        return path, None, None, f"{type(e).__name__}: {e}"
+
+
+def find_workbooks(paths):
+    """Expand files and directories (recursively) into .xlsx paths, skipping Office lock files."""
+    out = []
+    for p in paths:
+        if os.path.isdir(p):
+            for root, _, files in os.walk(p):
+                out.extend(os.path.join(root, f) for f in sorted(files)
+                           if f.lower().endswith(".xlsx") and not f.startswith("~$"))
+        else:
+            out.append(p)
+    return out
+
+
+def import_workbooks(paths, store=None, workers=None, chunksize=8):
+    """Parse `paths` on a process pool and store new reports; returns a summary dict.
+
+    Reports are keyed by content hash, so importing the same files again stores
+    nothing new. The store is written only from this process, in batches.
+    """
+    if store is None:
+        from report_store import get_store
+        store = get_store()
+    files = find_workbooks(paths)
+    stats = {"files": len(files), "imported": 0, "duplicates": 0, "failed": [], "seconds": 0.0}
+    t0 = time.perf_counter()
+    batch = {}
+
+    def flush():
+        known = store.existing(list(batch))
+        new = {uid: r for uid, r in batch.items() if uid not in known}
+        stats["duplicates"] += len(batch) - len(new)
+        if new:
+            store.save_many(new.items())
+            stats["imported"] += len(new)
+        batch.clear()
+
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        results = map(_parse_file, files)
+        pool = None
+    else:
+        pool = ProcessPoolExecutor(max_workers=workers)
+        results = pool.map(_parse_file, files, chunksize=chunksize)
+    try:
+        for path, uid, report, error in results:
+            if error:
+                stats["failed"].append((path, error))
+            elif uid in batch:
+                stats["duplicates"] += 1
+            else:
+                batch[uid] = report
+                if len(batch) >= BATCH_SIZE:
+                    flush()
+        flush()
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+    stats["seconds"] = time.perf_counter() - t0
+    stats["files_per_sec"] = len(files) / stats["seconds"] if stats["seconds"] else 0.0
+    return stats
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Bulk import 8D workbooks into the report store.")
+    ap.add_argument("paths", nargs="+", help="workbook files or directories")
+    ap.add_argument("--workers", type=int, default=None, help="processes (default: CPU count)")
+    ap.add_argument("--db", help="store path (default: NPQP_DB_PATH or npqp_8d.sqlite3)")
+    args = ap.parse_args(argv)
+
+    from report_store import ReportStore, get_store
+    store = ReportStore(args.db) if args.db else get_store()
+    stats = import_workbooks(args.paths, store, workers=args.workers)
+    for path, error in stats["failed"]:
+        print(f"failed: {path}: {error}", file=sys.stderr)
+    print(f"{stats['files']} files in {stats['seconds']:.2f}s ({stats['files_per_sec']:.1f} files/s): "
+          f"{stats['imported']} imported, {stats['duplicates']} duplicates, {len(stats['failed'])} failed")
+    return 1 if stats["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())